@@ -25,6 +25,9 @@
 
 #include <string>
 #include <cstring>
+#include <cstddef>
+#include <algorithm>
+#include <vector>
 #include <optional>
 #include <functional>
 #include <memory>
@@ -42,6 +45,7 @@ namespace zefDB {
         SET_VARIABLE,
         DICT_VARIABLE,
         COLLISION_HASH_MAP,
+        HASH_INDEX,
     };
 
     //////////////////////////////////////////////
@@ -674,6 +678,297 @@ namespace zefDB {
         }
     };
 
+    //////////////////////////////
+    // ** hash index
+
+    // A drop-in replacement for AppendOnlyBinaryTree with O(1) lookups. The
+    // elements are stored exactly as in AppendOnlyBinaryTree (so diffs are
+    // interchangeable), but they are found through a lookup table placed
+    // after the element storage:
+    //
+    //   [header][elements: capacity][buckets: 2*capacity][chain: capacity]
+    //
+    // Each bucket holds (index+1) of the latest element hashed to it, and
+    // chain[index] holds (index+1) of the element before it in the same
+    // bucket (0 ends the chain). When the capacity runs out, it is doubled
+    // and a new table is built past the old one while readers keep using the
+    // old table. As the elements then grow over the old table, the switch to
+    // the new one happens while no reader is inside the structure.
+    //
+    // Existing trees are converted in place when a v5 FileGraph is updated
+    // to v6.
+    //
+    // As the table is persisted, the hash of a key must not depend on the
+    // process. KEY must be a plain struct of 8-byte words (BaseUID,
+    // EternalUID).
+    template <class KEY, class VAL>
+    struct AppendOnlyHashIndex {
+        struct Element {
+            KEY key;
+            VAL val;
+            // Unused, only here to keep the layout of AppendOnlyBinaryTree.
+            size_t left;
+            size_t right;
+        };
+        static_assert(sizeof(KEY) % sizeof(uint64_t) == 0);
+
+        constexpr static char current_kind_version = 1;
+        constexpr static unsigned char min_capacity_log2 = 10;
+
+        AppendOnlyKind kind;
+        char kind_version;
+        // Lives in what is padding for AppendOnlyBinaryTree, so the header
+        // keeps the same size.
+        unsigned char capacity_log2;
+        size_t _size;
+        size_t _upstream_size;
+        size_t _revision;
+
+        size_t& size() { return _size; }
+        size_t& upstream_size() { return _upstream_size; }
+        size_t& revision() { return _revision; }
+
+        // See WholeFileMapping::Pointer::EnsureFunc
+        using ensure_func_t = const std::function<AppendOnlyHashIndex&(size_t new_head, const std::function<void(AppendOnlyHashIndex&)> & exclusively)>;
+
+        static uint64_t hash_key(const KEY & key) {
+            // splitmix64 over the words of the key
+            uint64_t h = 0;
+            for(size_t i = 0 ; i < sizeof(KEY) / sizeof(uint64_t) ; i++) {
+                uint64_t word;
+                std::memcpy(&word, (const char*)&key + i*sizeof(uint64_t), sizeof(uint64_t));
+                h += word + 0x9e3779b97f4a7c15ULL;
+                h = (h ^ (h >> 30)) * 0xbf58476d1ce4e5b9ULL;
+                h = (h ^ (h >> 27)) * 0x94d049bb133111ebULL;
+                h = h ^ (h >> 31);
+            }
+            return h;
+        }
+
+        static size_t capacity_for(unsigned char log2) { return size_t(1) << log2; }
+        static size_t bytes_for(unsigned char log2) {
+            return sizeof(AppendOnlyHashIndex) + capacity_for(log2)*(sizeof(Element) + 3*sizeof(size_t));
+        }
+        static unsigned char log2_for(size_t n, unsigned char at_least) {
+            unsigned char log2 = std::max(at_least, min_capacity_log2);
+            while(capacity_for(log2) < n)
+                log2++;
+            return log2;
+        }
+
+        Element* index_to_element(size_t index) const {
+            return (Element*)((uintptr_t)this + sizeof(AppendOnlyHashIndex) + index*sizeof(Element));
+        }
+        size_t element_to_index(Element* el) const {
+            return (el - index_to_element(0));
+        }
+        // The table for a given capacity, i.e. 2*capacity buckets followed by
+        // capacity chain links.
+        size_t* table(unsigned char log2) const {
+            return (size_t*)index_to_element(capacity_for(log2));
+        }
+        static size_t bucket_index(const KEY & key, unsigned char log2) {
+            return hash_key(key) & (2*capacity_for(log2) - 1);
+        }
+
+        std::vector<Element> as_vector() {
+            return std::vector<Element>(index_to_element(0), index_to_element(_size));
+        }
+
+        Element * find_element(const KEY & needle) const {
+            if(_size == 0)
+                return nullptr;
+            unsigned char log2 = capacity_log2;
+            size_t * buckets = table(log2);
+            size_t * chain = buckets + 2*capacity_for(log2);
+            size_t next = buckets[bucket_index(needle, log2)];
+            while(next != 0) {
+                Element * el = index_to_element(next-1);
+                if(el->key == needle)
+                    return el;
+                next = chain[next-1];
+            }
+            return nullptr;
+        }
+
+        std::optional<VAL> maybe_at(const KEY & needle) const {
+            auto el = find_element(needle);
+            if(el == nullptr)
+                return {};
+            return el->val;
+        }
+        VAL at(const KEY & needle) const {
+            auto maybe = maybe_at(needle);
+            if(maybe)
+                return *maybe;
+            throw std::out_of_range("Couldn't find " + to_str(needle) + " in AppendOnlyHashIndex.");
+        }
+
+        bool contains(const KEY & needle) const {
+            return find_element(needle) != nullptr;
+        }
+
+        // Put the element at index at the front of its bucket in the table
+        // for log2.
+        void _link(size_t index, unsigned char log2) {
+            size_t * buckets = table(log2);
+            size_t * chain = buckets + 2*capacity_for(log2);
+            size_t & bucket = buckets[bucket_index(index_to_element(index)->key, log2)];
+            chain[index] = bucket;
+            bucket = index+1;
+        }
+
+        // Build the table for log2 from all current elements. Needs the
+        // mapping to be big enough already.
+        void _build_table(unsigned char log2) {
+            std::memset(table(log2), 0, 3*capacity_for(log2)*sizeof(size_t));
+            for(size_t i = 0 ; i < _size ; i++)
+                _link(i, log2);
+        }
+
+        // Make room for at least new_size elements. Returns the (possibly
+        // moved) structure.
+        AppendOnlyHashIndex* _reserve(size_t new_size, const ensure_func_t & ensure_func) {
+            if(new_size <= capacity_for(capacity_log2))
+                return this;
+            unsigned char new_log2 = log2_for(new_size, capacity_log2);
+            AppendOnlyHashIndex * new_this = &ensure_func(bytes_for(new_log2), nullptr);
+            // The new table starts after the old one ends, as elements are
+            // bigger than the 3 words per element of the table, so readers
+            // are not disturbed while it is built.
+            static_assert(sizeof(Element) >= 3*sizeof(size_t));
+            new_this->_build_table(new_log2);
+            // The next element pushed overwrites the start of the old table.
+            return &ensure_func(bytes_for(new_log2), [new_log2](AppendOnlyHashIndex & self) {
+                self.capacity_log2 = new_log2;
+            });
+        }
+
+        void _push(const KEY & key, const VAL & val) {
+            auto at_end = index_to_element(_size);
+            // Clear out any padding, these bytes go out in diffs.
+            std::memset((void*)at_end, 0, sizeof(Element));
+            at_end->key = key;
+            at_end->val = val;
+            _link(_size, capacity_log2);
+            _size++;
+        }
+
+        AppendOnlyHashIndex* _append(KEY && key, VAL && val, const ensure_func_t & ensure_func, bool already_ensured) {
+            if(contains(key))
+                throw std::runtime_error("AppendOnlyHashIndex already contains key: " + to_str(key));
+
+            AppendOnlyHashIndex * new_this = _reserve(_size+1, ensure_func);
+            new_this->_push(key, val);
+            return new_this;
+        }
+        AppendOnlyHashIndex* append(const KEY & key, const VAL & val, const ensure_func_t & ensure_func, bool already_ensured=false) {
+            KEY _key = key;
+            VAL _val = val;
+            return _append(std::move(_key), std::move(_val), ensure_func, already_ensured);
+        }
+
+        AppendOnlyHashIndex* append(KEY && key, VAL && val, const ensure_func_t & ensure_func, bool already_ensured=false) {
+            return _append(std::move(key), std::move(val), ensure_func, already_ensured);
+        }
+
+        // Append all items in order, growing the table only once.
+        AppendOnlyHashIndex* append_bulk(const std::vector<std::pair<KEY,VAL>> & items, const ensure_func_t & ensure_func) {
+            AppendOnlyHashIndex * new_this = _reserve(_size + items.size(), ensure_func);
+            for(auto & item : items) {
+                if(new_this->contains(item.first))
+                    throw std::runtime_error("AppendOnlyHashIndex already contains key: " + to_str(item.first));
+                new_this->_push(item.first, item.second);
+            }
+            return new_this;
+        }
+
+        void _pop(const KEY &key, const VAL & val, const ensure_func_t &ensure_func) {
+            // This is a low level function that should only be called when
+            // absolutely sure it makes sense to pop the final element. The key
+            // and val must be passed in to validate that the caller is popping
+            // the right thing.
+            size_t to_pop_ind = this->_size - 1;
+            auto to_pop = this->index_to_element(to_pop_ind);
+            if(to_pop->key != key || to_pop->val != val) {
+                std::cerr << to_pop->key << ":" << to_pop->val << std::endl;
+                std::cerr << key << ":" << val << std::endl;
+                throw std::runtime_error("Pop called with something that doesn't match the final element in the index");
+            }
+            // The last element is always at the front of its bucket.
+            size_t * buckets = table(capacity_log2);
+            size_t * chain = buckets + 2*capacity_for(capacity_log2);
+            size_t & bucket = buckets[bucket_index(key, capacity_log2)];
+            if(bucket != to_pop_ind+1)
+                throw std::runtime_error("Final element of the index is not at the front of its bucket.");
+            bucket = chain[to_pop_ind];
+
+            // The capacity is kept, so there is nothing to shrink.
+            _size--;
+        }
+
+        std::string create_diff(size_t from, size_t to) {
+            std::string out((char*)index_to_element(from), (char*)index_to_element(to));
+            return out;
+        }
+
+        void apply_diff(std::string diff, const ensure_func_t & ensure_func) {
+            if(diff.size() % sizeof(Element) != 0)
+                throw std::runtime_error("Diff isn't a multiple of data type");
+
+            // This is also how a whole cache is bulk loaded, so grow only
+            // once for everything.
+            size_t n_new = diff.size()/sizeof(Element);
+            size_t new_size = _size + n_new;
+            auto & new_this = *_reserve(new_size, ensure_func);
+
+            const Element * data = (Element*)diff.c_str();
+            for(size_t i = 0 ; i < n_new ; i++) {
+                if(new_this.contains(data[i].key))
+                    throw std::runtime_error("AppendOnlyHashIndex already contains key: " + to_str(data[i].key));
+                new_this._push(data[i].key, data[i].val);
+            }
+
+            if(new_this._size != new_size)
+                throw std::runtime_error("Size after appending diff is not what was expected.");
+        }
+
+        void _construct(bool uninitialized, const ensure_func_t & ensure_func) {
+            // Diffs are exchanged with the binary tree format.
+            static_assert(sizeof(Element) == sizeof(typename AppendOnlyBinaryTree<KEY,VAL>::Element));
+
+            if(uninitialized) {
+                auto& new_this = ensure_func(bytes_for(min_capacity_log2), nullptr);
+                new_this.kind = AppendOnlyKind::HASH_INDEX;
+                new_this.kind_version = current_kind_version;
+                new_this._size = 0;
+                new_this._upstream_size = 0;
+                new_this._revision = 0;
+                new_this._build_table(min_capacity_log2);
+                new_this.capacity_log2 = min_capacity_log2;
+            } else if(kind == AppendOnlyKind::BINARY_TREE) {
+                // Updating a v5 FileGraph (see FileGraph::Prefix_v6). The
+                // elements stay where they are, only the table has to be
+                // built after them.
+                static_assert(sizeof(AppendOnlyHashIndex) == sizeof(AppendOnlyBinaryTree<KEY,VAL>));
+                static_assert(offsetof(AppendOnlyHashIndex, _size) == offsetof(AppendOnlyBinaryTree<KEY,VAL>, _size));
+                unsigned char log2 = log2_for(_size, 0);
+                auto& new_this = ensure_func(bytes_for(log2), nullptr);
+                new_this._build_table(log2);
+                new_this.capacity_log2 = log2;
+                new_this.kind = AppendOnlyKind::HASH_INDEX;
+                new_this.kind_version = current_kind_version;
+                new_this._upstream_size = 0;
+            } else {
+                if(kind != AppendOnlyKind::HASH_INDEX)
+                    throw std::runtime_error("HASH_INDEX is not a HASH_INDEX");
+                if(kind_version != current_kind_version)
+                    throw std::runtime_error("HASH_INDEX has kind_version " + to_str(int(kind_version)) + " instead of " + to_str(int(current_kind_version)));
+                _upstream_size = 0;
+            }
+        }
+    };
+
     // This is basically the same as a binary tree, but there is a concept of
     // hash and value for the comparison, where the value is looked up from the
     // graph.
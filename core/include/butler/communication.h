@@ -54,9 +54,9 @@ namespace zefDB {
 
         // Convert a compressed string into the json + extras part.
         // example: [27,5]|{...}xzxzx
-        LIBZEF_DLL_EXPORTED std::tuple<json,std::vector<std::string>> parse_ZH_message(std::string input); 
+        LIBZEF_DLL_EXPORTED std::tuple<json,std::vector<std::string>> parse_ZH_message(std::string input, const ZstdDictionary * dict = nullptr); 
 
-        LIBZEF_DLL_EXPORTED std::string prepare_ZH_message(const json & main_json, const std::vector<std::string> & vec = {}); 
+        LIBZEF_DLL_EXPORTED std::string prepare_ZH_message(const json & main_json, const std::vector<std::string> & vec = {}, const ZstdDictionary * dict = nullptr); 
 
         typedef websocketpp::lib::shared_ptr<websocketpp::lib::asio::ssl::context> ssl_context_ptr;
 
@@ -148,6 +148,18 @@ namespace zefDB {
             // TODO change to atomic wait struct
             AtomicLockWrapper locker;
 
+            // Dictionary for the zstd frames of the messages on this
+            // connection, or nullptr for none. It is replaced as a whole, so
+            // that messages in flight keep the one they started with alive.
+            std::shared_ptr<const ZstdDictionary> _zstd_dictionary;
+
+            void set_zstd_dictionary(const std::string & dictionary, int compression_level = 10) {
+                std::atomic_store(&_zstd_dictionary, load_zstd_dictionary(dictionary, compression_level));
+            }
+            std::shared_ptr<const ZstdDictionary> zstd_dictionary() {
+                return std::atomic_load(&_zstd_dictionary);
+            }
+
             PersistentConnection() {
                 // create_endpoint();
             };
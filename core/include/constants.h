@@ -97,6 +97,14 @@ namespace zefDB {
 
 		
 		constexpr int new_appended_edge_list_growth_factor = 3;
+
+        // Spacing (in blobs, i.e. 1MB) of the intermediate hash states kept
+        // for the full graph hash, see internals::HashCheckpoints.
+		constexpr int hash_checkpoint_interval = 1 << 16;
+
+        // Number of blobs each worker scans at a time in
+        // internals::fill_caches_for_blob_range.
+		constexpr int cache_fill_chunk_blobs = 1 << 14;
 		
         // This is not necessary but seems like a good idea. If it starts being
         // a pain, then we can simply remove it.
@@ -33,6 +33,10 @@
 #include <thread>
 #include <future>
 #include <unordered_set>
+#include <unordered_map>
+#include <set>
+#include <map>
+#include <limits>
 // #include <chrono>         // std::chrono::seconds
 #include "range/v3/all.hpp"
 
@@ -106,6 +110,65 @@ namespace zefDB {
     // using UID_or_string = std::variant<BaseUID,EternalUID,std::string>;
     using UID_or_string = std::variant<BaseUID,EternalUID,TagString>;
 
+    namespace internals {
+        // The instances hanging off each delegate, so that "all[ET.X]" does
+        // not have to walk every RAE_INSTANCE_EDGE ever created for a type.
+        // This is not file backed: it is brought up to date lazily, by
+        // scanning only the blobs that were appended since the last lookup
+        // (the full graph on the first lookup after loading).
+        struct LiveInstanceIndex {
+            struct PerDelegate {
+                // Instances not terminated in any of the scanned blobs, in
+                // the order they were created.
+                std::set<blob_index> live;
+                // (termination time slice, instance) in the order the
+                // terminations were written, i.e. sorted by time slice.
+                std::vector<std::pair<TimeSlice,blob_index>> terminated;
+            };
+            std::mutex m;
+            blob_index scanned_up_to = 0;
+            // Keyed by the index of the TO_DELEGATE_EDGE of the delegate.
+            std::unordered_map<blob_index,PerDelegate> per_delegate;
+        };
+
+        // Lookup of entities by the value of one of their fields. For an
+        // (ET, RT) pair, this holds the RT relations out of ET instances,
+        // keyed by the hash of every value their target was assigned (or of
+        // the value node they point to). Candidates still have to be checked
+        // against the value at the time slice asked for.
+        //
+        // Like the LiveInstanceIndex, this is not file backed and is brought
+        // up to date lazily from the blobs appended since the last lookup,
+        // which picks up new relations and assignments alike. A pair is only
+        // indexed after its first lookup, which scans the whole graph.
+        struct FieldValueIndex {
+            struct PerField {
+                blob_index scanned_up_to = 0;
+                std::unordered_map<value_hash_t,std::vector<blob_index>> relations;
+            };
+            std::mutex m;
+            // Keyed by (entity type, relation type)
+            std::map<std::pair<token_value_t,token_value_t>,PerField> per_field;
+        };
+
+        // Intermediate XXHash64 states of the "blobs_full" hash, i.e. of
+        // the bytes [ROOT_NODE, boundary) for every boundary that is a
+        // multiple of constants::hash_checkpoint_interval past the root
+        // node. Hashing up to the head then only has to go over the blobs
+        // past the last valid checkpoint instead of the whole graph.
+        //
+        // Blobs are append only, apart from the edge lists of existing blobs
+        // and the root node info. Every such write lowers lowest_modified,
+        // and checkpoints past it are dropped before the next hash. This is
+        // not file backed: the first hash after loading goes over everything.
+        struct HashCheckpoints {
+            std::mutex m;
+            uint64_t seed = 0;
+            std::vector<std::pair<blob_index,XXHash64>> states;
+            std::atomic<blob_index> lowest_modified = std::numeric_limits<blob_index>::max();
+        };
+    }
+
     struct LIBZEF_DLL_EXPORTED GraphData {
 		// the GraphData needs to have the info where the actual pool that was allocated starts. Why? The active_graph_data_tracker has access to 
 		// all the GraphData objects only (not Graphs object). It also needs to return e.g. a vector of all active graphs.
@@ -220,11 +283,17 @@ namespace zefDB {
 
         // std::unique_ptr<MMap::WholeFileMapping<AppendOnlyDictFixed<BaseUID,blob_index>>> uid_lookup;
         // std::unique_ptr<MMap::WholeFileMapping<AppendOnlyDictFixed<EternalUID,blob_index>>> euid_lookup;
-        std::unique_ptr<MMap::WholeFileMapping<AppendOnlyBinaryTree<BaseUID,blob_index>>> uid_lookup;
-        std::unique_ptr<MMap::WholeFileMapping<AppendOnlyBinaryTree<EternalUID,blob_index>>> euid_lookup;
+        // std::unique_ptr<MMap::WholeFileMapping<AppendOnlyBinaryTree<BaseUID,blob_index>>> uid_lookup;
+        // std::unique_ptr<MMap::WholeFileMapping<AppendOnlyBinaryTree<EternalUID,blob_index>>> euid_lookup;
+        std::unique_ptr<MMap::WholeFileMapping<AppendOnlyHashIndex<BaseUID,blob_index>>> uid_lookup;
+        std::unique_ptr<MMap::WholeFileMapping<AppendOnlyHashIndex<EternalUID,blob_index>>> euid_lookup;
         std::unique_ptr<MMap::WholeFileMapping<AppendOnlyDictVariable<VariableString,VariableBlobIndex>>> tag_lookup;
         std::unique_ptr<MMap::WholeFileMapping<AppendOnlyCollisionHashMap<value_hash_t,blob_index>>> av_hash_lookup;
 
+        std::unique_ptr<internals::LiveInstanceIndex> live_instance_index = std::make_unique<internals::LiveInstanceIndex>();
+        std::unique_ptr<internals::FieldValueIndex> field_value_index = std::make_unique<internals::FieldValueIndex>();
+        std::unique_ptr<internals::HashCheckpoints> hash_checkpoints = std::make_unique<internals::HashCheckpoints>();
+
         // std::unique_ptr<TokenStore> local_tokens;
 
         std::vector<std::string> tag_list; // list of tags last received from zefhub
@@ -381,7 +450,9 @@ namespace zefDB {
 	LIBZEF_DLL_EXPORTED std::ostream& operator << (std::ostream& o, GraphRef& g);
 
 
-    LIBZEF_DLL_EXPORTED GraphDataWrapper create_partial_graph(GraphData & cur_gd, blob_index index_hi);
+    // rebuild_caches fills the caches of the copy from its blobs instead of
+    // copying them, to check the two agree.
+    LIBZEF_DLL_EXPORTED GraphDataWrapper create_partial_graph(GraphData & cur_gd, blob_index index_hi, bool rebuild_caches = false);
     LIBZEF_DLL_EXPORTED uint64_t partial_hash(Graph g, blob_index index_hi, uint64_t seed, std::string working_layout);
 
     inline void save_local(Graph & g) {
@@ -438,6 +509,12 @@ namespace zefDB {
 		LIBZEF_DLL_EXPORTED str get_graph_revision_info(GraphData& gd);
 
         uint64_t hash_memory_range(const void * lo_ptr, size_t len, uint64_t seed=0);
+        // The 0.3.0 layout hash of [ROOT_NODE, index_hi), resumed from and
+        // extending the HashCheckpoints of gd.
+        uint64_t hash_graph_prefix(const GraphData & gd, blob_index index_hi, uint64_t seed=0);
+        // Record that the bytes of the blob at index_modified (or a blob
+        // after it) were changed in place.
+        LIBZEF_DLL_EXPORTED void invalidate_hash_checkpoints(GraphData & gd, blob_index index_modified);
 
 
         LIBZEF_DLL_EXPORTED Messages::UpdatePayload payload_from_local_file(std::filesystem::path path);
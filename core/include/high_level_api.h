@@ -274,6 +274,34 @@ namespace zefDB {
     LIBZEF_DLL_EXPORTED extern template ZefRef instantiate_value_node(const AttributeEntityType & value, Graph& g);
 
 
+    // Bulk application of the simple GraphDelta commands (instantiate and
+    // assign) in a single call, all inside one transaction. Relation
+    // endpoints and assignment targets are either an index into the results
+    // of earlier commands in the same batch, or an existing blob. The result
+    // contains one ZefRef per command, in the frame of the open transaction.
+    struct BulkCommand {
+        enum class Kind : unsigned char {
+            instantiate_entity,
+            instantiate_atomic_entity,
+            instantiate_relation,
+            assign_value,
+        };
+        using ref_t = std::variant<int, EZefRef>;
+
+        Kind kind;
+        std::variant<std::monostate, EntityType, AttributeEntityType, RelationType> rae_type;
+        // For assign_value only the source is used: it is the AE being assigned to.
+        std::optional<ref_t> source;
+        std::optional<ref_t> target;
+        std::optional<value_variant_t> value;
+    };
+
+    LIBZEF_DLL_EXPORTED std::vector<ZefRef> apply_bulk_commands(GraphData& gd, const std::vector<BulkCommand> & commands);
+    inline std::vector<ZefRef> apply_bulk_commands(const Graph& g, const std::vector<BulkCommand> & commands) {
+        return apply_bulk_commands(g.my_graph_data(), commands);
+    }
+
+
 
 
 	namespace internals {
@@ -531,6 +531,25 @@ namespace zefDB {
 			return my_entity_or_rel; // hack to suppress compiler warnings
 		}                        
 
+        // The instances of the delegate owning to_delegate_edge that can
+        // exist at time slice ts, in the order they were created. These are
+        // the currently live instances plus those terminated after ts; the
+        // caller still has to check exists_at for the instantiation side.
+        LIBZEF_DLL_EXPORTED std::vector<blob_index> instance_candidates(EZefRef to_delegate_edge, TimeSlice ts);
+        // Drop everything the LiveInstanceIndex learnt from blobs at or after index_hi.
+        LIBZEF_DLL_EXPORTED void roll_back_live_instance_index(GraphData & gd, blob_index index_hi);
+
+        // The RT relations out of ET instances whose target was, at some
+        // point, assigned a value with the same hash as val, in the order
+        // they were created. The caller has to check the relations and their
+        // values at the time slice of interest.
+        LIBZEF_DLL_EXPORTED std::vector<blob_index> field_value_candidates(GraphData & gd, EntityType et, RelationType rt, const value_variant_t & val);
+        // Whether (et, rt) has been looked up before, so that the next lookup
+        // only scans the blobs appended since, instead of the whole graph.
+        LIBZEF_DLL_EXPORTED bool has_field_value_index(GraphData & gd, EntityType et, RelationType rt);
+        // Drop everything the FieldValueIndex learnt from blobs at or after index_hi.
+        LIBZEF_DLL_EXPORTED void roll_back_field_value_index(GraphData & gd, blob_index index_hi);
+
 
     }
 }
@@ -18,10 +18,14 @@
 
 #include <iostream>
 #include <vector>
+#include <algorithm>
+#include <tuple>
 #include <stdexcept>
 #include <bitset>
 #include <limits>
 #include <array>
+#include <functional>
+#include <cstddef>
 
 #include "include_fs.h"
 
@@ -207,7 +211,35 @@ namespace zefDB {
                 
                 Prefix_v5(BaseUID uid) : uid(uid) {};
             };
-            using latest_Prefix_t = Prefix_v5;
+            // The same fields as Prefix_v5, but the files of uid_lookup and
+            // euid_lookup hold an AppendOnlyHashIndex instead of an
+            // AppendOnlyBinaryTree. A v5 file is converted when its graph is
+            // loaded, see mark_uid_lookups_converted.
+            struct Prefix_v6 {
+                constexpr static int VERSION = 6;
+                int version = VERSION;
+                zefDB::BaseUID uid;
+                blob_index last_update = 0;
+                std::array<Element_v1, MMap::PAGE_BITMAP_BITS> page_info;
+
+                // Next free file is 1, as we are currently 0.
+                int next_free_file_index = 1;
+
+                // Where can we map the token file structure
+                WholeFile_v1 tokens_ET;
+                WholeFile_v1 tokens_RT;
+                WholeFile_v1 tokens_EN;
+
+                WholeFile_v1 uid_lookup;
+                WholeFile_v1 euid_lookup;
+                WholeFile_v1 tag_lookup;
+                WholeFile_v1 av_hash_lookup;
+
+                Prefix_v6(BaseUID uid) : uid(uid) {};
+            };
+            static_assert(sizeof(Prefix_v5) == sizeof(Prefix_v6));
+            static_assert(offsetof(Prefix_v5, av_hash_lookup) == offsetof(Prefix_v6, av_hash_lookup));
+            using latest_Prefix_t = Prefix_v6;
             constexpr static int filegraph_default_version = latest_Prefix_t::VERSION;
 
             void * main_file_mapping = nullptr;
@@ -236,6 +268,13 @@ namespace zefDB {
 
             void convert_prefix_struct(BaseUID uid);
 
+            // Whether the uid lookups still have to be converted from
+            // AppendOnlyBinaryTree, i.e. this is a v5 (or older) file.
+            bool uid_lookups_need_conversion() const;
+            // Called once the uid lookups have been converted to finish the
+            // update to the latest version.
+            void mark_uid_lookups_converted();
+
             // This pattern will repeat a lot. Perhaps need a macro to handle it?
             blob_index get_latest_blob_index() const;
             void set_latest_blob_index(blob_index new_value);
@@ -286,6 +325,15 @@ namespace zefDB {
             std::bitset<PAGE_BITMAP_BITS> occupied_pages;
             std::bitset<PAGE_BITMAP_BITS> loaded_pages;
 
+            // Only used for MMAP_STYLE_FILE_BACKED: the page clock when each
+            // page was last mapped in, or 0 if the page is not resident
+            // (never loaded or evicted). See evict_cold_pages.
+            std::array<std::atomic<uint32_t>,PAGE_BITMAP_BITS> page_last_used;
+            // The last page mapped in by a miss, to detect sequential scans.
+            size_t last_missed_page = 0;
+            // Serialises mapping and evicting pages of this mmap.
+            std::mutex page_mutex;
+
             // If true, the memory has been freed.
             bool released = false;
             std::atomic_int refcount = 0;
@@ -341,6 +389,27 @@ namespace zefDB {
         }
 
         LIBZEF_DLL_EXPORTED void ensure_page(MMapAllocInfo & info, size_t page_ind);
+        // Map in all pages from page_ind_low to page_ind_high (inclusive),
+        // with one mapping per contiguous run of missing pages.
+        LIBZEF_DLL_EXPORTED void ensure_page_range(MMapAllocInfo & info, size_t page_ind_low, size_t page_ind_high);
+
+        // ** Page budget for file backed graphs
+        //
+        // Pages of file backed graphs stay mapped once loaded, as pointers to
+        // blobs are handed out freely. Instead, when the pages of all file
+        // backed graphs together go over the budget, the least recently
+        // mapped in ones are dropped from memory (they are reread from the
+        // file on the next access). Pages are only stamped when they are
+        // mapped in, so a page in constant use is evicted like any other and
+        // stamped again when it faults back in. The budget starts out from
+        // the environment variable ZEFDB_FILEGRAPH_MEMORY_BUDGET_MB and 0
+        // means unlimited. Not supported on windows.
+        LIBZEF_DLL_EXPORTED void set_page_budget(size_t bytes);
+        LIBZEF_DLL_EXPORTED size_t get_page_budget();
+        // Number of pages of all file backed graphs currently in memory.
+        LIBZEF_DLL_EXPORTED size_t loaded_filegraph_pages();
+        // Returns the number of pages evicted to get under budget.
+        LIBZEF_DLL_EXPORTED size_t evict_cold_pages(size_t budget);
 #ifdef ZEFDB_TEST_NO_MMAP_CHECKS
         LIBZEF_DLL_EXPORTED void ensure_page_direct(MMapAllocInfo & info, size_t page_ind);
 #endif
@@ -358,13 +427,13 @@ namespace zefDB {
             // it would be compile-time optimised anyway though
             size_t page_ind_low = ptr_to_page_ind(ptr);
             size_t page_ind_high = ptr_to_page_ind((char*)ptr+(size-1));
-            for (auto page_ind = page_ind_low ; page_ind <= page_ind_high ; page_ind++) {
 #ifdef ZEFDB_TEST_NO_MMAP_CHECKS
+            for (auto page_ind = page_ind_low ; page_ind <= page_ind_high ; page_ind++) {
                 ensure_page_direct(info, page_ind);
+            }
 #else
-                ensure_page(info, page_ind);
+            ensure_page_range(info, page_ind_low, page_ind_high);
 #endif
-            }
         }
 
 
@@ -428,6 +497,9 @@ namespace zefDB {
                 }
 
                 void* ensure_head(size_t new_head, bool allow_shrink=false);
+                // Call f while no reader is inside the mapping. The shared
+                // lock is given up in the meantime, so only for writers.
+                void run_exclusively(const std::function<void()> & f);
             };
 
             Pointer get() {
@@ -464,8 +536,30 @@ namespace zefDB {
                 T& ensure_head(size_t new_head, bool allow_shrink=false) {
                     return *(T*)p.ensure_head(new_head, allow_shrink);
                 }
+
+                // Structures take this as either
+                //   std::function<T&(size_t new_head)>
+                // or, when they have to change something that readers may be
+                // looking at,
+                //   std::function<T&(size_t new_head, const std::function<void(T&)> & exclusively)>
+                // where exclusively (if given) is called after ensuring the
+                // head, while no reader is inside the mapping.
+                struct EnsureFunc {
+                    Pointer * ptr;
+                    bool allow_shrink;
+
+                    T& operator()(size_t new_head) const {
+                        return ptr->ensure_head(new_head, allow_shrink);
+                    }
+                    T& operator()(size_t new_head, const std::function<void(T&)> & exclusively) const {
+                        T& t = ptr->ensure_head(new_head, allow_shrink);
+                        if(exclusively)
+                            ptr->p.run_exclusively([&t, &exclusively]() { exclusively(t); });
+                        return t;
+                    }
+                };
                 constexpr auto ensure_func(bool allow_shrink=false) {
-                    return std::bind(&WholeFileMapping::Pointer::ensure_head, this, std::placeholders::_1, allow_shrink);
+                    return EnsureFunc{this, allow_shrink};
                 };
 
                 Pointer(_WholeFileMapping::Pointer && p)
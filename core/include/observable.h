@@ -22,6 +22,8 @@
 #include <unordered_map>
 #include <functional>
 #include <memory>
+#include <mutex>
+#include <variant>
 #include "fwd_declarations.h"
 #include "zefDB_utils.h"
 
@@ -43,14 +45,51 @@ namespace zefDB {
 	// the following struct is attached as a unique ptr to a GraphData struct once required
 	struct LIBZEF_DLL_EXPORTED ZefObservables {
 		struct DictElement {
-			// keep in addition to the graph: mutable ref_counts and callback fcts are stored here
+			// mutable ref_counts and callback fcts are stored here, the dispatch tables below only hold the uids
 			std::function<void(ZefRef)> callback;
 			int ref_count = 0;    // how many 'subscription' objects are currently alive.
             bool keep_alive = false;
 		};
-		ZefObservables();   // ctor implemented in cpp file
 
-		std::unique_ptr<Graph> g_observables;
+        // A structural subscription: relations of type rt coming out of
+        // (is_out_rel) or going into the subject being instantiated or
+        // terminated.
+        struct RelKey {
+            blob_index subject;
+            token_value_t rt;
+            bool is_out_rel;
+            bool is_instantiation;
+            bool operator== (const RelKey & other) const {
+                return subject == other.subject && rt == other.rt && is_out_rel == other.is_out_rel && is_instantiation == other.is_instantiation;
+            }
+        };
+        struct RelKeyHash {
+            std::size_t operator() (const RelKey & k) const {
+                std::size_t s = std::hash<blob_index>{}(k.subject);
+                hash_combine(s, k.rt);
+                hash_combine(s, int(k.is_out_rel) + 2*int(k.is_instantiation));
+                return s;
+            }
+        };
+        // Where a subscription was filed, so that it can be taken out again.
+        using DispatchKey = std::variant<std::monostate, BaseUID, RelKey>;
+
+		ZefObservables() = default;
+
+        // Dispatch tables looked up by run_subscriptions. They only hold
+        // subscription uids, in the order the subscriptions were made, and
+        // are guarded by dispatch_mutex.
+        std::mutex dispatch_mutex;
+        std::unordered_map<BaseUID, std::vector<BaseUID>> value_assignment_subs;   // keyed by the uid of the AE
+        std::unordered_map<RelKey, std::vector<BaseUID>, RelKeyHash> relation_subs;
+        std::vector<BaseUID> graph_subs;   // monostate key
+        int n_instantiation_subs = 0;
+        int n_termination_subs = 0;
+        std::unordered_map<BaseUID, DispatchKey> dispatch_keys;
+
+        void add_to_dispatch(BaseUID subscription_uid, DispatchKey key);
+        void remove_from_dispatch(BaseUID subscription_uid);
+
 		thread_safe_unordered_map<BaseUID, DictElement> callbacks_and_refcount;
 	};
 
@@ -199,6 +199,17 @@ namespace zefDB {
         // This one only works on value nodes
         LIBZEF_DLL_EXPORTED value_ret_t value(EZefRef avn);
 
+        // Reads the fields rts of all instances in one go: element [i][j] is
+        // the value of the target of the rts[i] relation out of instances[j]
+        // at the reference frame of instances, or empty if there is no such
+        // relation. Throws if there is more than one.
+        LIBZEF_DLL_EXPORTED std::vector<std::vector<value_ret_t>> field_values(const ZefRefs & instances, const std::vector<RelationType> & rts);
+
+        // The instances of et at the reference frame of tx, with an rt
+        // relation pointing to something with value val. This is answered
+        // from the FieldValueIndex instead of visiting every instance.
+        LIBZEF_DLL_EXPORTED ZefRefs instances_with_field_value(EZefRef tx, EntityType et, RelationType rt, const value_variant_t & val);
+
         /* LIBZEF_DLL_EXPORTED std::vector<value_ret_t> value(ZefRefs zrs);
          * LIBZEF_DLL_EXPORTED std::vector<value_ret_t> value(EZefRefs uzrs, EZefRef tx);
          * LIBZEF_DLL_EXPORTED std::vector<value_ret_t> value(ZefRefs zrs, EZefRef tx);
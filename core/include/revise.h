@@ -19,6 +19,22 @@
 #include "graph.h"
 #include "high_level_api.h"
 
+#include <optional>
+#include <vector>
+
 namespace zefDB {
-    Graph copy_graph_slice(EZefRef ctx);
+    // Restricts which RAEs of the graph slice are copied. Each list only
+    // restricts its own kind of RAE: an empty list copies all types of that
+    // kind. Relations are only copied when both their source and target are
+    // copied too.
+    struct CopyGraphSliceFilter {
+        std::vector<EntityType> entity_types;
+        std::vector<AttributeEntityType> atomic_entity_types;
+        std::vector<RelationType> relation_types;
+        // Only RAEs instantiated in [instantiated_from, instantiated_until)
+        std::optional<Time> instantiated_from;
+        std::optional<Time> instantiated_until;
+    };
+
+    LIBZEF_DLL_EXPORTED Graph copy_graph_slice(EZefRef ctx, const CopyGraphSliceFilter & filter = {});
 }
\ No newline at end of file
@@ -74,5 +74,12 @@ namespace zefDB {
         LIBZEF_DLL_EXPORTED void undo_double_linking(GraphData& gd, blob_index start_index, blob_index end_index);
         LIBZEF_DLL_EXPORTED void apply_actions_to_blob_range_only_key_dict(GraphData& gd, blob_index blob_index_lo, blob_index blob_index_hi);
 
+        // Fill all caches for the blobs in [blob_index_lo, blob_index_hi),
+        // the same as apply_action_blob with fill_caches does but scanning
+        // the blobs on several threads. progress is called with the number of
+        // blob indices done and the total. only_caches restricts the fill to
+        // the named caches (e.g. "_av_hash_lookup"), empty means all of them.
+        LIBZEF_DLL_EXPORTED void fill_caches_for_blob_range(GraphData& gd, blob_index blob_index_lo, blob_index blob_index_hi, const std::function<void(blob_index,blob_index)> & progress = nullptr, const std::vector<std::string> & only_caches = {});
+
 	}
 }
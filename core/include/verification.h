@@ -28,6 +28,8 @@
 
 #include "low_level_api.h"
 
+#include <functional>
+
 namespace zefDB {
     namespace verification {	
 
@@ -44,6 +46,18 @@ namespace zefDB {
         LIBZEF_DLL_EXPORTED bool verify_chronological_instantiation_order(Graph g);
         LIBZEF_DLL_EXPORTED void break_graph(Graph&g, blob_index index, int style);
 
+        // Called with (number of partitions verified, total number of partitions).
+        using verification_progress_callback = std::function<void(size_t, size_t)>;
+
+        // Runs the checks of verify_graph_double_linking and
+        // verify_chronological_instantiation_order with the blob range split
+        // into partitions that are verified on num_threads threads (0: one
+        // per hardware thread). The progress callback is only ever called
+        // from the calling thread. As for the sequential checks, a linking
+        // error is thrown (the first one in blob order) and a bad
+        // chronological order makes this return false.
+        LIBZEF_DLL_EXPORTED bool verify_graph_parallel(Graph& g, int num_threads = 0, verification_progress_callback progress = {});
+
         inline bool verify_graph(Graph&g) {
             try {
             return (verify_graph_double_linking(g)
@@ -19,11 +19,44 @@
 
 #include "export_statement.h"
 #include <zstd.h>
+#include <memory>
 #include <string>
+#include <string_view>
+#include <vector>
 
 namespace zefDB {
-    LIBZEF_DLL_EXPORTED std::string decompress_zstd(std::string input);
+    // The compression and decompression contexts are created once per thread
+    // and reused for every call.
+
+    // A loaded dictionary. Compressed frames record the id of their
+    // dictionary, so a frame can only be decompressed with the dictionary it
+    // was compressed with (frames without one need none). Both sides of a
+    // connection therefore have to agree on the dictionary, which is why it is
+    // always passed explicitly rather than set for the whole process.
+    struct LIBZEF_DLL_EXPORTED ZstdDictionary {
+        ZSTD_CDict * cdict;
+        ZSTD_DDict * ddict;
+        unsigned int id;
+
+        ZstdDictionary(const std::string & dictionary, int compression_level);
+        ~ZstdDictionary();
+        ZstdDictionary(const ZstdDictionary &) = delete;
+        ZstdDictionary & operator=(const ZstdDictionary &) = delete;
+    };
+
+    // Returns nullptr for an empty dictionary.
+    LIBZEF_DLL_EXPORTED std::shared_ptr<const ZstdDictionary> load_zstd_dictionary(const std::string & dictionary, int compression_level = 10);
+
+    LIBZEF_DLL_EXPORTED std::string decompress_zstd(std::string_view input, const ZstdDictionary * dict = nullptr);
 
     // Arbitrarily chosen compression level (apparently range is 1-22)
-    LIBZEF_DLL_EXPORTED std::string compress_zstd(std::string input, int compression_level = 10);
-}
\ No newline at end of file
+    LIBZEF_DLL_EXPORTED std::string compress_zstd(std::string_view input, int compression_level = 10);
+
+    // Compresses the concatenation of parts into a single frame, without
+    // building the concatenated string first. When dict is given, its
+    // compression level is used instead of compression_level.
+    LIBZEF_DLL_EXPORTED std::string compress_zstd_parts(const std::vector<std::string_view> & parts, int compression_level = 10, const ZstdDictionary * dict = nullptr);
+
+    // Trains a dictionary of at most max_size bytes on sample messages.
+    LIBZEF_DLL_EXPORTED std::string train_zstd_dictionary(const std::vector<std::string> & samples, size_t max_size = 16*1024);
+}
@@ -271,6 +271,22 @@ void apply_update_with_caches(GraphData & gd, const UpdatePayload & payload_in,
         indx++;
     }
 
+    // Rebuild the caches the payload can't carry from the blobs themselves.
+    // A payload starting at the root node is a whole graph, so any cache it
+    // leaves out is only populated here. The 0.2.0 layout never sends the
+    // atomic value hashes.
+    std::vector<std::string> caches_to_fill;
+    if(heads.blobs.from == constants::ROOT_NODE_blob_index) {
+        for(auto name : {"_ETs_used", "_RTs_used", "_ENs_used", "_uid_lookup", "_euid_lookup", "_tag_lookup", "_av_hash_lookup"}) {
+            if(std::none_of(heads.caches.begin(), heads.caches.end(),
+                            [&](auto & cache) { return cache.name == name; }))
+                caches_to_fill.push_back(name);
+        }
+    } else if(working_layout == "0.2.0")
+        caches_to_fill.push_back("_av_hash_lookup");
+    if(!caches_to_fill.empty())
+        internals::fill_caches_for_blob_range(gd, heads.blobs.from, heads.blobs.to, nullptr, caches_to_fill);
+
     // This can be INCREDIBLY slow! This should be locked behind a zwitch if
     // used, as it can take forever to finish and locks the graph thread up.
     // if(!verification::verify_graph_double_linking(g))
@@ -63,7 +63,8 @@ void Butler::ws_fatal_handler(std::string reason) {
 
 
 void Butler::ws_message_handler(std::string msg) {
-    auto [j, rest]  = Communication::parse_ZH_message(msg);
+    auto dict = network.zstd_dictionary();
+    auto [j, rest]  = Communication::parse_ZH_message(msg, dict.get());
 
     if(zwitch.debug_zefhub_json_output())
         std::cerr << "Received message: " << j << std::endl;
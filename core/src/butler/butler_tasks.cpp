@@ -197,7 +197,8 @@ void Butler::send_ZH_message(json & j, const std::vector<std::string> & rest) {
         std::cerr << "]" << std::endl;
     }
 
-    auto zh_msg = Communication::prepare_ZH_message(j, rest);
+    auto dict = network.zstd_dictionary();
+    auto zh_msg = Communication::prepare_ZH_message(j, rest, dict.get());
 
     network.send(zh_msg);
 }
@@ -24,8 +24,8 @@ namespace zefDB {
 
         using json = nlohmann::json;
 
-        std::tuple<json, std::vector<std::string>> parse_ZH_message(std::string input) {
-            auto raw_message = decompress_zstd(input);
+        std::tuple<json, std::vector<std::string>> parse_ZH_message(std::string input, const ZstdDictionary * dict) {
+            auto raw_message = decompress_zstd(input, dict);
             auto prefix_length = raw_message.find('|');
             if (prefix_length == std::string::npos)
                 throw std::runtime_error("Message doesn't not contain prefix");
@@ -66,21 +66,22 @@ namespace zefDB {
             return std::make_tuple(main_j, strings);
         }
 
-        std::string prepare_ZH_message(const json & main_json, const std::vector<std::string> & vec) {
+        std::string prepare_ZH_message(const json & main_json, const std::vector<std::string> & vec, const ZstdDictionary * dict) {
             std::string main_msg = main_json.dump();
 
             std::stringstream ss;
             ss << "[" << main_msg.length();
-            for (auto it : vec)
+            for (auto & it : vec)
                 ss << "," << it.length();
             ss << "]|";
             std::string prefix = ss.str();
 
-            std::string full_msg = prefix + main_msg;
-            for (auto it : vec)
-                full_msg += it;
+            // Compress the pieces directly instead of concatenating them first
+            std::vector<std::string_view> parts{prefix, main_msg};
+            for (auto & it : vec)
+                parts.push_back(it);
 
-            return compress_zstd(full_msg);
+            return compress_zstd_parts(parts, 10, dict);
         }
 
 
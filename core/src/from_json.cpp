@@ -285,9 +285,10 @@ namespace zefDB {
                 blob_index cur_index = constants::ROOT_NODE_blob_index;
                 while (cur_index < gd->write_head) {
                     EZefRef uzr(cur_index, *gd);
-                    apply_action_blob(*gd, uzr, true);
+                    apply_action_blob(*gd, uzr, false);
                     cur_index += blob_index_size(uzr);
                 }
+                fill_caches_for_blob_range(*gd, constants::ROOT_NODE_blob_index, gd->write_head);
 
                 if(!verification::verify_graph_double_linking(g)
                    || !verification::verify_chronological_instantiation_order(g)) {
@@ -517,9 +518,10 @@ namespace zefDB {
                 blob_index cur_index = constants::ROOT_NODE_blob_index;
                 while (cur_index < gd->write_head) {
                     EZefRef uzr(cur_index, *gd);
-                    apply_action_blob(*gd, uzr, true);
+                    apply_action_blob(*gd, uzr, false);
                     cur_index += blob_index_size(uzr);
                 }
+                fill_caches_for_blob_range(*gd, constants::ROOT_NODE_blob_index, gd->write_head);
 
                 if(!verification::verify_graph_double_linking(g)
                    || !verification::verify_chronological_instantiation_order(g)) {
@@ -182,12 +182,15 @@ namespace zefDB {
             MAKE_UNIQUE2(RTs_used, tokens_RT);
             MAKE_UNIQUE2(ENs_used, tokens_EN);
 
+            // For a v5 file, this converts the uid lookups in place.
             MAKE_UNIQUE(uid_lookup);
             MAKE_UNIQUE(euid_lookup);
             MAKE_UNIQUE(tag_lookup);
             MAKE_UNIQUE(av_hash_lookup);
 #undef MAKE_UNIQUE
 #undef MAKE_UNIQUE2
+            if(fg->uid_lookups_need_conversion())
+                fg->mark_uid_lookups_converted();
         }
 
         should_sync = false;
@@ -464,8 +467,11 @@ namespace zefDB {
             blob_index_hi > write_head
             ) throw std::runtime_error("invalid blob range to hash");
 
-        if(target_layout_version == "0.3.0")
+        if(target_layout_version == "0.3.0") {
+            if(blob_index_lo == constants::ROOT_NODE_blob_index)
+                return internals::hash_graph_prefix(*this, blob_index_hi, seed);
             return internals::hash_memory_range((void*)(lo_ptr), len, seed);
+        }
         else if(target_layout_version == "0.2.0")
             return conversions::hash_0_3_0_as_if_0_2_0((void*)(lo_ptr), len, seed);
         else
@@ -483,7 +489,7 @@ namespace zefDB {
         return old_gdw->hash(constants::ROOT_NODE_blob_index, index_hi, seed, target_layout_version);
     }
 
-    GraphDataWrapper create_partial_graph(GraphData & cur_gd, blob_index index_hi) {
+    GraphDataWrapper create_partial_graph(GraphData & cur_gd, blob_index index_hi, bool rebuild_caches) {
         blob_index index_lo = constants::ROOT_NODE_blob_index;
         {
             LockGraphData cur_lock(&cur_gd);
@@ -532,7 +538,8 @@ namespace zefDB {
             gd->write_head = cur_gd.write_head.load();
             gd->latest_complete_tx = cur_gd.latest_complete_tx.load();
 
-#define GEN_CACHE(x, y) {                                               \
+            // Either copy the caches or fill them from the copied blobs below.
+#define GEN_CACHE(x, y) if(!rebuild_caches) {                           \
                 auto ptr = gd->y->get_writer();                          \
                 auto cur_ptr = cur_gd.y->get();                         \
                 auto diff = cur_ptr->create_diff(0, cur_ptr->size());   \
@@ -548,6 +555,8 @@ namespace zefDB {
             GEN_CACHE("_av_hash_lookup", av_hash_lookup)
 #undef GEN_CACHE
         }
+        if(rebuild_caches)
+            internals::fill_caches_for_blob_range(*gd, index_lo, gd->write_head);
 
         // roll_back_using_only_existing(gd);
         roll_back_to(*gd, index_hi, true);
@@ -692,6 +701,10 @@ namespace zefDB {
                 earliest_tx = ezr;
             }
         }
+        internals::roll_back_live_instance_index(gd, index_hi);
+        internals::roll_back_field_value_index(gd, index_hi);
+        // Unapplying rewrote edge lists all over the graph.
+        internals::invalidate_hash_checkpoints(gd, constants::ROOT_NODE_blob_index);
 
         if(earliest_tx.blob_ptr != nullptr) {
             gd.latest_complete_tx = index(earliest_tx << BT.NEXT_TX_EDGE);
@@ -963,6 +976,7 @@ namespace zefDB {
             MMap::ensure_or_alloc_range(blobs_start, length + blobs_ns::max_basic_blob_size);
 
             memcpy(blobs_start, blob_bytes.data(), length);
+            invalidate_hash_checkpoints(gd, start_index);
 		}
 
         void include_new_blobs(GraphData& gd, blob_index start_index, blob_index end_index, const std::string& blob_bytes, bool double_link, bool fill_caches) {
@@ -981,9 +995,13 @@ namespace zefDB {
 			blob_index cur_index = start_index;
 			while (cur_index < end_index) {
                 EZefRef uzr(cur_index, gd);
-				apply_action_blob(gd, uzr, fill_caches);
+				apply_action_blob(gd, uzr, false);
 				cur_index += blob_index_size(uzr);
 			}
+            // The caches are filled in bulk afterwards, which is much faster
+            // than inserting one blob at a time for big ranges.
+            if(fill_caches)
+                fill_caches_for_blob_range(gd, start_index, end_index);
 
             if(double_link) {
                 apply_double_linking(gd, start_index, end_index);
@@ -1016,6 +1034,7 @@ namespace zefDB {
 			if (new_val.size() > constants::data_layout_version_info_size)
 				throw std::runtime_error("The max string size that can be assigned to the 'data_layout_version_info' (saved in the graph's root node) is " + to_str(constants::data_layout_version_info_size));
 			auto& root_blob = get<blobs_ns::ROOT_NODE>(EZefRef{constants::ROOT_NODE_blob_index, gd});
+			internals::invalidate_hash_checkpoints(gd, constants::ROOT_NODE_blob_index);
 			root_blob.actual_written_data_layout_version_info_size = new_val.size();
 			memcpy(
 				root_blob.data_layout_version_info,
@@ -1033,6 +1052,7 @@ namespace zefDB {
 			if (new_val.size() > constants::graph_revision_info_size)
 				throw std::runtime_error("The max string size that can be assigned to the 'graph_revision_info' (saved in the graph's root node) is " + to_str(constants::graph_revision_info_size));
 			auto& root_blob = get<blobs_ns::ROOT_NODE>(EZefRef{constants::ROOT_NODE_blob_index, gd});
+			internals::invalidate_hash_checkpoints(gd, constants::ROOT_NODE_blob_index);
 			root_blob.actual_written_graph_revision_info_size = new_val.size();
 			memcpy(
 				root_blob.graph_revision_info,
@@ -1051,6 +1071,55 @@ namespace zefDB {
             return XXHash64::hash(lo_ptr, len, seed);
         }
 
+        uint64_t hash_graph_prefix(const GraphData & gd, blob_index index_hi, uint64_t seed) {
+            // Note: the result has to be identical to hashing the whole range
+            // in one go, as this is what upstream compares against.
+            HashCheckpoints & cp = *gd.hash_checkpoints;
+            auto ptr = [&gd](blob_index ind) { return (const char*)&gd + ind * constants::blob_indx_step_in_bytes; };
+
+            std::lock_guard lock(cp.m);
+            // Grab the modification marker before reading any bytes. Writes
+            // racing with us will leave it lowered for the next call.
+            blob_index lowest_modified = cp.lowest_modified.exchange(std::numeric_limits<blob_index>::max());
+            if(cp.seed != seed) {
+                cp.states.clear();
+                cp.seed = seed;
+            }
+            while(!cp.states.empty() && cp.states.back().first > lowest_modified)
+                cp.states.pop_back();
+
+            // Don't bother keeping checkpoints for blobs of an open transaction.
+            blob_index stable_head = std::min(index_hi, gd.read_head.load());
+
+            auto it = std::upper_bound(cp.states.begin(), cp.states.end(), index_hi,
+                                       [](blob_index ind, const auto & p) { return ind < p.first; });
+            blob_index cur = constants::ROOT_NODE_blob_index;
+            XXHash64 hasher(seed);
+            if(it != cp.states.begin()) {
+                cur = std::prev(it)->first;
+                hasher = std::prev(it)->second;
+            }
+
+            // Only if we are extending the last checkpoint will we add new ones.
+            bool record = (it == cp.states.end());
+            while(cur < index_hi) {
+                blob_index next = cur + constants::hash_checkpoint_interval - (cur - constants::ROOT_NODE_blob_index) % constants::hash_checkpoint_interval;
+                if(next > index_hi)
+                    next = index_hi;
+                hasher.add(ptr(cur), (next - cur) * constants::blob_indx_step_in_bytes);
+                cur = next;
+                if(record && cur <= stable_head && (cur - constants::ROOT_NODE_blob_index) % constants::hash_checkpoint_interval == 0)
+                    cp.states.emplace_back(cur, hasher);
+            }
+            return hasher.hash();
+        }
+
+        void invalidate_hash_checkpoints(GraphData & gd, blob_index index_modified) {
+            auto & lowest = gd.hash_checkpoints->lowest_modified;
+            blob_index cur = lowest.load();
+            while(index_modified < cur && !lowest.compare_exchange_weak(cur, index_modified)) {}
+        }
+
 
         Messages::UpdatePayload payload_from_local_file(std::filesystem::path path) {
             FileGroup file_group = load_tar_into_memory(path);
@@ -947,4 +947,78 @@ namespace zefDB {
     template void assign_value(EZefRef z_ae, const QuantityInt & value);
 
 
-}
\ No newline at end of file
+
+
+    std::vector<ZefRef> apply_bulk_commands(GraphData& gd, const std::vector<BulkCommand> & commands) {
+        if (!gd.is_primary_instance)
+            throw std::runtime_error("'apply_bulk_commands' called for a graph which is not a primary instance. This is not allowed.");
+
+        // One transaction for the whole batch, so that the individual
+        // instantiate/assign calls below only join it.
+        auto this_tx = Transaction(gd);
+        EZefRef tx_node{ gd.index_of_open_tx_node, gd };
+
+        std::vector<ZefRef> results;
+        results.reserve(commands.size());
+
+        auto resolve = [&results](const std::optional<BulkCommand::ref_t> & ref) -> EZefRef {
+            if (!ref)
+                throw std::runtime_error("apply_bulk_commands: command is missing a source/target.");
+            return std::visit([&results](auto & x) -> EZefRef {
+                using T = std::decay_t<decltype(x)>;
+                if constexpr(std::is_same_v<T, int>) {
+                    if (x < 0 || (size_t)x >= results.size())
+                        throw std::runtime_error("apply_bulk_commands: reference to command " + to_str(x) + " which has not been applied yet.");
+                    return results[x].blob_uzr;
+                } else
+                    return x;
+            }, *ref);
+        };
+
+        for (auto & cmd : commands) {
+            switch (cmd.kind) {
+            case BulkCommand::Kind::instantiate_entity: {
+                results.push_back(instantiate(std::get<EntityType>(cmd.rae_type), gd));
+                break;
+            }
+            case BulkCommand::Kind::instantiate_atomic_entity: {
+                results.push_back(instantiate(std::get<AttributeEntityType>(cmd.rae_type), gd));
+                break;
+            }
+            case BulkCommand::Kind::instantiate_relation: {
+                EZefRef src = resolve(cmd.source);
+                EZefRef trg = resolve(cmd.target);
+                results.push_back(instantiate(src, std::get<RelationType>(cmd.rae_type), trg, gd));
+                break;
+            }
+            case BulkCommand::Kind::assign_value: {
+                if (!cmd.value)
+                    throw std::runtime_error("apply_bulk_commands: assignment without a value.");
+                ZefRef z_ae{resolve(cmd.source), tx_node};
+                // Skip the assignment if the AE already holds this value. As
+                // in the python path, numbers compare by value, so 2 and 2.0
+                // are the same.
+                auto cur_value = value_from_ae<value_variant_t>(z_ae);
+                bool same = cur_value && std::visit([](auto & left, auto & right) -> bool {
+                    using Tl = typename std::decay_t<decltype(left)>;
+                    using Tr = typename std::decay_t<decltype(right)>;
+                    if constexpr(std::is_same_v<Tl, Tr>)
+                        return left == right;
+                    else if constexpr(std::is_arithmetic_v<Tl> && std::is_arithmetic_v<Tr>)
+                        return left == right;
+                    else
+                        return false;
+                }, *cur_value, *cmd.value);
+                if (!same)
+                    assign_value(z_ae.blob_uzr, *cmd.value);
+                results.push_back(z_ae);
+                break;
+            }
+            default:
+                throw std::runtime_error("apply_bulk_commands: unknown command kind.");
+            }
+        }
+
+        return results;
+    }
+}
@@ -450,6 +450,10 @@ namespace zefDB {
                 // throw std::runtime_error("Trying to append an edge index that's beyond the write_head!");
             }
 
+            // Everything written below is part of uzr or of a deferred edge
+            // list created after it.
+            invalidate_hash_checkpoints(*gd, index(uzr));
+
             // Go directly to the end of the list
 
             // This will be an indirect reference into the middle of the blob at
@@ -570,6 +574,7 @@ namespace zefDB {
             } else {
                 // Otherwise, we fill in the new edge
                 assert(*itr == 0);
+                invalidate_hash_checkpoints(*gd, index(uzr));
                 *itr = edge_index_to_append;
 
                 // Update the original blob with the details. I think
@@ -958,5 +963,180 @@ namespace zefDB {
         template AttributeEntityType value_from_node<AttributeEntityType>(const blobs_ns::VALUE_NODE& aae);
         template value_variant_t value_from_node<value_variant_t>(const blobs_ns::VALUE_NODE& av);
 
+
+        // Bring the index up to date with all blobs before head. Needs the
+        // index lock to be held.
+        void scan_live_instance_index(GraphData & gd, LiveInstanceIndex & idx, blob_index head) {
+            blob_index cur_index = std::max(idx.scanned_up_to, root_node_blob_index());
+            if(cur_index >= head)
+                return;
+            Butler::ensure_or_get_range(ptr_from_blob_index(cur_index, gd), (head - cur_index)*constants::blob_indx_step_in_bytes);
+
+            while(cur_index < head) {
+                EZefRef ezr{cur_index, gd};
+                if(BT(ezr) == BT.RAE_INSTANCE_EDGE) {
+                    idx.per_delegate[source_node_index(ezr)].live.insert(target_node_index(ezr));
+                } else if(BT(ezr) == BT.TERMINATION_EDGE) {
+                    EZefRef instance_edge{target_node_index(ezr), gd};
+                    TimeSlice ts = get<blobs_ns::TX_EVENT_NODE>(EZefRef{source_node_index(ezr), gd}).time_slice;
+                    auto & per = idx.per_delegate[source_node_index(instance_edge)];
+                    per.live.erase(target_node_index(instance_edge));
+                    per.terminated.emplace_back(ts, target_node_index(instance_edge));
+                }
+                cur_index += blob_index_size(ezr);
+            }
+            idx.scanned_up_to = head;
+        }
+
+        std::vector<blob_index> instance_candidates(EZefRef to_delegate_edge, TimeSlice ts) {
+            GraphData & gd = *graph_data(to_delegate_edge);
+            LiveInstanceIndex & idx = *gd.live_instance_index;
+            // Blobs past the read_head are only complete for the thread
+            // writing them (same rule as AllEdgeIndexes).
+            blob_index head = (gd.is_primary_instance && gd.open_tx_thread == std::this_thread::get_id()) ? gd.write_head.load() : gd.read_head.load();
+
+            std::vector<blob_index> res;
+            {
+                std::lock_guard lock(idx.m);
+                scan_live_instance_index(gd, idx, head);
+                auto it = idx.per_delegate.find(index(to_delegate_edge));
+                if(it == idx.per_delegate.end())
+                    return res;
+                auto & per = it->second;
+                res.reserve(per.live.size());
+                res.insert(res.end(), per.live.begin(), per.live.end());
+                auto first_after = std::upper_bound(per.terminated.begin(), per.terminated.end(), ts,
+                                                    [](TimeSlice ts, const auto & p) { return ts < p.first; });
+                if(first_after == per.terminated.end())
+                    return res;
+                for(auto t = first_after ; t != per.terminated.end() ; t++)
+                    res.push_back(t->second);
+            }
+            std::sort(res.begin(), res.end());
+            return res;
+        }
+
+        void roll_back_live_instance_index(GraphData & gd, blob_index index_hi) {
+            LiveInstanceIndex & idx = *gd.live_instance_index;
+            std::lock_guard lock(idx.m);
+            if(idx.scanned_up_to <= index_hi)
+                return;
+            // Undoing individual blobs is not worth it, rollbacks are rare.
+            idx.per_delegate.clear();
+            idx.scanned_up_to = 0;
+        }
+
+
+        value_variant_t assigned_value(EZefRef assignment) {
+            if(BT(assignment) == BT.ATTRIBUTE_VALUE_ASSIGNMENT_EDGE) {
+                auto & avae = get<blobs_ns::ATTRIBUTE_VALUE_ASSIGNMENT_EDGE>(assignment);
+                EZefRef value_edge{avae.value_edge_index, *graph_data(assignment)};
+                EZefRef value_node{target_node_index(value_edge), *graph_data(assignment)};
+                return value_from_node<value_variant_t>(get<blobs_ns::VALUE_NODE>(value_node));
+            }
+            return value_from_node<value_variant_t>(get<blobs_ns::ATOMIC_VALUE_ASSIGNMENT_EDGE>(assignment));
+        }
+
+        bool is_field_relation(EZefRef rel, EntityType et, RelationType rt) {
+            if(BT(rel) != BT.RELATION_EDGE || RT(rel) != rt)
+                return false;
+            if(!is_zef_subtype(EZefRef{source_node_index(rel), *graph_data(rel)}, et))
+                return false;
+            return !is_delegate(rel);
+        }
+
+        // Bring the index of one field up to date with all blobs before head.
+        // Needs the index lock to be held.
+        //
+        // Every (relation, assignment) pair is added when the later of the
+        // two is scanned, so each is seen exactly once.
+        void scan_field_value_index(GraphData & gd, EntityType et, RelationType rt, FieldValueIndex::PerField & per, blob_index head) {
+            blob_index cur_index = std::max(per.scanned_up_to, root_node_blob_index());
+            if(cur_index >= head)
+                return;
+            Butler::ensure_or_get_range(ptr_from_blob_index(cur_index, gd), (head - cur_index)*constants::blob_indx_step_in_bytes);
+
+            auto add = [&per](const value_variant_t & val, blob_index rel) {
+                per.relations[value_hash(val)].push_back(rel);
+            };
+
+            while(cur_index < head) {
+                EZefRef ezr{cur_index, gd};
+                if(BT(ezr) == BT.RELATION_EDGE) {
+                    if(is_field_relation(ezr, et, rt)) {
+                        EZefRef trg{target_node_index(ezr), gd};
+                        if(BT(trg) == BT.VALUE_NODE)
+                            add(value_from_node<value_variant_t>(get<blobs_ns::VALUE_NODE>(trg)), cur_index);
+                        else if(BT(trg) == BT.ATTRIBUTE_ENTITY_NODE) {
+                            EZefRef instance_edge = imperative::traverse_in_edge(trg, BT.RAE_INSTANCE_EDGE);
+                            for(blob_index ind : AllEdgeIndexes(instance_edge)) {
+                                if(ind >= 0 || -ind > cur_index)
+                                    continue;
+                                EZefRef assignment{-ind, gd};
+                                if(BT(assignment) == BT.ATOMIC_VALUE_ASSIGNMENT_EDGE
+                                   || BT(assignment) == BT.ATTRIBUTE_VALUE_ASSIGNMENT_EDGE)
+                                    add(assigned_value(assignment), cur_index);
+                            }
+                        }
+                    }
+                } else if(BT(ezr) == BT.ATOMIC_VALUE_ASSIGNMENT_EDGE
+                          || BT(ezr) == BT.ATTRIBUTE_VALUE_ASSIGNMENT_EDGE) {
+                    EZefRef instance_edge{target_node_index(ezr), gd};
+                    EZefRef ae{target_node_index(instance_edge), gd};
+                    std::optional<value_variant_t> val;
+                    for(blob_index ind : AllEdgeIndexes(ae)) {
+                        if(ind >= 0 || -ind > cur_index)
+                            continue;
+                        EZefRef rel{-ind, gd};
+                        if(!is_field_relation(rel, et, rt))
+                            continue;
+                        if(!val)
+                            val = assigned_value(ezr);
+                        add(*val, -ind);
+                    }
+                }
+                cur_index += blob_index_size(ezr);
+            }
+            per.scanned_up_to = head;
+        }
+
+        std::vector<blob_index> field_value_candidates(GraphData & gd, EntityType et, RelationType rt, const value_variant_t & val) {
+            FieldValueIndex & idx = *gd.field_value_index;
+            // Same rule as instance_candidates
+            blob_index head = (gd.is_primary_instance && gd.open_tx_thread == std::this_thread::get_id()) ? gd.write_head.load() : gd.read_head.load();
+
+            std::vector<blob_index> res;
+            {
+                std::lock_guard lock(idx.m);
+                auto & per = idx.per_field[{et.entity_type_indx, rt.relation_type_indx}];
+                scan_field_value_index(gd, et, rt, per, head);
+                auto it = per.relations.find(value_hash(val));
+                if(it == per.relations.end())
+                    return res;
+                res = it->second;
+            }
+            std::sort(res.begin(), res.end());
+            res.erase(std::unique(res.begin(), res.end()), res.end());
+            return res;
+        }
+
+        bool has_field_value_index(GraphData & gd, EntityType et, RelationType rt) {
+            FieldValueIndex & idx = *gd.field_value_index;
+            std::lock_guard lock(idx.m);
+            return idx.per_field.count({et.entity_type_indx, rt.relation_type_indx}) > 0;
+        }
+
+        void roll_back_field_value_index(GraphData & gd, blob_index index_hi) {
+            FieldValueIndex & idx = *gd.field_value_index;
+            std::lock_guard lock(idx.m);
+            // As for the LiveInstanceIndex, fields that saw the rolled back
+            // blobs are rebuilt from scratch on their next lookup.
+            for(auto it = idx.per_field.begin() ; it != idx.per_field.end() ; ) {
+                if(it->second.scanned_up_to > index_hi)
+                    it = idx.per_field.erase(it);
+                else
+                    it++;
+            }
+        }
     }
 }
@@ -24,6 +24,8 @@ namespace zefDB {
         // Keeps track of all mmap info structures
         struct MMapAllocInfoList {
             std::vector<MMapAllocInfo*> list;
+            // Guards list, which evict_cold_pages walks from any thread.
+            std::mutex m;
 
             ~MMapAllocInfoList() {
                 for(auto & it : list) {
@@ -33,6 +35,57 @@ namespace zefDB {
         };
         MMapAllocInfoList alloc_list;
 
+        // * Page budget
+
+        size_t page_budget_from_env() {
+            const char * env = std::getenv("ZEFDB_FILEGRAPH_MEMORY_BUDGET_MB");
+            if(env == nullptr)
+                return 0;
+#ifdef ZEF_WIN32
+            std::cerr << "ZEFDB_FILEGRAPH_MEMORY_BUDGET_MB is not supported on windows, ignoring it." << std::endl;
+            return 0;
+#else
+            return std::stoull(std::string(env)) * 1024 * 1024;
+#endif
+        }
+        std::atomic<size_t> page_budget = page_budget_from_env();
+
+        // Bumped on every page miss, which is the only time pages are marked
+        // as used. Ticks start at 1 as 0 marks non-resident pages in
+        // MMapAllocInfo::page_last_used.
+        std::atomic<uint32_t> page_clock = 1;
+
+        uint32_t next_page_tick() {
+            uint32_t tick = ++page_clock;
+            if(tick == 0)
+                tick = ++page_clock;
+            return tick;
+        }
+
+        void set_page_budget(size_t bytes) {
+#ifdef ZEF_WIN32
+            if(bytes > 0)
+                throw std::runtime_error("A memory budget for file graphs is not supported on windows.");
+#endif
+            page_budget = bytes;
+            if(bytes > 0)
+                evict_cold_pages(bytes);
+        }
+
+        size_t get_page_budget() {
+            return page_budget;
+        }
+
+        size_t loaded_filegraph_pages() {
+            std::lock_guard list_lock(alloc_list.m);
+            size_t total = 0;
+            for(auto info : alloc_list.list) {
+                if(!info->released && info->style == MMAP_STYLE_FILE_BACKED)
+                    total += info->loaded_pages.count();
+            }
+            return total;
+        }
+
         //////////////////////////////
         // * FileGraph
 
@@ -158,6 +211,8 @@ namespace zefDB {
                     new(main_file_mapping) Prefix_v3{uid};
                 else if (version == Prefix_v5::VERSION)
                     new(main_file_mapping) Prefix_v5{uid};
+                else if (version == Prefix_v6::VERSION)
+                    new(main_file_mapping) Prefix_v6{uid};
                 else
                     throw std::runtime_error("Can't handle this version");
 
@@ -181,6 +236,8 @@ namespace zefDB {
                 temp = sizeof(Prefix_v3);
             else if (version == Prefix_v5::VERSION)
                 temp = sizeof(Prefix_v5);
+            else if (version == Prefix_v6::VERSION)
+                temp = sizeof(Prefix_v6);
             else
                 throw FileGraphWrongVersion(path_prefix, version, "Don't know prefix_size.");
             size_t num_pages = temp / ZEF_PAGE_SIZE + 1;
@@ -198,16 +255,32 @@ namespace zefDB {
             if(get_version() == Prefix_v3::VERSION) {
                 // This should not cause a resize of the prefix space.
                 // Just initialise the extra field (av_hash_lookup)
-                std::cerr << "Updating FileGraph prefix version " << Prefix_v3::VERSION << " to " << latest_Prefix_t::VERSION;
-                auto recast = (latest_Prefix_t*)main_file_mapping;
-                recast->version = latest_Prefix_t::VERSION;
+                std::cerr << "Updating FileGraph prefix version " << Prefix_v3::VERSION << " to " << Prefix_v5::VERSION;
+                auto recast = (Prefix_v5*)main_file_mapping;
+                recast->version = Prefix_v5::VERSION;
                 new(&recast->av_hash_lookup) WholeFile_v1;
-                return recast;
             }
+            // v5 has the same fields as the latest version. The version stays
+            // at 5 until the uid lookups have been converted, which happens
+            // when the graph is loaded.
+            if(get_version() == Prefix_v5::VERSION)
+                return (latest_Prefix_t*)main_file_mapping;
             // This will be used for incompatibility with bit representation.
             throw FileGraphWrongVersion(path_prefix, get_version());
         }
 
+        bool FileGraph::uid_lookups_need_conversion() const {
+            return get_version() < Prefix_v6::VERSION;
+        }
+
+        void FileGraph::mark_uid_lookups_converted() {
+            auto prefix = get_prefix();
+            if(prefix->version == Prefix_v5::VERSION) {
+                developer_output("Updating FileGraph prefix version " + to_str(Prefix_v5::VERSION) + " to " + to_str(Prefix_v6::VERSION));
+                prefix->version = Prefix_v6::VERSION;
+            }
+        }
+
         // This pattern will repeat a lot. Perhaps need a macro to handle it?
         blob_index FileGraph::get_latest_blob_index() const {
             if(get_version() >= Prefix_v3::VERSION)
@@ -486,5 +559,22 @@ namespace zefDB {
             lock.lock();
             return parent->ptr;
         }
+
+        void _WholeFileMapping::Pointer::run_exclusively(const std::function<void()> & f) {
+            if(!writer_lock)
+                throw std::runtime_error("Can't run_exclusively without writer_lock");
+
+            // Only writers move the mapping and we hold the writer lock, so
+            // parent->ptr stays valid across this.
+            lock.unlock();
+            try {
+                std::unique_lock ulock(parent->m);
+                f();
+            } catch(...) {
+                lock.lock();
+                throw;
+            }
+            lock.lock();
+        }
     }
 }
\ No newline at end of file
@@ -111,41 +111,187 @@ namespace zefDB {
 
         // ** Page based manipulation
 
-#ifdef ZEFDB_TEST_NO_MMAP_CHECKS
-        void ensure_page(MMapAllocInfo & info, size_t page_ind) {
-        }
-        void ensure_page_direct(MMapAllocInfo & info, size_t page_ind) {
-#else
-        void ensure_page(MMapAllocInfo & info, size_t page_ind) {
-#endif
-            if (is_page_alloced(info, page_ind))
-                return;
-            // std::cerr << "Allocing new page" << std::endl;
-
-            if(info.style == MMAP_STYLE_MALLOC)
-                error("Can't extend malloc pages");
+        // Pages to read ahead when the misses on a file backed graph look
+        // like a sequential scan.
+        constexpr size_t readahead_pages = 8;
 
+        // Map in the pages [page_ind_low, page_ind_high] which are all not
+        // yet loaded. Needs info.page_mutex to be held.
+        void map_page_run(MMapAllocInfo & info, size_t page_ind_low, size_t page_ind_high, uint32_t tick) {
             void * blobs_ptr = blobs_ptr_from_info(&info);
-
-            void * blob_start = (char*)blobs_ptr + page_ind*ZEF_PAGE_SIZE;
+            void * blob_start = (char*)blobs_ptr + page_ind_low*ZEF_PAGE_SIZE;
+            size_t len = (page_ind_high - page_ind_low + 1)*ZEF_PAGE_SIZE;
 
             if (info.style == MMAP_STYLE_ANONYMOUS) {
                 // TODO: Disable write on read-only graph
-                if(0 != mprotect(blob_start, ZEF_PAGE_SIZE, PROT_READ | PROT_WRITE))
+                if(0 != mprotect(blob_start, len, PROT_READ | PROT_WRITE))
                     error_p("Could not mprotect new blobs page");
-                memset(blob_start, 0, ZEF_PAGE_SIZE);
+                memset(blob_start, 0, len);
             }
             else if (info.style == MMAP_STYLE_FILE_BACKED) {
                 FileGraph & fg = *info.file_graph;
-                auto [offset, file_index] = fg.get_page_offset(page_ind);
+                auto [offset, file_index] = fg.get_page_offset(page_ind_low);
                 int fd = fg.get_fd(file_index);
-                // std::cerr << "*** Mapping file offset: " << offset << " to blob offset: " << (intptr_t)blob_start - (intptr_t)blobs_ptr << std::endl;
-                if(MAP_FAILED == mmap(blob_start, ZEF_PAGE_SIZE, PROT_READ | PROT_WRITE, MAP_FIXED|MAP_SHARED, fd, offset))
+                if(MAP_FAILED == mmap(blob_start, len, PROT_READ | PROT_WRITE, MAP_FIXED|MAP_SHARED, fd, offset))
                     error_p("Could not mmap new blobs page from file");
             }
 
-            info.occupied_pages[page_ind] = 1;
-            info.loaded_pages[page_ind] = 1;
+            for(size_t page_ind = page_ind_low ; page_ind <= page_ind_high ; page_ind++) {
+                info.occupied_pages[page_ind] = 1;
+                info.loaded_pages[page_ind] = 1;
+                info.page_last_used[page_ind].store(tick, std::memory_order_relaxed);
+            }
+        }
+
+        // Whether page_ind can join a run of file pages ending at prev_ind,
+        // i.e. it directly follows it in the same file.
+        bool continues_file_run(FileGraph & fg, size_t prev_ind, size_t page_ind) {
+            auto [prev_offset, prev_file_index] = fg.get_page_offset(prev_ind);
+            auto [offset, file_index] = fg.get_page_offset(page_ind);
+            return file_index == prev_file_index && offset == prev_offset + ZEF_PAGE_SIZE;
+        }
+
+        // Map the missing pages of [page_ind_low, page_ind_high], one mapping
+        // per contiguous run. Returns the number of pages mapped in.
+        size_t map_missing_pages(MMapAllocInfo & info, size_t page_ind_low, size_t page_ind_high, uint32_t tick) {
+            size_t mapped = 0;
+            size_t page_ind = page_ind_low;
+            while(page_ind <= page_ind_high) {
+                if(is_page_alloced(info, page_ind)) {
+                    page_ind++;
+                    continue;
+                }
+                size_t run_end = page_ind;
+                while(run_end < page_ind_high
+                      && !is_page_alloced(info, run_end+1)
+                      && (info.style != MMAP_STYLE_FILE_BACKED || continues_file_run(*info.file_graph, run_end, run_end+1)))
+                    run_end++;
+                map_page_run(info, page_ind, run_end, tick);
+                mapped += run_end - page_ind + 1;
+                page_ind = run_end + 1;
+            }
+            return mapped;
+        }
+
+        void ensure_page_range(MMapAllocInfo & info, size_t page_ind_low, size_t page_ind_high) {
+            bool all_loaded = true;
+            for(size_t page_ind = page_ind_low ; page_ind <= page_ind_high ; page_ind++) {
+                if(!is_page_alloced(info, page_ind)) {
+                    all_loaded = false;
+                    break;
+                }
+            }
+            if(all_loaded)
+                return;
+            // std::cerr << "Allocing new page" << std::endl;
+
+            if(info.style == MMAP_STYLE_MALLOC)
+                error("Can't extend malloc pages");
+
+            size_t mapped = 0;
+            {
+                std::lock_guard lock(info.page_mutex);
+                uint32_t tick = next_page_tick();
+                mapped += map_missing_pages(info, page_ind_low, page_ind_high, tick);
+
+                if (info.style == MMAP_STYLE_FILE_BACKED && mapped > 0) {
+                    size_t last_page = page_ind_high;
+                    if (page_ind_low == info.last_missed_page + 1) {
+                        // Looks like a sequential scan, so pull in the pages
+                        // that follow and are already in the file, and have
+                        // the kernel start reading them now.
+                        size_t ahead = page_ind_high + 1;
+                        while(ahead < PAGE_BITMAP_BITS
+                              && ahead <= page_ind_high + readahead_pages
+                              && info.file_graph->is_page_in_file(ahead))
+                            ahead++;
+                        if(ahead > page_ind_high + 1) {
+                            mapped += map_missing_pages(info, page_ind_high + 1, ahead - 1, tick);
+                            last_page = ahead - 1;
+                        }
+                    }
+                    void * blobs_ptr = blobs_ptr_from_info(&info);
+                    madvise((char*)blobs_ptr + page_ind_low*ZEF_PAGE_SIZE, (last_page - page_ind_low + 1)*ZEF_PAGE_SIZE, MADV_WILLNEED);
+                    info.last_missed_page = last_page;
+                }
+            }
+
+            // Note: this has to be done without holding our page_mutex, as it
+            // goes through all graphs.
+            if (info.style == MMAP_STYLE_FILE_BACKED && mapped > 0) {
+                size_t budget = get_page_budget();
+                if(budget > 0)
+                    evict_cold_pages(budget);
+            }
+        }
+
+#ifdef ZEFDB_TEST_NO_MMAP_CHECKS
+        void ensure_page(MMapAllocInfo & info, size_t page_ind) {
+        }
+        void ensure_page_direct(MMapAllocInfo & info, size_t page_ind) {
+#else
+        void ensure_page(MMapAllocInfo & info, size_t page_ind) {
+#endif
+            ensure_page_range(info, page_ind, page_ind);
+        }
+
+        // Drop a loaded page of a file backed graph from memory. The page is
+        // marked as not loaded, so the next ensure maps it in again and counts
+        // it as resident. The mapping itself stays in place, so pointers
+        // handed out earlier read the page back in from the file. Needs
+        // info.page_mutex to be held.
+        void evict_page(MMapAllocInfo & info, size_t page_ind) {
+            void * blobs_ptr = blobs_ptr_from_info(&info);
+            void * blob_start = (char*)blobs_ptr + page_ind*ZEF_PAGE_SIZE;
+            // Dirty data is kept in the page cache and written back as usual.
+            if(-1 == madvise(blob_start, ZEF_PAGE_SIZE, MADV_DONTNEED))
+                error_p("Couldn't madvise.");
+            FileGraph & fg = *info.file_graph;
+            auto [offset, file_index] = fg.get_page_offset(page_ind);
+            // Only drops the clean parts of the page cache.
+            posix_fadvise(fg.get_fd(file_index), offset, ZEF_PAGE_SIZE, POSIX_FADV_DONTNEED);
+            info.page_last_used[page_ind].store(0, std::memory_order_relaxed);
+            info.loaded_pages[page_ind] = 0;
+        }
+
+        size_t evict_cold_pages(size_t budget) {
+            std::lock_guard list_lock(alloc_list.m);
+
+            std::vector<std::tuple<uint32_t,MMapAllocInfo*,size_t>> resident;
+            for(auto info : alloc_list.list) {
+                if(info->released || info->style != MMAP_STYLE_FILE_BACKED)
+                    continue;
+                for(size_t page_ind = 0 ; page_ind < PAGE_BITMAP_BITS ; page_ind++) {
+                    uint32_t tick = info->page_last_used[page_ind].load(std::memory_order_relaxed);
+                    if(tick != 0)
+                        resident.emplace_back(tick, info, page_ind);
+                }
+            }
+
+            size_t max_pages = std::max<size_t>(1, budget / ZEF_PAGE_SIZE);
+            if(resident.size() <= max_pages)
+                return 0;
+            // Go a quarter below the budget, so that we aren't back in here
+            // on the very next miss.
+            size_t n_evict = resident.size() - (max_pages - max_pages/4);
+            std::nth_element(resident.begin(), resident.begin() + n_evict - 1, resident.end());
+
+            uint32_t current_tick = page_clock.load();
+            size_t evicted = 0;
+            for(auto it = resident.begin() ; it != resident.begin() + n_evict ; it++) {
+                auto [tick, info, page_ind] = *it;
+                // Never take away the pages of the miss that got us here.
+                if(tick == current_tick)
+                    continue;
+                std::lock_guard lock(info->page_mutex);
+                if(info->released || info->page_last_used[page_ind].load(std::memory_order_relaxed) != tick)
+                    continue;
+                evict_page(*info, page_ind);
+                evicted++;
+            }
+            if(evicted > 0)
+                maybe_print_rss();
+            return evicted;
         }
 
         void unload_page(MMapAllocInfo & info, size_t page_ind) {
@@ -224,7 +370,10 @@ namespace zefDB {
                 throw std::runtime_error("Unknown style for create_mmap to handle.");
             }
 
-            alloc_list.list.push_back(info);
+            {
+                std::lock_guard lock(alloc_list.m);
+                alloc_list.list.push_back(info);
+            }
             return blob_ptr;
         }
 
@@ -279,6 +428,8 @@ namespace zefDB {
                     // munmap can remove multiple mappings, so no need to loop through all alloced pages
                     munmap((void*)end_of_info, release_size);
                 } else if (info.style == MMAP_STYLE_FILE_BACKED) {
+                    // Keep evict_cold_pages out while the mapping goes away.
+                    std::lock_guard lock(info.page_mutex);
                     flush_mmap(info);
                     delete info.file_graph;
                     // Doing a sync flush here, instead of the async in flush_mmap.
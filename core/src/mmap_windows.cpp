@@ -57,6 +57,19 @@ namespace zefDB {
             info.loaded_pages[page_ind] = 1;
         }
 
+        void ensure_page_range(MMapAllocInfo & info, size_t page_ind_low, size_t page_ind_high) {
+            // No batching or readahead here yet, the views are mapped one page
+            // at a time.
+            for(size_t page_ind = page_ind_low ; page_ind <= page_ind_high ; page_ind++)
+                ensure_page(info, page_ind);
+        }
+
+        size_t evict_cold_pages(size_t budget) {
+            // set_page_budget refuses a budget on windows, so there is never
+            // anything to evict.
+            return 0;
+        }
+
         void unload_page(MMapAllocInfo & info, size_t page_ind) {
             if (!is_page_alloced(info, page_ind))
                 return;
@@ -19,9 +19,46 @@
 
 namespace zefDB {
 
-	ZefObservables::ZefObservables() {
-		g_observables = std::make_unique<Graph>(false, MMap::MMAP_STYLE_ANONYMOUS);
-	};
+    void ZefObservables::add_to_dispatch(BaseUID subscription_uid, DispatchKey key) {
+        std::lock_guard lock(dispatch_mutex);
+        std::visit(overloaded{
+                [&](std::monostate) { graph_subs.push_back(subscription_uid); },
+                [&](BaseUID ae_uid) { value_assignment_subs[ae_uid].push_back(subscription_uid); },
+                [&](RelKey rel_key) {
+                    relation_subs[rel_key].push_back(subscription_uid);
+                    (rel_key.is_instantiation ? n_instantiation_subs : n_termination_subs)++;
+                },
+            }, key);
+        dispatch_keys[subscription_uid] = key;
+    }
+
+    void ZefObservables::remove_from_dispatch(BaseUID subscription_uid) {
+        std::lock_guard lock(dispatch_mutex);
+        auto it = dispatch_keys.find(subscription_uid);
+        if(it == dispatch_keys.end())
+            return;
+
+        auto remove_from = [&subscription_uid](std::vector<BaseUID> & v) {
+            v.erase(std::remove(v.begin(), v.end(), subscription_uid), v.end());
+        };
+        std::visit(overloaded{
+                [&](std::monostate) { remove_from(graph_subs); },
+                [&](BaseUID ae_uid) {
+                    auto & v = value_assignment_subs[ae_uid];
+                    remove_from(v);
+                    if(v.empty())
+                        value_assignment_subs.erase(ae_uid);
+                },
+                [&](RelKey rel_key) {
+                    auto & v = relation_subs[rel_key];
+                    remove_from(v);
+                    if(v.empty())
+                        relation_subs.erase(rel_key);
+                    (rel_key.is_instantiation ? n_instantiation_subs : n_termination_subs)--;
+                },
+            }, it->second);
+        dispatch_keys.erase(it);
+    }
 
 
 	Subscription::Subscription(const Subscription& sub) :  //copy ctor
@@ -72,9 +109,8 @@ namespace zefDB {
             bool was_erased = ptr->callbacks_and_refcount.erase_if(uid, [force](auto & item) {
                 return force || (item.ref_count == 0 && !item.keep_alive);
             });
-            Graph& g = *ptr->g_observables;
-            auto uzr = g[uid];
-            imperative::terminate(uzr);
+            if(was_erased)
+                ptr->remove_from_dispatch(uid);
         }
 
         zef_observables_ptr.reset();
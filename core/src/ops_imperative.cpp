@@ -1105,6 +1105,8 @@ namespace zefDB {
             ZefRef my_rel_ent_now = to_frame(my_rel_ent, tx_node);
 
             EZefRef RAE_INSTANCE_EDGE = get_RAE_INSTANCE_EDGE(my_rel_ent);
+            // The termination time slice is written into the existing blob
+            invalidate_hash_checkpoints(gd, index(my_rel_ent));
             blobs_ns::TERMINATION_EDGE& my_termination_edge = get_next_free_writable_blob<blobs_ns::TERMINATION_EDGE>(gd);
             MMap::ensure_or_alloc_range(&my_termination_edge, blobs_ns::max_basic_blob_size);
             my_termination_edge.this_BlobType = BlobType::TERMINATION_EDGE;
@@ -1509,6 +1511,62 @@ namespace zefDB {
             }
         }
 
+        std::vector<std::vector<value_ret_t>> field_values(const ZefRefs & instances, const std::vector<RelationType> & rts) {
+            EZefRef tx = instances.reference_frame_tx;
+            std::vector<std::vector<value_ret_t>> columns(rts.size(), std::vector<value_ret_t>(length(instances)));
+            if(length(instances) == 0)
+                return columns;
+            GraphData & gd = *graph_data(tx);
+
+            std::vector<bool> found(rts.size());
+            size_t row = 0;
+            for(const EZefRef * it = instances._get_array_begin_const() ; it != instances._get_array_begin_const() + length(instances) ; it++, row++) {
+                std::fill(found.begin(), found.end(), false);
+                // A single walk over the edge list picks up all requested fields
+                for(blob_index ind : AllEdgeIndexes(*it)) {
+                    if(ind <= 0)
+                        continue;
+                    EZefRef rel(ind, gd);
+                    if(get<BlobType>(rel) != BlobType::RELATION_EDGE)
+                        continue;
+                    auto rt_it = std::find(rts.begin(), rts.end(), RT(rel));
+                    if(rt_it == rts.end() || !exists_at(rel, tx))
+                        continue;
+                    size_t col = rt_it - rts.begin();
+                    if(found[col])
+                        throw std::runtime_error("More than one " + to_str(rts[col]) + " relation out of " + to_str(*it));
+                    found[col] = true;
+                    columns[col][row] = value(ZefRef{target(rel), tx});
+                }
+            }
+            return columns;
+        }
+
+        ZefRefs instances_with_field_value(EZefRef tx, EntityType et, RelationType rt, const value_variant_t & val) {
+            GraphData & gd = *graph_data(tx);
+            std::vector<blob_index> found;
+            for(blob_index rel_ind : internals::field_value_candidates(gd, et, rt, val)) {
+                EZefRef rel{rel_ind, gd};
+                EZefRef src = source(rel);
+                if(!exists_at(rel, tx) || !exists_at(src, tx))
+                    continue;
+                // The index only went by the hash and every value ever
+                // assigned, so check the value at tx. Like select_by_field,
+                // values of different types are never equal.
+                auto field_val = value(ZefRef{target(rel), tx});
+                if(!field_val || !variant_eq(*field_val, val))
+                    continue;
+                found.push_back(index(src));
+            }
+            std::sort(found.begin(), found.end());
+            found.erase(std::unique(found.begin(), found.end()), found.end());
+
+            ZefRefs res(found.size(), tx);
+            std::transform(found.begin(), found.end(), res._get_array_begin(),
+                           [&gd](blob_index ind) { return EZefRef{ind, gd}; });
+            return res;
+        }
+
         // std::vector<value_ret_t> value(ZefRefs zrs) {
         //     std::vector<value_ret_t> res;
         //     res.reserve(length(zrs));
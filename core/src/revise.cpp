@@ -14,10 +14,39 @@
 
 #include "revise.h"
 #include "ops_imperative.h"
+#include "zefops.h"
 #include "transaction.h"
 
+#include <unordered_set>
+
 namespace zefDB {
-    Graph copy_graph_slice(EZefRef ctx) {
+    namespace {
+        template<typename T>
+        bool contains(const std::vector<T> & types, T type) {
+            return std::find(types.begin(), types.end(), type) != types.end();
+        }
+
+        bool passes_filter(EZefRef it, const CopyGraphSliceFilter & filter) {
+            using namespace imperative;
+            // Each kind of RAE is only restricted if types of that kind are given
+            if(BT(it) == BT.ENTITY_NODE && !filter.entity_types.empty() && !contains(filter.entity_types, ET(it)))
+                return false;
+            if(BT(it) == BT.ATTRIBUTE_ENTITY_NODE && !filter.atomic_entity_types.empty() && !contains(filter.atomic_entity_types, AET(it)))
+                return false;
+            if(BT(it) == BT.RELATION_EDGE && !filter.relation_types.empty() && !contains(filter.relation_types, RT(it)))
+                return false;
+            if(filter.instantiated_from || filter.instantiated_until) {
+                Time t = get<blobs_ns::TX_EVENT_NODE>(it | instantiation_tx).time;
+                if(filter.instantiated_from && t < *filter.instantiated_from)
+                    return false;
+                if(filter.instantiated_until && t >= *filter.instantiated_until)
+                    return false;
+            }
+            return true;
+        }
+    }
+
+    Graph copy_graph_slice(EZefRef ctx, const CopyGraphSliceFilter & filter) {
         using namespace imperative;
 
         Graph old_g = Graph(ctx);
@@ -28,65 +57,74 @@ namespace zefDB {
 
         Graph new_g(false);
 
-        // Simply copy entities and relations as we come across them. This
-        // should mean that any relation comes after its source/target.
+        // Index of each RAE in the old graph that has been dealt with -> the
+        // RAE created for it in the new graph, or nothing if it isn't copied.
+        std::unordered_map<blob_index, std::optional<EZefRef>> copied;
 
-        EZefRefs raes = all_raes(old_g);
-        EZefRefs current_raes = filter<EZefRef>(
-            raes,
-            [ctx](EZefRef x) {
-                return exists_at(x, ctx);
+        auto copy_rae = [&](EZefRef it) -> std::optional<EZefRef> {
+            // Value nodes and other blobs are not copied
+            if(BT(it) != BT.ENTITY_NODE && BT(it) != BT.RELATION_EDGE && BT(it) != BT.ATTRIBUTE_ENTITY_NODE)
+                return {};
+            if(!exists_at(it, ctx) || !passes_filter(it, filter))
+                return {};
+            EternalUID euid = origin_uid(it);
+            if(BT(it) == BT.ENTITY_NODE) {
+                return internals::merge_entity_(new_g, ET(it), euid.blob_uid, euid.graph_uid);
+            } else if(BT(it) == BT.RELATION_EDGE) {
+                auto & src = copied.at(index(source(it)));
+                auto & trg = copied.at(index(target(it)));
+                if(!src || !trg)
+                    return {};
+                return internals::merge_relation_(new_g, RT(it), *src, *trg, euid.blob_uid, euid.graph_uid);
+            } else {
+                EZefRef new_ae = internals::merge_atomic_entity_(new_g, AET(it), euid.blob_uid, euid.graph_uid);
+                auto maybe_value = value(to_frame(it,ctx));
+                if(maybe_value)
+                    assign_value(new_ae, *maybe_value);
+                return new_ae;
             }
-        );
-
-        std::vector<EZefRef> todo;
-        todo.reserve(length(current_raes));
-        for(auto it : current_raes)
-            todo.push_back(it);
+        };
 
         Transaction t{new_g};
         Time last = imperative::now();
-        while(true) {
-            std::vector<EZefRef> new_todo;
+        // A single pass in blob order. Relations are only copied after their
+        // source and target, which are copied first if they come later in the
+        // graph. This uses an explicit stack as relations can point to
+        // relations.
+        std::vector<EZefRef> stack;
+        std::unordered_set<blob_index> on_stack;
+        for(auto start : all_raes(old_g)) {
+            if(copied.count(index(start)) > 0)
+                continue;
+            if(imperative::now() - last > 5*seconds) {
+                std::cerr << "Up to index " << index(start) << "/" << old_gd.read_head.load() << std::endl;
+                last = imperative::now();
+            }
 
-            for(auto it : todo) {
-                if(imperative::now() - last > 5*seconds) {
-                    std::cerr << "Up to index " << index(it) << "/" << old_gd.read_head.load() << std::endl;
-                    last = imperative::now();
-                }
-                if(BT(it) == BT.VALUE_NODE)
-                    continue;
-                EternalUID euid = origin_uid(it);
-                if(BT(it) == BT.ENTITY_NODE) {
-                    internals::merge_entity_(new_g, ET(it), euid.blob_uid, euid.graph_uid);
-                } else if(BT(it) == BT.RELATION_EDGE) {
-                    if(!new_g.contains(origin_uid(source(it))) || !new_g.contains(origin_uid(target(it)))) {
-                        new_todo.push_back(it);
-                        continue;
+            stack.push_back(start);
+            on_stack.insert(index(start));
+            while(!stack.empty()) {
+                EZefRef it = stack.back();
+                if(BT(it) == BT.RELATION_EDGE) {
+                    bool waiting = false;
+                    for(auto endpoint : {target(it), source(it)}) {
+                        if(copied.count(index(endpoint)) > 0)
+                            continue;
+                        if(on_stack.count(index(endpoint)) > 0)
+                            throw std::runtime_error("Cycle detected, can't clone");
+                        stack.push_back(endpoint);
+                        on_stack.insert(index(endpoint));
+                        waiting = true;
                     }
-                    EZefRef src = new_g[origin_uid(source(it))];
-                    src = target(traverse_in_node(src, BT.ORIGIN_RAE_EDGE));
-                    EZefRef trg = new_g[origin_uid(target(it))];
-                    trg = target(traverse_in_node(trg, BT.ORIGIN_RAE_EDGE));
-                    internals::merge_relation_(new_g, RT(it), src, trg, euid.blob_uid, euid.graph_uid);
-                } else if(BT(it) == BT.ATTRIBUTE_ENTITY_NODE) {
-                    EZefRef new_ae = internals::merge_atomic_entity_(new_g, AET(it), euid.blob_uid, euid.graph_uid);
-                    auto maybe_value = value(to_frame(it,ctx));
-                    if(maybe_value)
-                        assign_value(new_ae, *maybe_value);
+                    if(waiting)
+                        continue;
                 }
+                stack.pop_back();
+                on_stack.erase(index(it));
+                copied[index(it)] = copy_rae(it);
             }
-
-            if(new_todo.size() == 0)
-                break;
-            if(new_todo.size() == todo.size())
-                throw std::runtime_error("Cycle detected, can't clone");
-
-            todo = new_todo;
-            new_todo.clear();
-            std::cerr << "Relooping in copy_graph_slice" << std::endl;
         }
 
         return new_g;
     }
-}
\ No newline at end of file
+}
@@ -19,6 +19,8 @@
 #include "blobs.h"
 
 #include "zefops.h"
+#include "zwitch.h"
+#include "butler/butler.h"
 
 #include <algorithm>
 
@@ -92,6 +94,7 @@ namespace zefDB {
 
                 auto this_index = it.first;
                 EZefRef uzr(this_index, gd);
+                invalidate_hash_checkpoints(gd, this_index);
                 auto this_new_edges = it.second;
                 // Note: this is a sorted set, which is kind of necessary for
                 // the existing hash-checking procedure. In the future, the
@@ -420,6 +423,240 @@ namespace zefDB {
 		}
 
 
+        // The cache entries for a run of blobs, in blob order. These must
+        // mirror what the apply_action_* functions insert when fill_caches is
+        // set.
+        struct CacheEntries {
+            std::vector<std::pair<BaseUID,blob_index>> uids;
+            std::vector<std::pair<EternalUID,blob_index>> euids;
+            std::vector<std::pair<std::string,blob_index>> tags;
+            std::vector<std::tuple<value_hash_t,value_variant_t,blob_index>> values;
+            std::vector<token_value_t> ETs;
+            std::vector<token_value_t> RTs;
+            std::vector<enum_indx> ENs;
+        };
+
+        template<class T, class U>
+        void add_if_new(std::vector<T> & v, const U & item) {
+            // These lists only ever hold a handful of types.
+            if(std::find(v.begin(), v.end(), T(item)) == v.end())
+                v.push_back(T(item));
+        }
+
+        void collect_cache_entries(GraphData & gd, EZefRef uzr, CacheEntries & out) {
+            switch (get<BlobType>(uzr)) {
+            case BlobType::ROOT_NODE:
+            case BlobType::TX_EVENT_NODE: {
+                if(!is_delegate(uzr))
+                    out.uids.emplace_back(get_blob_uid(uzr), index(uzr));
+                break;
+            }
+            case BlobType::ATTRIBUTE_ENTITY_NODE: {
+                if(!is_delegate(uzr)) {
+                    out.uids.emplace_back(get_blob_uid(uzr), index(uzr));
+                    break;
+                }
+                auto & node = get<blobs_ns::ATTRIBUTE_ENTITY_NODE>(uzr);
+                if(is_zef_subtype(node.primitive_type, VRT.Enum) ||
+                   is_zef_subtype(node.primitive_type, VRT.QuantityFloat) ||
+                   is_zef_subtype(node.primitive_type, VRT.QuantityInt)) {
+                    auto v = node.primitive_type.value;
+                    add_if_new(out.ENs, enum_indx(v - v % 16));
+                }
+                break;
+            }
+            case BlobType::ENTITY_NODE: {
+                if(!is_delegate(uzr))
+                    out.uids.emplace_back(get_blob_uid(uzr), index(uzr));
+                else
+                    add_if_new(out.ETs, get<blobs_ns::ENTITY_NODE>(uzr).entity_type.entity_type_indx);
+                break;
+            }
+            case BlobType::RELATION_EDGE: {
+                if(!is_delegate(uzr))
+                    out.uids.emplace_back(get_blob_uid(uzr), index(uzr));
+                else
+                    add_if_new(out.RTs, get<blobs_ns::RELATION_EDGE>(uzr).relation_type.relation_type_indx);
+                break;
+            }
+            case BlobType::FOREIGN_GRAPH_NODE: {
+                out.uids.emplace_back(get_blob_uid(uzr), index(uzr));
+                break;
+            }
+            case BlobType::FOREIGN_ENTITY_NODE:
+            case BlobType::FOREIGN_ATTRIBUTE_ENTITY_NODE:
+            case BlobType::FOREIGN_RELATION_EDGE: {
+                BaseUID graph_uid = get_blob_uid(uzr >> BT.ORIGIN_GRAPH_EDGE);
+                out.euids.emplace_back(EternalUID(get_blob_uid(uzr), graph_uid), index(uzr));
+                break;
+            }
+            case BlobType::ASSIGN_TAG_NAME_EDGE: {
+                auto & action_blob = get<blobs_ns::ASSIGN_TAG_NAME_EDGE>(uzr);
+                if(length(uzr > L[BT.NEXT_TAG_NAME_ASSIGNMENT_EDGE]) == 0)
+                    out.tags.emplace_back(std::string(get_data_buffer(action_blob), action_blob.buffer_size_in_bytes), index(uzr | target | target));
+                break;
+            }
+            case BlobType::VALUE_NODE: {
+                auto value = value_from_node<value_variant_t>(get<blobs_ns::VALUE_NODE>(uzr));
+                auto hash = value_hash(value);
+                out.values.emplace_back(hash, std::move(value), index(uzr));
+                break;
+            }
+            case BlobType::ATOMIC_VALUE_ASSIGNMENT_EDGE: {
+                auto & node = get<blobs_ns::ATOMIC_VALUE_ASSIGNMENT_EDGE>(uzr);
+                if(is_zef_subtype(node.rep_type, VRT.Enum))
+                    add_if_new(out.ENs, ((ZefEnumValue*)node.data_buffer)->value);
+                break;
+            }
+            default:
+                break;
+            }
+        }
+
+        void load_cache_entries(GraphData & gd, CacheEntries & entries, const std::vector<std::string> & only_caches) {
+            auto wanted = [&](const std::string & name) {
+                return only_caches.empty()
+                    || std::find(only_caches.begin(), only_caches.end(), name) != only_caches.end();
+            };
+
+            if(wanted("_uid_lookup")) {
+                auto ptr = gd.uid_lookup->get_writer();
+                ptr->append_bulk(entries.uids, ptr.ensure_func());
+            }
+            if(wanted("_euid_lookup")) {
+                auto ptr = gd.euid_lookup->get_writer();
+                ptr->append_bulk(entries.euids, ptr.ensure_func());
+            }
+            if(wanted("_tag_lookup")) {
+                auto ptr = gd.tag_lookup->get_writer();
+                for(auto & it : entries.tags)
+                    ptr->append(std::move(it.first), std::move(it.second), ptr.ensure_func());
+            }
+            if(wanted("_av_hash_lookup")) {
+                auto ptr = gd.av_hash_lookup->get_writer();
+                for(auto & it : entries.values) {
+                    auto compare_func = internals::create_compare_func_for_value_node(gd, &std::get<1>(it));
+                    ptr->append(std::get<0>(it), std::get<2>(it), compare_func, ptr.ensure_func());
+                }
+            }
+#define GEN_SET(x, y)                                           \
+            if(wanted("_" #y)) {                                \
+                auto p = gd.y->get_writer();                    \
+                for(auto & item : entries.x)                    \
+                    if(!p->contains(item))                      \
+                        p->append(item, p.ensure_func());       \
+            }
+            GEN_SET(ETs, ETs_used)
+            GEN_SET(RTs, RTs_used)
+            GEN_SET(ENs, ENs_used)
+#undef GEN_SET
+        }
+
+        void fill_caches_for_blob_range(GraphData & gd, blob_index blob_index_lo, blob_index blob_index_hi, const std::function<void(blob_index,blob_index)> & progress, const std::vector<std::string> & only_caches) {
+            if(blob_index_hi <= blob_index_lo)
+                return;
+
+            // The workers only read blobs that are already in memory. Loading
+            // a page from anywhere but the graph manager thread goes through
+            // the butler, which can't answer while the manager is blocked in
+            // here waiting on the workers. The last blob may reach up to
+            // max_basic_blob_size past its start.
+            Butler::ensure_or_get_range(ptr_from_blob_index(blob_index_lo, gd),
+                                        (blob_index_hi - blob_index_lo)*constants::blob_indx_step_in_bytes + blobs_ns::max_basic_blob_size);
+
+            // Blobs can only be walked forwards, so split the range into
+            // chunks of blobs first. This is cheap compared to reading their
+            // contents. boundaries holds the start of each chunk and finally
+            // blob_index_hi.
+            std::vector<blob_index> boundaries;
+            size_t n_blobs = 0;
+            blob_index cur_index = blob_index_lo;
+            while(cur_index < blob_index_hi) {
+                if(n_blobs % constants::cache_fill_chunk_blobs == 0)
+                    boundaries.push_back(cur_index);
+                n_blobs++;
+                cur_index += blob_index_size(EZefRef{cur_index, gd});
+            }
+            if(n_blobs == 0)
+                return;
+            boundaries.push_back(blob_index_hi);
+
+            // Chunks are scanned in parallel, but loaded into the caches
+            // strictly in blob order. That keeps the caches identical to ones
+            // filled one blob at a time, which matters as cache updates are
+            // exchanged as diffs by position.
+            size_t n_chunks = boundaries.size() - 1;
+            size_t n_threads = std::min<size_t>(n_chunks, std::max(1u, std::thread::hardware_concurrency()));
+
+            std::vector<CacheEntries> results(n_chunks);
+            std::vector<std::exception_ptr> errors(n_chunks);
+            std::vector<bool> done(n_chunks, false);
+            std::mutex m;
+            std::condition_variable cv;
+            std::atomic<size_t> next_chunk{0};
+
+            auto scan_chunks = [&]() {
+                while(true) {
+                    size_t chunk = next_chunk++;
+                    if(chunk >= n_chunks)
+                        return;
+                    try {
+                        blob_index cur = boundaries[chunk];
+                        while(cur < boundaries[chunk+1]) {
+                            EZefRef uzr{cur, gd};
+                            collect_cache_entries(gd, uzr, results[chunk]);
+                            cur += blob_index_size(uzr);
+                        }
+                    } catch(...) {
+                        errors[chunk] = std::current_exception();
+                    }
+                    {
+                        std::lock_guard lock(m);
+                        done[chunk] = true;
+                    }
+                    cv.notify_all();
+                }
+            };
+
+            std::vector<std::thread> workers;
+            auto stop_workers = [&]() {
+                // Stop the workers from picking up anything else.
+                next_chunk = n_chunks;
+                for(auto & worker : workers)
+                    worker.join();
+            };
+
+            try {
+                // A single chunk is not worth a thread.
+                if(n_threads > 1) {
+                    for(size_t i = 0 ; i < n_threads ; i++)
+                        workers.emplace_back(scan_chunks);
+                } else
+                    scan_chunks();
+
+                for(size_t chunk = 0 ; chunk < n_chunks ; chunk++) {
+                    {
+                        std::unique_lock lock(m);
+                        cv.wait(lock, [&]() { return done[chunk]; });
+                    }
+                    if(errors[chunk])
+                        std::rethrow_exception(errors[chunk]);
+                    load_cache_entries(gd, results[chunk], only_caches);
+                    results[chunk] = CacheEntries{};
+
+                    if(progress)
+                        progress(boundaries[chunk+1] - blob_index_lo, blob_index_hi - blob_index_lo);
+                    if(n_chunks > 1)
+                        developer_output("Filled caches for " + to_str(chunk+1) + "/" + to_str(n_chunks) + " chunks of blobs");
+                }
+            } catch(...) {
+                stop_workers();
+                throw;
+            }
+            stop_workers();
+        }
+
+
 
         // std::unordered_map<blob_index,blob_index> build_deferred_edge_list_hints(GraphData&gd, blob_index blob_index_lo, blob_index blob_index_hi) {
         //     // This goes through all new blobs, identifying the deferred edge
@@ -360,6 +360,7 @@ void apply_action_TERMINATION_EDGE(GraphData & gd, EZefRef uzr, bool fill_caches
     auto this_rel_ent_instance_edge = EZefRef(target_node_index(uzr), gd);
     auto rel_ent_that_was_terminated = EZefRef(target_node_index(this_rel_ent_instance_edge), gd);
     TimeSlice termination_ts = get<blobs_ns::TX_EVENT_NODE>(EZefRef(source_node_index(uzr), gd)).time_slice;
+    invalidate_hash_checkpoints(gd, index(rel_ent_that_was_terminated));
     switch (get<BlobType>(rel_ent_that_was_terminated)) {   // For an entity, relation, atomic entity, root_node, add the uid to the dict
     case BlobType::ATTRIBUTE_ENTITY_NODE: {
         get<blobs_ns::ATTRIBUTE_ENTITY_NODE>(rel_ent_that_was_terminated).termination_time_slice = termination_ts;
@@ -380,6 +381,7 @@ void apply_action_TERMINATION_EDGE(GraphData & gd, EZefRef uzr, bool fill_caches
 void unapply_action_TERMINATION_EDGE(GraphData & gd, EZefRef uzr, bool fill_caches) {
     auto this_rel_ent_instance_edge = EZefRef(target_node_index(uzr), gd);
     auto rel_ent_that_was_terminated = EZefRef(target_node_index(this_rel_ent_instance_edge), gd);
+    invalidate_hash_checkpoints(gd, index(rel_ent_that_was_terminated));
     switch (get<BlobType>(rel_ent_that_was_terminated)) {
     case BlobType::ATTRIBUTE_ENTITY_NODE: {
         get<blobs_ns::ATTRIBUTE_ENTITY_NODE>(rel_ent_that_was_terminated).termination_time_slice.value = 0;
@@ -255,116 +255,85 @@ namespace zefDB {
 
         std::shared_ptr<ZefObservables> obs = gd.observables;
         auto g = Graph(gd);
-        Graph& g_subs = *obs->g_observables;  // the subscription graph
         EZefRefs outgoing_from_tx = transaction_uzr | outs;
-        // Use a consistent frame of reference throughout this function, even though
-        // subscribes/unsubscribes may be happening. Of course, we can't use the
-        // functions that have been unsubscribed, so we will have to be careful
-        // there too.
-        auto nowish = to_zefref[g_subs|now][allow_terminated_relent_promotion];
-        auto maybe_run_callback = [&](BaseUID sub_uid, auto... args) {
-            // Grab the callback, incrementing the ref count while we have it and run
-            // We use find to return an iterator, that locks the dictionary for us
-            // while we are in here. Just until we can increment the reference count
-            auto sub = try_get_subscription(obs, sub_uid);
-            if(!sub)
-                return;
-
-            // While we have the subscription, we can call away knowing the callback won't disappear on us.
-            obs->callbacks_and_refcount[sub_uid].callback(args...);   // execute the callback: use the latest time slice as reference frame
-        };
 
-        // ----------------------------------------- AE value updates ------------------------------------
-        for (auto z : outgoing_from_tx | filter[BT.ATOMIC_VALUE_ASSIGNMENT_EDGE, BT.ATTRIBUTE_VALUE_ASSIGNMENT_EDGE]) {
-            EZefRef my_ae = z | target | target;
-            auto my_ae_uid = uid(my_ae);
-            if (obs->g_observables->contains(my_ae_uid)) {		// if there is a subscription to z, its uid is definitely in the subscription graph (it's the uid of the cloning edge)
-                // look in this time slice
-                ZefRefs val_assignment_grouping_node = (internals::local_entity(g_subs[my_ae_uid]) | nowish) >> L[RT.OnValueAssignment];   // take the latest time slice of the subscription graph (this was a bug before where transaction_uzr was passed in as ref frame)
-                if (length(val_assignment_grouping_node) == 1) {
-                    for (auto z_subsc : (val_assignment_grouping_node | first) >> L[RT.ListElement]) {
-                        BaseUID callback_uid = uid(z_subsc|to_ezefref).blob_uid;
-                        try {
-                            // set_open_tx_thread();
-                            LockGraphData gd_lock(&gd);
-                            // obs.callbacks_and_refcount[callback_uid].callback(my_ae | to_zefref[transaction_uzr]);   // execute the callback: use the latest time slice as reference frame														
-                            maybe_run_callback(callback_uid, my_ae | to_zefref[transaction_uzr]);   // execute the callback: use the latest time slice as reference frame														
-                        } catch(const std::exception& exc) {
-                            std::cerr << "Error in value assignment for uid " << uid(my_ae) << " callback - ignoring. Error: " << exc.what() << std::endl;
-                        }
-                    }
+        // First collect every callback this transaction triggers from the
+        // dispatch tables, in the order they are to be run. This is a
+        // consistent snapshot, even though subscribes/unsubscribes may be
+        // happening while the callbacks run. Of course, we can't use the
+        // functions that have been unsubscribed since, so maybe_run_callback
+        // has to be careful there too.
+        struct PendingCallback {
+            BaseUID sub_uid;
+            ZefRef arg;
+            const char * kind;
+        };
+        std::vector<PendingCallback> batch;
+        {
+            std::lock_guard lock(obs->dispatch_mutex);
+
+            // ----------------------------------------- AE value updates ------------------------------------
+            if(!obs->value_assignment_subs.empty()) {
+                for (auto z : outgoing_from_tx | filter[BT.ATOMIC_VALUE_ASSIGNMENT_EDGE, BT.ATTRIBUTE_VALUE_ASSIGNMENT_EDGE]) {
+                    EZefRef my_ae = z | target | target;
+                    auto it = obs->value_assignment_subs.find(internals::get_blob_uid(my_ae));
+                    if(it == obs->value_assignment_subs.end())
+                        continue;
+                    for(auto & sub_uid : it->second)
+                        batch.push_back({sub_uid, my_ae | to_zefref[transaction_uzr], "value assignment"});
                 }
             }
-        }			
-
-
-
 
-
-        // ---------------------------------------- structural updates ---------------------------------------
-        // the common parts of the following code are not factored out, although they could be. DRY does not win here
-
-        if (g_subs.contains("MonitoredRelInstantiations")) {  // exit early if no lists are monitored
-            EZefRefs all_instantiated_rels = outgoing_from_tx | filter[BT.INSTANTIATION_EDGE] | target | target | filter[BT.RELATION_EDGE];
-            for (auto rel : all_instantiated_rels) {  // rel lives on the 'data graph'
+            // ---------------------------------------- structural updates ---------------------------------------
+            auto add_rel_callbacks = [&](EZefRef rel, bool is_instantiation, ZefRef arg) {
                 for (auto is_out_rel : { true, false }) {
                     EZefRef subject = is_out_rel ? (rel | source) : (rel | target);
-                    std::size_t composite_hash = internals::make_hash(subject, RT(rel), is_out_rel, true);
-                    auto key = TagString("CallbackList." + to_str(composite_hash));
-                    if (g_subs.contains(key)) {
-                        for (auto cb : (g_subs[key] | nowish) >> L[RT.ListElement]) {
-                            try {
-                                // set_open_tx_thread();
-                                LockGraphData gd_lock(&gd);
-                                // obs.callbacks_and_refcount[UID(cb | to_ezefref)].callback(rel | to_zefref[transaction_uzr]);   // execute the callback: use the latest time slice as reference frame														
-                                maybe_run_callback(uid(cb | to_ezefref).blob_uid, rel | to_zefref[transaction_uzr]);   // execute the callback: use the latest time slice as reference frame														
-                            } catch(const std::exception& exc) {
-                                std::cerr << "Error in instantiation callback for uid " << uid(rel) << " - ignoring. Error: " << exc.what() << std::endl;
-                            }
-                        }
-                    }
+                    ZefObservables::RelKey key{index(subject), RT(rel).relation_type_indx, is_out_rel, is_instantiation};
+                    auto it = obs->relation_subs.find(key);
+                    if(it == obs->relation_subs.end())
+                        continue;
+                    for(auto & sub_uid : it->second)
+                        batch.push_back({sub_uid, arg, is_instantiation ? "instantiation" : "termination"});
                 }
+            };
+
+            if (obs->n_instantiation_subs > 0) {  // exit early if no lists are monitored
+                EZefRefs all_instantiated_rels = outgoing_from_tx | filter[BT.INSTANTIATION_EDGE] | target | target | filter[BT.RELATION_EDGE];
+                for (auto rel : all_instantiated_rels)   // rel lives on the 'data graph'
+                    add_rel_callbacks(rel, true, rel | to_zefref[transaction_uzr]);
             }
-        }
 
-        if (g_subs.contains("MonitoredRelTerminations")) {  // exit early if no lists are monitored
-            EZefRefs all_terminated_rels = outgoing_from_tx | filter[BT.TERMINATION_EDGE] | target | target | filter[BT.RELATION_EDGE];
-            for (auto rel : all_terminated_rels) {  // rel lives on the 'data graph'
-                for (auto is_out_rel : { true, false }) {
-                    EZefRef subject = is_out_rel ? (rel | source) : (rel | target);
-                    std::size_t composite_hash = internals::make_hash(subject, RT(rel), is_out_rel, false);
-                    auto key = TagString("CallbackList." + to_str(composite_hash));
-                    if (g_subs.contains(key)) {
-                        for (auto cb : (g_subs[key] | nowish) >> L[RT.ListElement]) {
-                            try {
-                                // set_open_tx_thread();
-                                LockGraphData gd_lock(&gd);
-                                // obs.callbacks_and_refcount[UID(cb | to_ezefref)].callback(rel | to_zefref[allow_terminated_relent_promotion][transaction_uzr]);   // execute the callback: use the latest time slice as reference frame														
-                                maybe_run_callback(uid(cb | to_ezefref).blob_uid, rel | to_zefref[allow_terminated_relent_promotion][transaction_uzr]);   // execute the callback: use the latest time slice as reference frame														
-                            } catch(const std::exception& exc) {
-                                std::cerr << "Error in termination callback for uid " << uid(rel) << " - ignoring. Error: " << exc.what() << std::endl;
-                            }
-                        }
-                    }
-                }
+            if (obs->n_termination_subs > 0) {  // exit early if no lists are monitored
+                EZefRefs all_terminated_rels = outgoing_from_tx | filter[BT.TERMINATION_EDGE] | target | target | filter[BT.RELATION_EDGE];
+                for (auto rel : all_terminated_rels)   // rel lives on the 'data graph'
+                    add_rel_callbacks(rel, false, rel | to_zefref[allow_terminated_relent_promotion][transaction_uzr]);
             }
-        }
 
+            // ---------------------------------------- general graph callbacks: executed on every Transaction closing ---------------------------------------
+            // the callback functions are of of uniform type signature: void(ZefRef). By default, pass in the current graph, rerpresented as its versioned root node
+            for (auto & sub_uid : obs->graph_subs)
+                batch.push_back({sub_uid, g[constants::ROOT_NODE_blob_index] | to_zefref[transaction_uzr], "GraphSubscription"});
+        }
 
+        if(batch.empty())
+            return;
 
-        // ---------------------------------------- general graph callbacks: executed on every Transaction closing ---------------------------------------
-        if (g_subs.contains("GraphSubscriptions")) {  // exit early if no general graph callbacks are monitored
-            for (auto z : (g_subs[TagString("GraphSubscriptions")] | nowish) >> L[RT.ListElement]) {
-                try {
-                    // set_open_tx_thread();
-                    LockGraphData gd_lock(&gd);
-                    // obs.callbacks_and_refcount[UID(z | to_ezefref)].callback(g[constants::ROOT_NODE_blob_index] | to_zefref[transaction_uzr]);   // the callback functions are of of uniform type signature: void(ZefRef). By default, pass in the current graph, rerpresented as its versioned root node
-                    maybe_run_callback(uid(z | to_ezefref).blob_uid, g[constants::ROOT_NODE_blob_index] | to_zefref[transaction_uzr]);   // the callback functions are of of uniform type signature: void(ZefRef). By default, pass in the current graph, rerpresented as its versioned root node
-                }
-                catch (const std::exception& exc) {
-                    std::cerr << "An exception occurred executing the GraphSubscription callback with subscription uid = " << uid(z | to_ezefref) << "\nError:    " << exc.what() << "\n";
-                }
-            }			
+        // The whole batch runs under one lock, rather than taking it for each callback.
+        // set_open_tx_thread();
+        LockGraphData gd_lock(&gd);
+        for(auto & pending : batch) {
+            try {
+                // Grab the callback, incrementing the ref count while we have
+                // it and run. If the subscription has been cancelled in the
+                // meantime this is a no-op.
+                auto sub = try_get_subscription(obs, pending.sub_uid);
+                if(!sub)
+                    continue;
+                // While we have the subscription, we can call away knowing the callback won't disappear on us.
+                obs->callbacks_and_refcount[pending.sub_uid].callback(pending.arg);
+            } catch(const std::exception& exc) {
+                std::cerr << "Error in " << pending.kind << " callback for uid " << uid(pending.arg) << " (subscription uid = " << pending.sub_uid << ") - ignoring. Error: " << exc.what() << std::endl;
+            }
         }
 
         // TODO!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
@@ -16,9 +16,15 @@
 
 #include "high_level_api.h"
 #include "zefops.h"
+#include "butler/butler.h"
 
 #include <doctest/doctest.h>
 
+#include <thread>
+#include <mutex>
+#include <condition_variable>
+#include <atomic>
+
 namespace zefDB {
 	namespace verification {	
 
@@ -179,6 +185,33 @@ namespace zefDB {
 		}
 
 
+        static bool chronological_order_ok(EZefRef uzr) {
+            BlobType inst_type, term_type;
+            if(get<BlobType>(uzr) == BlobType::RAE_INSTANCE_EDGE) {
+                inst_type = BlobType::INSTANTIATION_EDGE;
+                term_type = BlobType::TERMINATION_EDGE;
+            } else if(get<BlobType>(uzr) == BlobType::TO_DELEGATE_EDGE) {
+                inst_type = BlobType::DELEGATE_INSTANTIATION_EDGE;
+                term_type = BlobType::DELEGATE_RETIREMENT_EDGE;
+            } else
+                return true;
+
+            TimeSlice last_ts(0);
+            auto all_edges = ins_and_outs(uzr);
+            for (auto edge_uzr : all_edges) {
+                if(get<BlobType>(edge_uzr) == inst_type ||
+                   get<BlobType>(edge_uzr) == term_type) {
+                    EZefRef tx_uzr = source(edge_uzr);
+                    auto & tx_node = get<blobs_ns::TX_EVENT_NODE>(tx_uzr);
+                    if(tx_node.time_slice < last_ts)
+                        return false;
+
+                    last_ts = tx_node.time_slice;
+                }
+            }
+            return true;
+        }
+
         bool verify_chronological_instantiation_order(Graph g) {
 			GraphData& gd = g.my_graph_data();
 
@@ -186,38 +219,9 @@ namespace zefDB {
 			while (cur_index < gd.write_head) {
                 EZefRef uzr{cur_index,gd};
 
-                if(get<BlobType>(uzr) == BlobType::RAE_INSTANCE_EDGE) {
-                    TimeSlice last_ts(0);
-                    auto all_edges = ins_and_outs(uzr);
-                    for (auto edge_uzr : all_edges) {
-                        if(get<BlobType>(edge_uzr) == BlobType::INSTANTIATION_EDGE ||
-                           get<BlobType>(edge_uzr) == BlobType::TERMINATION_EDGE) {
-                            EZefRef tx_uzr = source(edge_uzr);
-                            auto & tx_node = get<blobs_ns::TX_EVENT_NODE>(tx_uzr);
-                            if(tx_node.time_slice < last_ts) {
-                                std::cerr << "Chronological order is bad for blob: " << cur_index << std::endl;
-                                return false;
-                            }
-
-                            last_ts = tx_node.time_slice;
-                        }
-                    }
-                } else if(get<BlobType>(uzr) == BlobType::TO_DELEGATE_EDGE) {
-                    TimeSlice last_ts(0);
-                    auto all_edges = ins_and_outs(uzr);
-                    for (auto edge_uzr : all_edges) {
-                        if(get<BlobType>(edge_uzr) == BlobType::DELEGATE_INSTANTIATION_EDGE ||
-                           get<BlobType>(edge_uzr) == BlobType::DELEGATE_RETIREMENT_EDGE) {
-                            EZefRef tx_uzr = source(edge_uzr);
-                            auto & tx_node = get<blobs_ns::TX_EVENT_NODE>(tx_uzr);
-                            if(tx_node.time_slice < last_ts) {
-                                std::cerr << "Chronological order is bad for blob: " << cur_index << std::endl;
-                                return false;
-                            }
-
-                            last_ts = tx_node.time_slice;
-                        }
-                    }
+                if(!chronological_order_ok(uzr)) {
+                    std::cerr << "Chronological order is bad for blob: " << cur_index << std::endl;
+                    return false;
                 }
 
                 cur_index += blob_index_size(uzr);
@@ -227,6 +231,139 @@ namespace zefDB {
         }
 
 
+        //////////////////////////////////////////////
+        // * Parallel verification
+
+        struct PartitionResult {
+            std::string linking_error;
+            blob_index bad_chronological_order = 0;
+        };
+
+        // Walk the blobs once to find blob starts splitting the range from the
+        // root to the write head into roughly num_partitions parts of equal
+        // size in memory. Returns the boundaries including both ends.
+        static std::vector<blob_index> partition_blob_range(GraphData & gd, size_t num_partitions) {
+            blob_index lo = internals::root_node_blob_index();
+            blob_index hi = gd.write_head;
+            std::vector<blob_index> boundaries{lo};
+            double step = double(hi - lo) / num_partitions;
+            double next_target = lo + step;
+
+            blob_index cur_index = lo;
+            while (cur_index < hi) {
+                if(cur_index >= next_target && cur_index != boundaries.back()) {
+                    boundaries.push_back(cur_index);
+                    while(next_target <= cur_index)
+                        next_target += step;
+                }
+                cur_index += blob_index_size(EZefRef{cur_index,gd});
+            }
+            boundaries.push_back(hi);
+            return boundaries;
+        }
+
+        static PartitionResult verify_blob_range(GraphData & gd, blob_index lo, blob_index hi, const std::atomic<bool> & stop) {
+            PartitionResult res;
+            try {
+                blob_index cur_index = lo;
+                while (cur_index < hi && !stop) {
+                    EZefRef uzr{cur_index,gd};
+                    // Same conditions as verify_source_target_in_edge_lists
+                    if (internals::has_source_target_node(uzr)) {
+                        if(!internals::has_edges(EZefRef{source_node_index(uzr),gd})
+                           || !internals::has_edges(EZefRef{target_node_index(uzr),gd}))
+                            throw std::runtime_error("Edge lists do not agree with source/target");
+                    }
+                    if (internals::has_edges(uzr) && get<BlobType>(uzr) != BlobType::DEFERRED_EDGE_LIST_NODE)
+                        verify_that_all_uzrs_in_my_edgelist_refer_to_me(uzr);
+                    if (res.bad_chronological_order == 0 && !chronological_order_ok(uzr))
+                        res.bad_chronological_order = cur_index;
+                    cur_index += blob_index_size(uzr);
+                }
+            } catch(const std::exception & e) {
+                res.linking_error = e.what();
+            }
+            return res;
+        }
+
+        bool verify_graph_parallel(Graph& g, int num_threads, verification_progress_callback progress) {
+			GraphData& gd = g.my_graph_data();
+
+            // Make all blobs available up front, so the worker threads only read memory
+            blob_index lo = internals::root_node_blob_index();
+            char * lo_ptr = (char*)&gd + lo * constants::blob_indx_step_in_bytes;
+            if(gd.write_head > lo)
+                Butler::ensure_or_get_range(lo_ptr, (gd.write_head - lo)*constants::blob_indx_step_in_bytes);
+
+            if(num_threads <= 0)
+                num_threads = std::max(1u, std::thread::hardware_concurrency());
+            // More partitions than threads to balance the load and to report progress
+            std::vector<blob_index> boundaries = partition_blob_range(gd, num_threads * 8);
+            size_t num_partitions = boundaries.size() - 1;
+
+            std::vector<PartitionResult> results(num_partitions);
+            std::atomic<size_t> next_partition = 0;
+            std::atomic<bool> stop = false;
+            size_t num_done = 0;
+            std::mutex m;
+            std::condition_variable cv;
+
+            auto worker = [&]() {
+                size_t i;
+                while(!stop && (i = next_partition++) < num_partitions) {
+                    results[i] = verify_blob_range(gd, boundaries[i], boundaries[i+1], stop);
+                    {
+                        std::lock_guard lock(m);
+                        num_done++;
+                    }
+                    cv.notify_one();
+                }
+            };
+
+            std::vector<std::thread> threads;
+            for(size_t i = 0 ; i < std::min((size_t)num_threads, num_partitions) ; i++)
+                threads.emplace_back(worker);
+
+            // Report progress from this thread, an exception thrown by the
+            // callback stops the workers and is rethrown after joining them.
+            std::exception_ptr callback_exception;
+            size_t reported = 0;
+            {
+                std::unique_lock lock(m);
+                while(reported < num_partitions && !stop) {
+                    cv.wait(lock, [&]() { return num_done > reported; });
+                    reported = num_done;
+                    if(progress) {
+                        lock.unlock();
+                        try {
+                            progress(reported, num_partitions);
+                        } catch(...) {
+                            callback_exception = std::current_exception();
+                            stop = true;
+                        }
+                        lock.lock();
+                    }
+                }
+            }
+            for(auto & thread : threads)
+                thread.join();
+            if(callback_exception)
+                std::rethrow_exception(callback_exception);
+
+            for(auto & res : results) {
+                if(res.linking_error != "")
+                    throw std::runtime_error(res.linking_error);
+            }
+            for(auto & res : results) {
+                if(res.bad_chronological_order != 0) {
+                    std::cerr << "Chronological order is bad for blob: " << res.bad_chronological_order << std::endl;
+                    return false;
+                }
+            }
+            return true;
+        }
+
+
         // This was for some kind of testing
 
         void break_graph(Graph&g, blob_index index, int style) {
@@ -16,11 +16,69 @@
 
 #include "zef_zstd_interface.h"
 
+#include <zdict.h>
+
+#include <memory>
 #include <stdexcept>
 
 namespace zefDB {
-    std::string decompress_zstd(std::string input) {
-        size_t r_size = ZSTD_getFrameContentSize(input.c_str(), input.length());
+    namespace {
+        struct ZstdContexts {
+            ZSTD_CCtx * cctx = ZSTD_createCCtx();
+            ZSTD_DCtx * dctx = ZSTD_createDCtx();
+            ~ZstdContexts() {
+                ZSTD_freeCCtx(cctx);
+                ZSTD_freeDCtx(dctx);
+            }
+        };
+
+        ZstdContexts & thread_contexts() {
+            thread_local ZstdContexts contexts;
+            return contexts;
+        }
+
+        void check_zstd(size_t code, const std::string & what) {
+            if (ZSTD_isError(code)) {
+                std::string zstd_err = ZSTD_getErrorName(code);
+                throw std::runtime_error("Problem " + what + " zstd string. zstd error: " + zstd_err);
+            }
+        }
+
+        ZSTD_CCtx * prepare_cctx(int compression_level, const ZstdDictionary * dict) {
+            ZSTD_CCtx * cctx = thread_contexts().cctx;
+            check_zstd(ZSTD_CCtx_reset(cctx, ZSTD_reset_session_and_parameters), "compressing");
+            if(dict != nullptr)
+                check_zstd(ZSTD_CCtx_refCDict(cctx, dict->cdict), "compressing");
+            else
+                check_zstd(ZSTD_CCtx_setParameter(cctx, ZSTD_c_compressionLevel, compression_level), "compressing");
+            return cctx;
+        }
+    }
+
+    ZstdDictionary::ZstdDictionary(const std::string & dictionary, int compression_level) {
+        cdict = ZSTD_createCDict(dictionary.data(), dictionary.size(), compression_level);
+        ddict = ZSTD_createDDict(dictionary.data(), dictionary.size());
+        if(cdict == nullptr || ddict == nullptr) {
+            ZSTD_freeCDict(cdict);
+            ZSTD_freeDDict(ddict);
+            throw std::runtime_error("Unable to load zstd dictionary.");
+        }
+        id = ZSTD_getDictID_fromDDict(ddict);
+    }
+
+    ZstdDictionary::~ZstdDictionary() {
+        ZSTD_freeCDict(cdict);
+        ZSTD_freeDDict(ddict);
+    }
+
+    std::shared_ptr<const ZstdDictionary> load_zstd_dictionary(const std::string & dictionary, int compression_level) {
+        if(dictionary == "")
+            return nullptr;
+        return std::make_shared<const ZstdDictionary>(dictionary, compression_level);
+    }
+
+    std::string decompress_zstd(std::string_view input, const ZstdDictionary * dict) {
+        size_t r_size = ZSTD_getFrameContentSize(input.data(), input.length());
         if(r_size == ZSTD_CONTENTSIZE_ERROR)
             throw std::runtime_error("Not a zstd compressed string.");
         if(r_size == ZSTD_CONTENTSIZE_UNKNOWN)
@@ -28,9 +86,17 @@ namespace zefDB {
 
         std::string output;
         output.resize(r_size);
-        // TODO: Setup and reuse the context from ZSTD_decompressDCtx.
 
-        size_t d_size = ZSTD_decompress(output.data(), r_size, input.c_str(), input.length());
+        ZSTD_DCtx * dctx = thread_contexts().dctx;
+        size_t d_size;
+        unsigned int dict_id = ZSTD_getDictID_fromFrame(input.data(), input.length());
+        if(dict_id == 0)
+            d_size = ZSTD_decompressDCtx(dctx, output.data(), r_size, input.data(), input.length());
+        else {
+            if(dict == nullptr || dict->id != dict_id)
+                throw std::runtime_error("zstd string was compressed with a dictionary that is not loaded.");
+            d_size = ZSTD_decompress_usingDDict(dctx, output.data(), r_size, input.data(), input.length(), dict->ddict);
+        }
         if (d_size != r_size) {
             std::string zstd_err = ZSTD_getErrorName(d_size);
             throw std::runtime_error("Problem decompressing zstd string. zstd error: " + zstd_err);
@@ -39,21 +105,70 @@ namespace zefDB {
         return output;
     }
 
-    std::string compress_zstd(std::string input, int compression_level) {
+    std::string compress_zstd(std::string_view input, int compression_level) {
         size_t const max_size = ZSTD_compressBound(input.length());
 
         std::string output;
         output.resize(max_size);
 
-        // TODO: Setup and reuse the context from ZSTD_compressCCtx.
-        size_t const c_size = ZSTD_compress(output.data(), max_size, input.c_str(), input.length(), compression_level);
-        if (ZSTD_isError(c_size)) {
-            std::string zstd_err = ZSTD_getErrorName(c_size);
-            throw std::runtime_error("Problem compressing zstd string. zstd error: " + zstd_err);
-        }
+        ZSTD_CCtx * cctx = prepare_cctx(compression_level, nullptr);
+        size_t const c_size = ZSTD_compress2(cctx, output.data(), max_size, input.data(), input.length());
+        check_zstd(c_size, "compressing");
 
         output.resize(c_size);
 
         return output;
     }
-}
\ No newline at end of file
+
+    std::string compress_zstd_parts(const std::vector<std::string_view> & parts, int compression_level, const ZstdDictionary * dict) {
+        size_t total = 0;
+        for(auto & part : parts)
+            total += part.length();
+
+        std::string output;
+        output.resize(ZSTD_compressBound(total));
+
+        ZSTD_CCtx * cctx = prepare_cctx(compression_level, dict);
+        // Puts the content size in the frame header, as decompress_zstd needs it
+        check_zstd(ZSTD_CCtx_setPledgedSrcSize(cctx, total), "compressing");
+
+        // The output buffer is large enough for the whole frame, so every
+        // part is consumed in a single call.
+        ZSTD_outBuffer out{output.data(), output.size(), 0};
+        for(auto & part : parts) {
+            ZSTD_inBuffer in{part.data(), part.length(), 0};
+            while(in.pos < in.size)
+                check_zstd(ZSTD_compressStream2(cctx, &out, &in, ZSTD_e_continue), "compressing");
+        }
+        ZSTD_inBuffer empty{nullptr, 0, 0};
+        size_t remaining;
+        do {
+            remaining = ZSTD_compressStream2(cctx, &out, &empty, ZSTD_e_end);
+            check_zstd(remaining, "compressing");
+        } while(remaining != 0);
+
+        output.resize(out.pos);
+
+        return output;
+    }
+
+    std::string train_zstd_dictionary(const std::vector<std::string> & samples, size_t max_size) {
+        std::string buffer;
+        std::vector<size_t> sizes;
+        for(auto & sample : samples) {
+            buffer += sample;
+            sizes.push_back(sample.length());
+        }
+
+        std::string dictionary;
+        dictionary.resize(max_size);
+        size_t d_size = ZDICT_trainFromBuffer(dictionary.data(), max_size, buffer.data(), sizes.data(), sizes.size());
+        if (ZDICT_isError(d_size)) {
+            std::string zstd_err = ZDICT_getErrorName(d_size);
+            throw std::runtime_error("Problem training zstd dictionary. zstd error: " + zstd_err);
+        }
+        dictionary.resize(d_size);
+
+        return dictionary;
+    }
+}
@@ -1381,7 +1381,20 @@ namespace zefDB {
             throw std::runtime_error("Instances(tx, type) should be called with a TX as the first argument.");
         }
 
-        return ((delegate < BT.TO_DELEGATE_EDGE) >> L[BT.RAE_INSTANCE_EDGE]) | filter[std::function<bool(EZefRef)>(exists_at[tx])] | to_zefref[tx];
+        // The index only hands out instances that are alive at the head of
+        // the graph or were terminated after tx, so this does not grow with
+        // the full history of the type.
+        GraphData & gd = *graph_data(tx);
+        auto is_alive = exists_at[tx];
+        std::vector<blob_index> indices = internals::instance_candidates(delegate < BT.TO_DELEGATE_EDGE, get<blobs_ns::TX_EVENT_NODE>(tx).time_slice);
+        indices.erase(std::remove_if(indices.begin(), indices.end(),
+                                     [&](blob_index ind) { return !is_alive(EZefRef{ind, gd}); }),
+                      indices.end());
+
+        ZefRefs res(indices.size(), tx);
+        std::transform(indices.begin(), indices.end(), res._get_array_begin(),
+                       [&gd](blob_index ind) { return EZefRef{ind, gd}; });
+        return res;
     }
 
     ZefRefs Instances::pure(ZefRef tx_or_delegate) {
@@ -1557,142 +1570,39 @@ namespace zefDB {
 
 	// ---------------- checks passed --------------------
 
-		auto get_latest_or_create_and_get = [](TagString tag_name, EntityType et, Graph& gg)->ZefRef {
-			if (!gg.contains(tag_name)) {
-				auto res = instantiate(et, gg);
-				tag(res, tag_name.s);
-				return res;
-			}
-			return gg[tag_name] | now;
-		};
-
-
 		auto g_to_register_callback = Graph(z);
 		auto& obs = g_to_register_callback.my_graph_data().observables;
 		if (!bool(obs))
-			// obs.emplace(); // init if this is empty (allows fast check when tx closes)
-            obs = std::make_unique<ZefObservables>(); // init if this is empty (allows fast check when tx closes)
-		
-		auto& g_observables = *(*obs).g_observables;  // deref twice: for optional<ZefObservables> and unique_ptr
-		auto& callbacks_and_refcount = (*obs).callbacks_and_refcount;
-		{			
-			auto keep_open_tx = Transaction(g_observables);
-			if (std::holds_alternative<OnValueAssignment>(relation_direction)) {				
-				auto z_uid = uid(z|to_ezefref);
-				// any observed relent is merged into g_observables. 
-				// Although the clone has a different uid, the ancestor's uid is also contained in g_observables for the clone edge.
-				if (!g_observables.contains(z_uid)) { // if z was never tracked in any context before					
-					// merge(EZefRefs({ EZefRef(z) }), (g_to_register_callback | now), g_observables);
-                    {
-                        Transaction{g_observables};
-                        internals::merge_atomic_entity_(g_observables, AET(z), z_uid.blob_uid, z_uid.graph_uid);
-                    }
-				}
-				ZefRef relent_proxy = internals::local_entity(g_observables[z_uid]) | now;
-				auto val_assignment_list = relent_proxy >> L[RT.OnValueAssignment];
-				// if there is no outgoing ZEF_OnValueAssignment edge, create one
-				if (length(val_assignment_list) == 0) {
-					instantiate(
-						relent_proxy,
-						RT.OnValueAssignment,
-						instantiate(ET.List, g_observables),
-						g_observables
-					);
-				}
-				BaseUID subscription_uid = make_random_uid();
-				ZefRef z_subs = instantiate(
-					relent_proxy >> RT.OnValueAssignment,
-					RT.ListElement,
-					instantiate(ET.Subscription, g_observables, subscription_uid),   // specify the uid to be shared with the dict
-					g_observables
-				);
+            obs = std::make_shared<ZefObservables>(); // init if this is empty (allows fast check when tx closes)
 
-				// the uid on the graph is the dict key, so we can match up in both directions
-				callbacks_and_refcount[subscription_uid] = ZefObservables::DictElement{
-					*callback_fct,		// if we're here, we know this is set
-					1, // The base Subscription ctor doesn't register a ref count, so we must do it here ourselves.
-                    _keep_alive.value
-				};
+		ZefObservables::DispatchKey key;
+		if (std::holds_alternative<OnValueAssignment>(relation_direction)) {
+			key = internals::get_blob_uid(z | to_ezefref);
+		}
+		// ###################################################  observe structural changes ##############################################################
+		else {
+			bool is_out_relation = (std::holds_alternative<OnInstantiation>(relation_direction) && std::get<OnInstantiation>(relation_direction).is_outgoing) ||
+				(std::holds_alternative<OnTermination>(relation_direction) && std::get<OnTermination>(relation_direction).is_outgoing);
+			bool is_instantiation = std::holds_alternative<OnInstantiation>(relation_direction);
+			RelationType relation_type = std::visit(overloaded{
+				[](OnInstantiation op)->RelationType {if (!bool(op.rt)) throw std::runtime_error("rel not set in OnInstantiation used in 'subscribe'"); return *op.rt; },
+				[](OnTermination op)->RelationType {if (!bool(op.rt)) throw std::runtime_error("rel not set in OnTermination used in 'subscribe'"); return *op.rt; },
+
+				[](auto x)->RelationType { return RT._unspecified; } // never reached, bute required to compile
+				}, relation_direction);
+
+			key = ZefObservables::RelKey{index(EZefRef(z)), relation_type.relation_type_indx, is_out_relation, is_instantiation};
+		}
 
-				return Subscription { obs, subscription_uid };
-			}
-			// ###################################################  observe structural changes ##############################################################
-			else {
-				bool is_out_relation = (std::holds_alternative<OnInstantiation>(relation_direction) && std::get<OnInstantiation>(relation_direction).is_outgoing) ||
-					(std::holds_alternative<OnTermination>(relation_direction) && std::get<OnTermination>(relation_direction).is_outgoing);
-				bool is_instantiation = std::holds_alternative<OnInstantiation>(relation_direction);
-				RelationType relation_type = std::visit(overloaded{
-					[](OnInstantiation op)->RelationType {if (!bool(op.rt)) throw std::runtime_error("rel not set in OnInstantiation used in 'subscribe'"); return *op.rt; },
-					[](OnTermination op)->RelationType {if (!bool(op.rt)) throw std::runtime_error("rel not set in OnTermination used in 'subscribe'"); return *op.rt; },
-
-					[](auto x)->RelationType { return RT._unspecified; } // never reached, bute required to compile
-					}, relation_direction);
-
-				TagString callback_list_key{"CallbackList." + to_str(internals::make_hash(EZefRef(z), relation_type, is_out_relation, is_instantiation))};
-
-				ZefRef callback_list_ent = g_observables.contains(callback_list_key) ? (g_observables[callback_list_key] | now) : [&]()->ZefRef {   // get the callback node if it already exists and is found by the unique has. else create it
-					TagString ins_or_term_tagname{is_instantiation ? "MonitoredRelInstantiations" : "MonitoredRelTerminations"};
-					auto proxy = get_latest_or_create_and_get(ins_or_term_tagname, ET.Proxy, g_observables);
-
-
-					auto get_or_create_monitored_rel_list_entity = [&g_observables, &proxy, &ins_or_term_tagname](RelationType rt, bool is_out_rel)->ZefRef {
-						auto candidates = is_out_rel ? proxy >> L[rt] : proxy << L[rt];
-						if (length(candidates) == 1)
-							return candidates | first;
-						if (is_out_rel) {
-							ZefRef zz = instantiate(ET.MonitoredRelationList, g_observables);
-							tag(zz, ins_or_term_tagname.s+"."+str(rt)+".Out");
-							instantiate(
-								proxy,
-								rt,
-								zz,
-								g_observables
-							);
-							return zz;
-						}
-						else {
-							ZefRef zz = instantiate(ET.MonitoredRelationList, g_observables);
-							tag(zz, ins_or_term_tagname.s + "." + str(rt) + ".In");
-							instantiate(
-								zz,
-								rt,
-								proxy,
-								g_observables
-							);
-							return zz;
-						}
-					};
-
-					ZefRef monitored_rel_list_entity = std::visit(overloaded{
-						[&g_observables, &get_or_create_monitored_rel_list_entity](OnInstantiation op)->ZefRef { return get_or_create_monitored_rel_list_entity(*op.rt, op.is_outgoing); },
-						[&g_observables, &get_or_create_monitored_rel_list_entity](OnTermination op)->ZefRef { return get_or_create_monitored_rel_list_entity(*op.rt, op.is_outgoing); },
-						[&g_observables](auto x)->ZefRef { return g_observables[42] | now; } // never reached
-						}, relation_direction);
-
-					// we do not need to look for the 'the callback_list_ent', this does definitely not exist (we would have found it from the composite_hash in the dict otherwise)
-					ZefRef new_callback_list = instantiate(ET.CallbackList, g_observables);
-					tag(new_callback_list, callback_list_key);   // in addition to the uid, tag this witht he special composite hash
-					instantiate(monitored_rel_list_entity, RT.ListElement, new_callback_list, g_observables);
-					return new_callback_list;
-				}();
-
-
-				BaseUID subscription_uid = make_random_uid();
-				ZefRef z_subs = instantiate(
-					callback_list_ent,
-					RT.ListElement,
-					instantiate(ET.Subscription, g_observables, subscription_uid),   // specify the uid to be shared with the dict
-					g_observables
-				);
-				// the uid on the graph is the dict key, so we can match up in both directions
-				callbacks_and_refcount[subscription_uid] = ZefObservables::DictElement{
-					*callback_fct,		// if we're here, we know this is set
-					1, // The base Subscription ctor doesn't register a ref count, so we must do it here ourselves.
-                    _keep_alive.value
-				};
-				return Subscription( obs, subscription_uid );
-			}		
-		}		
+		BaseUID subscription_uid = make_random_uid();
+		// the uid is the key into the dispatch tables as well as this dict, so we can match up in both directions
+		(*obs).callbacks_and_refcount[subscription_uid] = ZefObservables::DictElement{
+			*callback_fct,		// if we're here, we know this is set
+			1, // The base Subscription ctor doesn't register a ref count, so we must do it here ourselves.
+			_keep_alive.value
+		};
+		(*obs).add_to_dispatch(subscription_uid, key);
+		return Subscription( obs, subscription_uid );
 	}
 
 
@@ -1714,31 +1624,17 @@ namespace zefDB {
 		auto g_to_register_callback = Graph(z);
 		auto& obs = g_to_register_callback.my_graph_data().observables;
 		if (!bool(obs))
-			// obs.emplace(); // init if this is empty (allows fast check when tx closes)
             obs = std::make_shared<ZefObservables>(); // init if this is empty (allows fast check when tx closes)
 
-		auto& g_observables = *(*obs).g_observables;  // deref twice: for optional<ZefObservables> and unique_ptr
-		auto& callbacks_and_refcount = (*obs).callbacks_and_refcount;
-		{
-			auto keep_open_tx = Transaction(g_observables);
-			if (!g_observables.contains("GraphSubscriptions"))
-				tag(instantiate(ET.GraphSubscriptions, g_observables), "GraphSubscriptions");
-
-			BaseUID subscription_uid = make_random_uid();
-			instantiate(
-                        g_observables[TagString("GraphSubscriptions")] | now,
-                        RT.ListElement,
-                        instantiate(ET.Subscription, g_observables, subscription_uid),
-                        g_observables
-			);
-			// the uid on the graph is the dict key, so we can match up in both directions
-			callbacks_and_refcount[subscription_uid] = ZefObservables::DictElement{
-				*callback_fct,		// if we're here, we know this is set
-                1, // The base Subscription ctor doesn't register a ref count, so we must do it here ourselves.
-                _keep_alive.value
-            };
-			return Subscription(obs, subscription_uid);
-		}
+		BaseUID subscription_uid = make_random_uid();
+		// the uid is the key into the dispatch tables as well as this dict, so we can match up in both directions
+		(*obs).callbacks_and_refcount[subscription_uid] = ZefObservables::DictElement{
+			*callback_fct,		// if we're here, we know this is set
+			1, // The base Subscription ctor doesn't register a ref count, so we must do it here ourselves.
+			_keep_alive.value
+		};
+		(*obs).add_to_dispatch(subscription_uid, std::monostate{});
+		return Subscription(obs, subscription_uid);
 	}
 	
 
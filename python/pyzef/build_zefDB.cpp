@@ -118,9 +118,6 @@ PYBIND11_MODULE(pyzef, toplevel_module) {
             auto c_void_p = ctypes.attr("c_void_p");
             return c_void_p(self.mem_pool);
         })
-		.def_property_readonly("subscription_graph", [](const Graph& self)->std::optional<Graph> {
-			return bool(self.my_graph_data().observables) ? std::optional<Graph>(*(*self.my_graph_data().observables).g_observables) : std::optional<Graph>({}) ;
-		})
 		;
 
     py::class_<zefDB::GraphRef>(main_module, "GraphRef", py::buffer_protocol())
@@ -651,6 +648,7 @@ PYBIND11_MODULE(pyzef, toplevel_module) {
 	verification_submodule.def("verify_chronological_instantiation_order", verification::verify_chronological_instantiation_order, "Check that RAEs and delegates have a correct chronological instantiation order.");
 	verification_submodule.def("break_graph", verification::break_graph, "Internal use checks");
 	verification_submodule.def("verify_graph", verification::verify_graph, "Internal use checks", py::call_guard<py::gil_scoped_release>());
+	verification_submodule.def("verify_graph_parallel", verification::verify_graph_parallel, "Run the double linking and chronological order checks on a thread pool. progress is called with (partitions done, total partitions).", "g"_a, "num_threads"_a=0, "progress"_a=nullptr, py::call_guard<py::gil_scoped_release>());
 
 	admins_submodule.def("add_user", [](std::string username, std::string key) { zefDB::user_management("add_user", username, "", key);});
 	admins_submodule.def("reset_user_key", [](std::string username, std::string key) { zefDB::user_management("reset_user_key", username, "", key);});
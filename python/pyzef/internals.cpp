@@ -533,7 +533,7 @@ void fill_internals_module(py::module_ & internals_submodule) {
         return new Graph((GraphData*)value, false);
     });
 
-    internals_submodule.def("create_partial_graph", &create_partial_graph, py::call_guard<py::gil_scoped_release>(), "This is a low-level graph creation function. Do not use if you don't know what you are doing.");
+    internals_submodule.def("create_partial_graph", &create_partial_graph, py::call_guard<py::gil_scoped_release>(), "This is a low-level graph creation function. Do not use if you don't know what you are doing.", py::arg("gd"), py::arg("index_hi"), py::arg("rebuild_caches") = false);
     internals_submodule.def("partial_hash", &partial_hash, py::call_guard<py::gil_scoped_release>(), "This is a low-level graph creation function. Do not use if you don't know what you are doing.", py::arg("g"), py::arg("index_hi"), py::arg("seed") = 0, py::arg("working_layout")="");
 
     internals_submodule.def("list_graph_manager_uids", []() { auto butler = Butler::get_butler(); return butler->list_graph_manager_uids(); }, "This is a low-level function. Do not use if you don't know what you are doing.");
@@ -686,7 +686,6 @@ void fill_internals_module(py::module_ & internals_submodule) {
 
 	
 	py::class_<zefDB::Subscription>(internals_submodule, "Subscription", py::buffer_protocol())
-		.def_property_readonly("subscription_graph", [](const Subscription& self) {return *(self.zef_observables_ptr.lock()->g_observables); })  // if the Subscription object exists, the 'self.zef_observables_ptr' was definitely created
 		// .def_property_readonly("callbacks_and_refcount", [](const Subscription& self) {return self.zef_observables_ptr->callbacks_and_refcount; })
 		.def_readonly("uid", &Subscription::uid)
 		.def("__repr__", [](const Subscription& self) { return to_str(self); })
@@ -752,6 +751,69 @@ void fill_internals_module(py::module_ & internals_submodule) {
 	internals_submodule.def("merge_atomic_entity_", &zefDB::internals::merge_atomic_entity_,  "A low level function to merge an atomic entity (given type and origin uid) into a graph.", py::call_guard<py::gil_scoped_release>());
 	internals_submodule.def("merge_relation_", &zefDB::internals::merge_relation_,  "A low level function to merge an relation (given type and origin uid) into a graph.", py::call_guard<py::gil_scoped_release>());
 
+	internals_submodule.def("apply_bulk_commands", [](const Graph & g, py::list commands) {
+        // Commands are tuples of the form:
+        //   ("e", ET), ("a", AET), ("r", RT, src, trg) or ("v", ae, value)
+        // where src/trg/ae are either an index into this batch or an existing (E)ZefRef.
+        auto to_ref = [](py::handle h) -> BulkCommand::ref_t {
+            if (py::isinstance<py::int_>(h))
+                return py::cast<int>(h);
+            if (py::isinstance<ZefRef>(h))
+                return py::cast<ZefRef>(h).blob_uzr;
+            return py::cast<EZefRef>(h);
+        };
+        auto to_value = [](py::handle h) -> value_variant_t {
+            // Dispatch the python scalars explicitly: the variant caster would
+            // happily turn e.g. an int into a bool.
+            if (py::isinstance<py::bool_>(h))
+                return py::cast<bool>(h);
+            if (py::isinstance<py::int_>(h)) {
+                long long x = py::cast<long long>(h);
+                if(x > std::numeric_limits<int>::max() || x < std::numeric_limits<int>::lowest())
+                    throw std::runtime_error("Can't assign integer, bigger than a C int32.");
+                return (int)x;
+            }
+            if (py::isinstance<py::float_>(h))
+                return py::cast<double>(h);
+            if (py::isinstance<py::str>(h))
+                return py::cast<std::string>(h);
+            return py::cast<value_variant_t>(h);
+        };
+
+        std::vector<BulkCommand> cmds;
+        cmds.reserve(commands.size());
+        for (auto item : commands) {
+            auto t = item.cast<py::tuple>();
+            auto kind = t[0].cast<std::string>();
+            BulkCommand cmd;
+            if (kind == "e") {
+                cmd.kind = BulkCommand::Kind::instantiate_entity;
+                cmd.rae_type = t[1].cast<EntityType>();
+            } else if (kind == "a") {
+                cmd.kind = BulkCommand::Kind::instantiate_atomic_entity;
+                cmd.rae_type = t[1].cast<AttributeEntityType>();
+            } else if (kind == "r") {
+                cmd.kind = BulkCommand::Kind::instantiate_relation;
+                cmd.rae_type = t[1].cast<RelationType>();
+                cmd.source = to_ref(t[2]);
+                cmd.target = to_ref(t[3]);
+            } else if (kind == "v") {
+                cmd.kind = BulkCommand::Kind::assign_value;
+                cmd.source = to_ref(t[1]);
+                cmd.value = to_value(t[2]);
+            } else
+                throw std::runtime_error("Unknown bulk command kind: " + kind);
+            cmds.push_back(std::move(cmd));
+        }
+
+        std::vector<ZefRef> res;
+        {
+            py::gil_scoped_release release;
+            res = apply_bulk_commands(g, cmds);
+        }
+        return res;
+    }, "A low level function to apply a batch of instantiate/assign commands in one transaction. Returns one ZefRef per command.", "g"_a, "commands"_a);
+
 	
 	internals_submodule.def("get_latest_complete_tx_node", &internals::get_latest_complete_tx_node, "graph"_a, "index_of_latest_complete_tx_node_hint"_a=0,  "give it a hint as an index, otherwise it will start traversing from the root onwards", py::call_guard<py::gil_scoped_release>());
 
@@ -806,6 +868,9 @@ void fill_internals_module(py::module_ & internals_submodule) {
 
 
 	internals_submodule.def("pageout", zefDB::pageout, "Request the graph data is pushed to disk.", "g"_a);
+	internals_submodule.def("set_filegraph_memory_budget", &MMap::set_page_budget, "Memory budget in bytes for the loaded pages of all file-backed graphs together (0 for unlimited). Cold pages beyond it are dropped and read back from disk when needed.", "budget_bytes"_a);
+	internals_submodule.def("get_filegraph_memory_budget", &MMap::get_page_budget, "See set_filegraph_memory_budget.");
+	internals_submodule.def("filegraph_loaded_bytes", []() { return MMap::loaded_filegraph_pages() * MMap::ZEF_PAGE_SIZE; }, "Bytes of the pages of all file-backed graphs currently in memory. See set_filegraph_memory_budget.");
 //	internals_submodule.def("memory_details", [](Graph & g) {
 //        auto & info = MMap::info_from_blob(&g.my_graph_data());
 //        return report_sizes(info);
@@ -826,16 +891,19 @@ void fill_internals_module(py::module_ & internals_submodule) {
         py::call_guard<py::gil_scoped_release>());
 
     // Message encoding/decoding, exposed for ZefHub
-    internals_submodule.def("prepare_ZH_message", [](const py::dict & d, const std::vector<std::string> & list) {
+    // The optional dictionary is the raw (trained) dictionary, for testing
+    // messages to and from a connection using it.
+    internals_submodule.def("prepare_ZH_message", [](const py::dict & d, const std::vector<std::string> & list, const std::string & dictionary) {
         json j = d;
         std::string s;
         {
             py::gil_scoped_release release;
-            s = Communication::prepare_ZH_message(j, list);
+            auto dict = load_zstd_dictionary(dictionary);
+            s = Communication::prepare_ZH_message(j, list, dict.get());
         }
         return py::bytes(s);
-    });
-    internals_submodule.def("prepare_ZH_message", [](const std::string & j_s, const std::vector<std::string> & list) {
+    }, py::arg("main_json"), py::arg("rest"), py::arg("dictionary")="");
+    internals_submodule.def("prepare_ZH_message", [](const std::string & j_s, const std::vector<std::string> & list, const std::string & dictionary) {
         json j = json::parse(j_s);
         if(!j.is_object())
             throw std::runtime_error("When passing json as a string, need it to parse into an object.");
@@ -843,12 +911,14 @@ void fill_internals_module(py::module_ & internals_submodule) {
         std::string s;
         {
             py::gil_scoped_release release;
-            s = Communication::prepare_ZH_message(j, list);
+            auto dict = load_zstd_dictionary(dictionary);
+            s = Communication::prepare_ZH_message(j, list, dict.get());
         }
         return py::bytes(s);
-    });
-    internals_submodule.def("parse_ZH_message", [](const std::string & s) {
-        auto tup = Communication::parse_ZH_message(s);
+    }, py::arg("main_json"), py::arg("rest"), py::arg("dictionary")="");
+    internals_submodule.def("parse_ZH_message", [](const std::string & s, const std::string & dictionary) {
+        auto dict = load_zstd_dictionary(dictionary);
+        auto tup = Communication::parse_ZH_message(s, dict.get());
         auto v_in = std::get<1>(tup);
         std::vector<py::bytes> v;
         {
@@ -857,7 +927,7 @@ void fill_internals_module(py::module_ & internals_submodule) {
                            [](auto & x) { return py::bytes(x); });
             return std::make_tuple(std::get<0>(tup), v);
         }
-    },  py::call_guard<py::gil_scoped_release>());
+    }, py::arg("message"), py::arg("dictionary")="", py::call_guard<py::gil_scoped_release>());
 
     internals_submodule.def("register_merge_handler", &internals::register_merge_handler);
     internals_submodule.add_object("_cleanup_merge_handler", py::capsule(&internals::remove_merge_handler));
@@ -871,7 +941,22 @@ void fill_internals_module(py::module_ & internals_submodule) {
     internals_submodule.def("register_determine_primitive_type", &internals::register_determine_primitive_type);
     internals_submodule.add_object("_cleanup_determine_primitive_type", py::capsule(&internals::remove_determine_primitive_type));
 
-    internals_submodule.def("copy_graph_slice", &copy_graph_slice, py::call_guard<py::gil_scoped_release>());
+    internals_submodule.def("copy_graph_slice", [](EZefRef ctx,
+                                                   std::vector<EntityType> entity_types,
+                                                   std::vector<AttributeEntityType> atomic_entity_types,
+                                                   std::vector<RelationType> relation_types,
+                                                   std::optional<Time> instantiated_from,
+                                                   std::optional<Time> instantiated_until) {
+        return copy_graph_slice(ctx, CopyGraphSliceFilter{entity_types, atomic_entity_types, relation_types, instantiated_from, instantiated_until});
+    },
+        "Copy the RAEs alive in the graph slice of the tx ctx into a new graph, optionally only those of the given types and/or instantiated in [instantiated_from, instantiated_until).",
+        py::arg("ctx"),
+        py::arg("entity_types") = std::vector<EntityType>{},
+        py::arg("atomic_entity_types") = std::vector<AttributeEntityType>{},
+        py::arg("relation_types") = std::vector<RelationType>{},
+        py::arg("instantiated_from") = std::nullopt,
+        py::arg("instantiated_until") = std::nullopt,
+        py::call_guard<py::gil_scoped_release>());
 
     // internals_submodule.def("decompress_zstd", &decompress_zstd, py::call_guard<py::gil_scoped_release>());
     internals_submodule.def("decompress_zstd", [](const std::string & input) {
@@ -881,4 +966,15 @@ void fill_internals_module(py::module_ & internals_submodule) {
     internals_submodule.def("compress_zstd", [](const std::string & input, int compression_level) {
         return py::bytes(compress_zstd(input, compression_level));
     }, py::arg("input"), py::arg("compression_level")=10, py::call_guard<py::gil_scoped_release>());
+    internals_submodule.def("set_upstream_zstd_dictionary", [](const std::string & dictionary, int compression_level) {
+        Butler::get_butler()->network.set_zstd_dictionary(dictionary, compression_level);
+    }, "Set the dictionary used for the messages to and from upstream. Pass an empty string to disable it. Upstream has to use the same dictionary.", py::arg("dictionary"), py::arg("compression_level")=10, py::call_guard<py::gil_scoped_release>());
+    internals_submodule.def("train_zstd_dictionary", [](const std::vector<std::string> & samples, size_t max_size) {
+        std::string dictionary;
+        {
+            py::gil_scoped_release release;
+            dictionary = train_zstd_dictionary(samples, max_size);
+        }
+        return py::bytes(dictionary);
+    }, py::arg("samples"), py::arg("max_size")=16*1024);
 }
@@ -14,6 +14,78 @@
 
 #include "common.h"
 
+#include <pybind11/numpy.h>
+#include <cmath>
+
+namespace {
+    using namespace zefDB;
+
+    // A numpy masked array of the values, with the dtype picked from the
+    // types of the values present: bool, int64, float64 (for floats mixed
+    // with ints, or no values at all), datetime64[us] for Time and object
+    // otherwise. The mask is set for missing values.
+    py::object values_to_masked_array(const std::vector<imperative::value_ret_t> & values) {
+        py::module_ np = py::module_::import("numpy");
+        size_t n = values.size();
+
+        py::array_t<bool> mask(n);
+        auto m = mask.mutable_unchecked<1>();
+        bool all_bool = true, all_int = true, all_numeric = true, all_time = true, any = false;
+        for(size_t i = 0 ; i < n ; i++) {
+            m(i) = !values[i];
+            if(!values[i])
+                continue;
+            any = true;
+            std::visit([&](auto & x) {
+                using T = std::decay_t<decltype(x)>;
+                all_bool &= std::is_same_v<T, bool>;
+                all_int &= std::is_same_v<T, int>;
+                all_numeric &= std::is_same_v<T, int> || std::is_same_v<T, double>;
+                all_time &= std::is_same_v<T, Time>;
+            }, *values[i]);
+        }
+
+        py::object data;
+        if(any && all_bool) {
+            py::array_t<bool> arr(n);
+            auto a = arr.mutable_unchecked<1>();
+            for(size_t i = 0 ; i < n ; i++)
+                a(i) = values[i] ? std::get<bool>(*values[i]) : false;
+            data = arr;
+        } else if(any && all_int) {
+            py::array_t<int64_t> arr(n);
+            auto a = arr.mutable_unchecked<1>();
+            for(size_t i = 0 ; i < n ; i++)
+                a(i) = values[i] ? std::get<int>(*values[i]) : 0;
+            data = arr;
+        } else if(!any || all_numeric) {
+            py::array_t<double> arr(n);
+            auto a = arr.mutable_unchecked<1>();
+            for(size_t i = 0 ; i < n ; i++) {
+                if(!values[i])
+                    a(i) = std::nan("");
+                else if(std::holds_alternative<int>(*values[i]))
+                    a(i) = std::get<int>(*values[i]);
+                else
+                    a(i) = std::get<double>(*values[i]);
+            }
+            data = arr;
+        } else if(all_time) {
+            py::array_t<int64_t> arr(n);
+            auto a = arr.mutable_unchecked<1>();
+            for(size_t i = 0 ; i < n ; i++)
+                a(i) = values[i] ? std::llround(std::get<Time>(*values[i]).seconds_since_1970 * 1e6) : 0;
+            data = arr.attr("view")("datetime64[us]");
+        } else {
+            py::list l(n);
+            for(size_t i = 0 ; i < n ; i++)
+                l[i] = values[i] ? py::cast(*values[i]) : py::none();
+            data = np.attr("array")(l, "dtype"_a="object");
+        }
+        return np.attr("ma").attr("MaskedArray")(data, "mask"_a=mask);
+    }
+}
+
 void create_zefops_module(py::module_ & m, py::module_ & internals_submodule) {
     // py::module zefops_submodule = toplevel_module.def_submodule("zefops", "operators to be used in conjunction with (U)ZefRef(s)(s)");  //create submodule
     py::module_ zefops_submodule = m.def_submodule("zefops", "operators to be used in conjunction with (U)ZefRef(s)(s)");  //create submodule
@@ -1460,13 +1532,29 @@ void create_zefops_module(py::module_ & m, py::module_ & internals_submodule) {
 #undef REPEAT
 
 
+    zefops_submodule.def("field_columns_impl", [](EZefRef tx, EntityType et, std::vector<RelationType> rts) {
+            std::vector<std::vector<imperative::value_ret_t>> columns;
+            {
+                py::gil_scoped_release release;
+                columns = imperative::field_values(Instances::pure(tx, et), rts);
+            }
+            std::vector<py::object> res;
+            for(auto & column : columns)
+                res.push_back(values_to_masked_array(column));
+            return res;
+        },
+        "Values of the fields rts of all instances of et in the graph slice of tx, as one numpy masked array per field.");
+
+    zefops_submodule.def("instances_with_field_value_impl", &imperative::instances_with_field_value,
+                         py::call_guard<py::gil_scoped_release>(),
+                         "The instances of et in the graph slice of tx whose rt relation points to the value val, found through the field value index.");
+
     zefops_submodule.def("select_by_field_impl", [](std::vector<ZefRef> zrs, RelationType rt, value_variant_t val) -> std::optional<ZefRef> {
             // This is just to avoid creating a ZefRefs without a tx.
             if(zrs.size() == 0)
                 return {};
-            
-            ZefRefs opts{0, zrs[0].tx};
-            opts = zrs | filter[( [&rt,&val](ZefRef z) -> bool {
+
+            auto matches = [&rt,&val](ZefRef z) -> bool {
                 auto maybe_field = z >> O[rt];
                 if(!maybe_field)
                     return false;
@@ -1483,7 +1571,49 @@ void create_zefops_module(py::module_ & m, py::module_ & internals_submodule) {
                         return false;
                 },
                     *val_contained, val);
-            })];
+            };
+
+            // For instances of a single entity type in one slice, ask the
+            // field value index and only check the entities it returns. The
+            // first lookup of a field builds its index from the whole graph,
+            // and the index is kept from then on. So only build it when zrs
+            // makes up a good part of the live instances of the type;
+            // otherwise checking zrs directly is cheaper.
+            constexpr size_t min_zrs_for_index = 64;
+            constexpr size_t max_instances_per_zr = 4;
+            EZefRef tx = zrs[0].tx;
+            bool use_index = is_zef_subtype(zrs[0].blob_uzr, BT.ENTITY_NODE);
+            if(use_index) {
+                EntityType et = ET(zrs[0].blob_uzr);
+                for(auto & z : zrs) {
+                    if(z.tx != tx || !is_zef_subtype(z.blob_uzr, et)) {
+                        use_index = false;
+                        break;
+                    }
+                }
+                if(use_index && !internals::has_field_value_index(*graph_data(tx), et, rt)) {
+                    use_index = zrs.size() >= min_zrs_for_index
+                        && internals::instance_candidates(imperative::delegate(zrs[0].blob_uzr) < BT.TO_DELEGATE_EDGE,
+                                                          get<blobs_ns::TX_EVENT_NODE>(tx).time_slice).size() <= zrs.size() * max_instances_per_zr;
+                }
+                if(use_index) {
+                    std::unordered_set<blob_index> in_zrs;
+                    for(auto & z : zrs)
+                        in_zrs.insert(index(z.blob_uzr));
+                    std::optional<ZefRef> res;
+                    for(ZefRef z : imperative::instances_with_field_value(tx, et, rt, val)) {
+                        if(in_zrs.count(index(z.blob_uzr)) == 0 || !matches(z))
+                            continue;
+                        if(res)
+                            throw std::runtime_error("More than one option");
+                        res = z;
+                    }
+                    return res;
+                }
+            }
+            
+            ZefRefs opts{0, zrs[0].tx};
+            opts = zrs | filter[matches];
 
             if(length(opts) == 1)
                 return only(opts);
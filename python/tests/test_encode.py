@@ -34,6 +34,24 @@ class MyTestCase(unittest.TestCase):
         import json
         ret_data = ({"tuples": [1,2,3]}, [])
         self.assertEqual(ret_data, parse_ZH_message(prepare_ZH_message(json.dumps(data[0]), data[1])))
+
+    def test_zstd_dictionary(self):
+        from zef.pyzef.internals import prepare_ZH_message, parse_ZH_message, train_zstd_dictionary
+        samples = [f'{{"msg_type": "graph_update", "index": {i}, "hash": {i*7919}}}'.encode() for i in range(2000)]
+        dictionary = train_zstd_dictionary(samples, 4096)
+
+        data = ({"msg_type": "graph_update", "index": 5, "hash": 5*7919}, [])
+        plain = prepare_ZH_message(*data)
+        with_dict = prepare_ZH_message(*data, dictionary=dictionary)
+        self.assertLess(len(with_dict), len(plain))
+        self.assertEqual(data, parse_ZH_message(with_dict, dictionary=dictionary))
+        # Frames without a dictionary are still understood
+        self.assertEqual(data, parse_ZH_message(plain, dictionary=dictionary))
+        with self.assertRaises(RuntimeError):
+            parse_ZH_message(with_dict)
+
+        # Using a dictionary for one message leaves the others without
+        self.assertEqual(plain, prepare_ZH_message(*data))
                 
 
 
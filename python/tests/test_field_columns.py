@@ -0,0 +1,50 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+from zef import *
+from zef.ops import *
+
+
+class MyTestCase(unittest.TestCase):
+    def test_field_columns(self):
+        g = Graph()
+
+        s1 = ET.Sensor | g | run
+        s2 = ET.Sensor | g | run
+        s3 = ET.Sensor | g | run
+        [s1 | set_field[RT.Reading][1.5] | collect,
+         s1 | set_field[RT.Count][3] | collect,
+         s1 | set_field[RT.Name]["first"] | collect,
+         s2 | set_field[RT.Reading][2] | collect,
+         s3 | set_field[RT.Count][4] | collect,
+         s3 | set_field[RT.Name]["third"] | collect,
+         ] | transact[g] | run
+
+        gs = g | now | collect
+        cols = gs | field_columns[ET.Sensor][[RT.Reading, RT.Count, RT.Name, RT.Missing]] | collect
+        sensors = gs | all[ET.Sensor] | collect
+
+        for rt in [RT.Reading, RT.Count, RT.Name, RT.Missing]:
+            expected = [z | Out[rt] | value | collect if length(z | out_rels[rt]) > 0 else None for z in sensors]
+            self.assertEqual(cols[rt].tolist(), expected)
+
+        self.assertEqual(cols[RT.Reading].dtype.kind, "f")
+        self.assertEqual(cols[RT.Count].dtype.kind, "i")
+        self.assertEqual(cols[RT.Name].dtype.kind, "O")
+        self.assertTrue(cols[RT.Missing].mask.all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+import os
+import sys
+import tempfile
+from zef import *
+from zef.ops import *
+import zef
+
+MB = 1024*1024
+
+@unittest.skipIf(sys.platform == "win32", "The file graph memory budget is not supported on windows")
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.old_path = os.environ.get("ZEFDB_FILEGRAPH_PATH", None)
+        os.environ["ZEFDB_FILEGRAPH_PATH"] = self.dir.name
+        self.old_budget = zef.pyzef.internals.get_filegraph_memory_budget()
+
+    def tearDown(self):
+        zef.pyzef.internals.set_filegraph_memory_budget(self.old_budget)
+        if self.old_path is None:
+            del os.environ["ZEFDB_FILEGRAPH_PATH"]
+        else:
+            os.environ["ZEFDB_FILEGRAPH_PATH"] = self.old_path
+        self.dir.cleanup()
+
+    def test_loaded_pages_stay_under_budget(self):
+        internals = zef.pyzef.internals
+        g = Graph(mem_style=internals.MMAP_STYLE_FILE_BACKED)
+        uids = []
+        for i in range(20):
+            rs = [(ET.Machine, RT.Num, i*5000 + j) for j in range(5000)] | g | run
+            uids += [uid(z) for z,_,_ in rs[::997]]
+
+        budget = 8*MB
+        self.assertGreater(internals.filegraph_loaded_bytes(), budget)
+        internals.set_filegraph_memory_budget(budget)
+        self.assertLessEqual(internals.filegraph_loaded_bytes(), budget)
+
+        # Evicted pages are read back from the file and counted again
+        nums = [g[x] | now | Out[RT.Num] | value | collect for x in uids]
+        self.assertEqual(nums, sorted(nums))
+        self.assertEqual(len(set(nums)), len(uids))
+        self.assertLessEqual(internals.filegraph_loaded_bytes(), budget)
+
+        [(ET.Machine, RT.Num, -1)]*5000 | g | run
+        self.assertLessEqual(internals.filegraph_loaded_bytes(), budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
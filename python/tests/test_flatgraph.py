@@ -168,5 +168,60 @@ class MyTestCase(unittest.TestCase):
         merge(fg, fg2)
 
 
+    def test_traversal_and_insert_keeps_original(self):
+        fg = FlatGraph([
+            ET.Person['p1'],
+            (Any['p1'], RT.Name, "Fred"),
+            (Any['p1'], RT.Friend, ET.Person['p2']),
+            (Any['p1'], RT.Friend, ET.Person['p3']),
+        ])
+        p1 = fg['p1']
+        self.assertEqual(p1 | Out[RT.Name] | value | collect, "Fred")
+        self.assertEqual(p1 | Outs[RT.Friend] | length | collect, 2)
+        self.assertEqual((fg['p2'] | In[RT.Friend] | collect).idx, p1.idx)
+
+        fg2 = fg | insert[(Any['p1'], RT.Friend, ET.Person['p4'])] | collect
+        self.assertEqual(fg2['p1'] | Outs[RT.Friend] | length | collect, 3)
+        self.assertEqual(p1 | Outs[RT.Friend] | length | collect, 2)
+
+    def test_builder_and_merging_lists(self):
+        fg = FlatGraph([ET.Person['p1']])
+        builder = fg.transient()
+        for i in range(10):
+            builder.insert((Any['p1'], RT.Friend, ET.Person))
+        fg2 = builder.freeze()
+        builder.insert((Any['p1'], RT.Name, "Fred"))
+        fg3 = builder.freeze()
+        self.assertEqual(length(fg.blobs), 1)
+        self.assertEqual(fg2['p1'] | Outs[RT.Friend] | length | collect, 10)
+        self.assertEqual(fg2['p1'] | Outs[RT.Name] | length | collect, 0)
+        self.assertEqual(fg3['p1'] | Out[RT.Name] | value | collect, "Fred")
+
+        fgs = [FlatGraph([(ET.Cat, RT.Name, Val(f"cat{i}"))]) for i in range(3)]
+        merged = merge(fgs)
+        self.assertEqual(merged | all[ET.Cat] | length | collect, 3)
+        self.assertEqual(length(merged.blobs), 9)
+
+    def test_type_and_relation_indexes(self):
+        fg = FlatGraph([
+            ET.Person['p1'],
+            (Any['p1'], RT.Owns, ET.Cat['c1']),
+            (Any['p1'], RT.Owns, ET.Dog),
+            (Any['p1'], RT.Name, "Fred"),
+            (ET.Person['p2'], RT.Owns, Any['c1']),
+        ])
+        self.assertEqual(fg | all[ET.Person] | length | collect, 2)
+        self.assertEqual(fg | all[ET.Dog] | length | collect, 1)
+        self.assertEqual(fg | all[RT.Owns] | length | collect, 3)
+        self.assertEqual(fg['p1'] | Outs[RT.Owns] | length | collect, 2)
+        self.assertEqual(fg['c1'] | Ins[RT.Owns] | length | collect, 2)
+
+        # The indexes are kept up to date through inserts
+        fg2 = fg | insert[(Any['p2'], RT.Owns, ET.Cat)] | collect
+        self.assertEqual(fg2 | all[ET.Cat] | length | collect, 2)
+        self.assertEqual(fg2['p2'] | Outs[RT.Owns] | length | collect, 2)
+        self.assertEqual(fg['p2'] | Outs[RT.Owns] | length | collect, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -267,9 +267,125 @@ class MyTestCase(unittest.TestCase):
 
         self.assertIsNot(internals.search_value_node(value(f), g2), None)
         self.assertIsNot(internals.search_value_node(internals.SerializedValue.serialize(value(v)), g2), None)
-            
-        
-            
+
+    def test_bulk_apply_matches_individual(self):
+        import zef.core.graph_delta as gd_module
+
+        def ingest():
+            g = Graph()
+            r = [
+                *[{ET.Sensor[f"s{i}"]: {RT.Reading: i*0.5, RT.Label: f"sensor {i}", RT.Active: i%2 == 0}}
+                  for i in range(50)],
+                *[(Z[f"s{i}"], RT.Next, Z[f"s{i+1}"]) for i in range(49)],
+            ] | transact[g] | run
+            return g, r
+
+        g_bulk, r_bulk = ingest()
+        try:
+            gd_module.gd_no_bulk_apply = True
+            g_single, r_single = ingest()
+        finally:
+            gd_module.gd_no_bulk_apply = False
+
+        for g,r in [(g_bulk, r_bulk), (g_single, r_single)]:
+            self.assertEqual(g | now | all[ET.Sensor] | length | collect, 50)
+            self.assertEqual(r["s3"] | Out[RT.Reading] | value | collect, 1.5)
+            self.assertEqual(r["s3"] | Out[RT.Label] | value | collect, "sensor 3")
+            self.assertEqual(r["s3"] | Out[RT.Active] | value | collect, False)
+            self.assertEqual(r["s3"] | Out[RT.Next] | collect, r["s4"])
+
+    def test_bulk_apply_same_number_is_not_reassigned(self):
+        import zef.core.graph_delta as gd_module
+
+        def n_assignments(g):
+            return g | all[BT.ATOMIC_VALUE_ASSIGNMENT_EDGE] | length | collect
+
+        bulk_batches = []
+        apply_bulk_commands = gd_module.internals.apply_bulk_commands
+        def recording_apply_bulk_commands(g, ops):
+            bulk_batches.append(ops)
+            return apply_bulk_commands(g, ops)
+
+        for no_bulk_apply in [False, True]:
+            try:
+                gd_module.gd_no_bulk_apply = no_bulk_apply
+                gd_module.internals.apply_bulk_commands = recording_apply_bulk_commands
+                bulk_batches.clear()
+                g = Graph()
+                # 2 == 2.0, so both are the same assignment
+                r = [AET.Float["x"], Z["x"] <= 2.0, Z["x"] <= 2] | transact[g] | run
+                self.assertEqual(len(bulk_batches) > 0, not no_bulk_apply)
+                self.assertEqual(n_assignments(g), 1)
+                self.assertEqual(r["x"] | value | collect, 2.0)
+            finally:
+                gd_module.gd_no_bulk_apply = False
+                gd_module.internals.apply_bulk_commands = apply_bulk_commands
+
+        # The GraphDelta only keeps one of the two, so also give both to a
+        # single bulk batch directly.
+        g = Graph()
+        token = internals.get_c_token(AET.Float)
+        internals.apply_bulk_commands(g, [("a", token), ("v", 0, 2.0), ("v", 0, 2), ("v", 0, 2.5)])
+        self.assertEqual(n_assignments(g), 2)
+
+
+    def check_dag_ordering(self, cmds):
+        from zef.core.graph_delta import resolve_dag_ordering, command_dependencies, get_ids
+
+        ordered, unresolved = resolve_dag_ordering(tuple(cmds))
+        self.assertEqual(unresolved, ())
+        self.assertEqual(len(ordered), len(cmds))
+        known = set()
+        for cmd in ordered:
+            for dep in command_dependencies(cmd):
+                self.assertIn(dep, known)
+            known.update(get_ids(cmd))
+        return ordered
+
+    def test_dag_ordering_relations(self):
+        cmds = [
+            {'cmd': 'instantiate', 'rae_type': RT.Likes, 'internal_id': 'r2', 'source': 'r', 'target': 'b'},
+            {'cmd': 'instantiate', 'rae_type': RT.Knows, 'internal_id': 'r', 'source': 'a', 'target': 'b'},
+            {'cmd': 'instantiate', 'rae_type': ET.Person, 'internal_id': 'b'},
+            {'cmd': 'instantiate', 'rae_type': ET.Person, 'internal_id': 'a'},
+        ]
+        ordered = self.check_dag_ordering(cmds)
+        # Commands in the same round keep their input order
+        self.assertEqual([cmd['internal_id'] for cmd in ordered], ['b', 'a', 'r', 'r2'])
+
+    def test_dag_ordering_set_field(self):
+        cmds = [
+            {'cmd': 'set_field', 'source_id': 'x', 'rt': RT.Name, 'incoming': False, 'value': 'bob'},
+            {'cmd': 'instantiate', 'rae_type': ET.Person, 'internal_id': 'x'},
+            {'cmd': 'instantiate', 'rae_type': ET.Person, 'internal_id': 'y'},
+        ]
+        ordered = self.check_dag_ordering(cmds)
+        self.assertEqual(ordered, (cmds[1], cmds[2], cmds[0]))
+
+    def test_dag_ordering_relation_merge(self):
+        g = Graph()
+        a,b,c = (ET.Machine, RT.Something, ET.Machine) | g | run
+
+        def merge(z):
+            return {'cmd': 'merge', 'origin_rae': discard_frame(z), 'internal_ids': []}
+
+        cmds = [merge(b), merge(c), merge(a)]
+        ordered = self.check_dag_ordering(cmds)
+        self.assertEqual(ordered, (cmds[1], cmds[2], cmds[0]))
+
+    def test_dag_ordering_cycle(self):
+        from zef.core.graph_delta import resolve_dag_ordering
+
+        cmds = (
+            {'cmd': 'instantiate', 'rae_type': RT.Loop, 'internal_id': 'r1', 'source': 'r2', 'target': 'a'},
+            {'cmd': 'instantiate', 'rae_type': RT.Loop, 'internal_id': 'r2', 'source': 'r1', 'target': 'a'},
+            {'cmd': 'instantiate', 'rae_type': ET.Person, 'internal_id': 'a'},
+            {'cmd': 'set_field', 'source_id': 'missing', 'rt': RT.Name, 'incoming': False, 'value': 'bob'},
+        )
+        ordered, unresolved = resolve_dag_ordering(cmds)
+        self.assertEqual(ordered, (cmds[2],))
+        self.assertEqual(unresolved, (cmds[0], cmds[1], cmds[3]))
+
 
 if __name__ == '__main__':
     unittest.main()
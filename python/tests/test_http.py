@@ -55,6 +55,53 @@ class MyTestCase(unittest.TestCase):
             "type": FX.HTTP.StopServer,
             "server_uuid": eff_resp["server_uuid"],
         } | run
+    def test_http_server_asyncio(self):
+        from zef.core.fx.http import send_response, middleware_worker, fallback_not_found, route
+        port = 4992
+        eff = {
+            'type': FX.HTTP.StartServer,
+            'port': port,
+            'engine': "asyncio",
+            'workers': 4,
+            'pipe_into': (map[middleware_worker[route["/echo"][lambda query: {**query, "response_body": query["request_body"]}],
+                                                fallback_not_found,
+                                                send_response]]
+                          | subscribe[run]),
+            'bind_address': "localhost",
+            'logging': False,
+        }
+
+        eff_resp = eff | run
+
+        import requests
+        # Several requests over one kept-alive connection
+        with requests.Session() as session:
+            for i in range(5):
+                r = session.post(f"http://localhost:{port}/echo", data=f"payload {i}")
+                self.assertEqual(r.status_code, 200)
+                self.assertEqual(r.content, f"payload {i}".encode())
+
+            r = session.get(f"http://localhost:{port}/missing")
+            self.assertEqual(r.status_code, 404)
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(16) as pool:
+            rs = list(pool.map(lambda i: requests.post(f"http://localhost:{port}/echo", data=str(i)), range(64)))
+        self.assertEqual([r.content for r in rs], [str(i).encode() for i in range(64)])
+
+        batch = {
+            "type": FX.HTTP.RequestBatch,
+            "requests": [{"url": f"http://localhost:{port}/echo", "method": "POST", "data": str(i)} for i in range(64)],
+            "concurrency": 8,
+            "timeout": 10.0,
+        } | run
+        self.assertEqual([r["response_text"] for r in batch["responses"]], [str(i) for i in range(64)])
+
+        {
+            "type": FX.HTTP.StopServer,
+            "server_uuid": eff_resp["server_uuid"],
+        } | run
+
 
 if __name__ == '__main__':
     unittest.main()
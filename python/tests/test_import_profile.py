@@ -0,0 +1,43 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+from zef import *
+from zef.ops import *
+
+
+class MyTestCase(unittest.TestCase):
+    def test_import_profile(self):
+        import zef
+        profile = zef.import_profile()
+        names = [name for name,duration in profile]
+        self.assertTrue(set(names) <= set(zef.import_order))
+        self.assertIn("zef.core", names)
+        self.assertTrue(all(duration >= 0 for name,duration in profile))
+        self.assertEqual([duration for name,duration in profile], sorted([duration for name,duration in profile], reverse=True))
+
+    def test_optional_dependencies_not_imported(self):
+        # Needs a fresh interpreter, as other tests may have pulled these in
+        import subprocess
+        import sys
+        import os
+        code = "import sys; import zef; print('loaded:', [m for m in ['pandas', 'yaml'] if m in sys.modules])"
+        env = dict(os.environ, ZEFDB_PROFILE_IMPORTS="TRUE")
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        self.assertIn("import zef took", out.stdout)
+        self.assertIn("loaded: []", out.stdout.splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -38,6 +38,38 @@ class MyTestCase(unittest.TestCase):
             self.assertEqual(g | now | all[ET] | length | collect, 1)
             self.assertEqual(uid(g), created_uid)
 
+    def test_stream_ndjson(self):
+        import tempfile, json
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "events.ndjson")
+            with open(filepath, "w") as f:
+                for i in range(25):
+                    f.write(json.dumps({"i": i}) + "\n")
+
+            content = filepath | stream_file[10] | run | get["content"] | collect
+            chunks = list(content)
+            self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+            self.assertEqual(chunks[2][-1], {"i": 24})
+
+            # Iterating again reopens the file and sees what is there now
+            with open(filepath, "a") as f:
+                for i in range(25, 30):
+                    f.write(json.dumps({"i": i}) + "\n")
+            self.assertEqual([len(c) for c in content], [10, 10, 10])
+            self.assertEqual(list(content), list(content))
+
+            # Only as much of the file is parsed as is asked for: the broken
+            # line at the end is never reached.
+            with open(filepath, "a") as f:
+                f.write("not json\n")
+            first = next(iter(filepath | stream_file[10] | run | get["content"] | collect))
+            self.assertEqual(first, [{"i": i} for i in range(10)])
+
+            # Running the effect does not open the file
+            missing = os.path.join(tmpdir, "missing.ndjson") | stream_file[10] | run | get["content"] | collect
+            with self.assertRaises(Exception):
+                list(missing)
+
 
 if __name__ == '__main__':
     unittest.main()
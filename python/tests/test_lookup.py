@@ -0,0 +1,73 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+from zef import *
+from zef.ops import *
+
+
+class MyTestCase(unittest.TestCase):
+    def test_lookup(self):
+        g = Graph()
+
+        users = [ET.User | g | run for i in range(100)]
+        [z | set_field[RT.Email][f"user{i}@example.com"] for i,z in enumerate(users)] | transact[g] | run
+        (ET.Machine, RT.Email, "user5@example.com") | g | run
+
+        def found(gs, val):
+            return gs | lookup[ET.User, RT.Email][val] | map[uid] | collect
+
+        gs_before = g | now | collect
+        self.assertEqual(found(gs_before, "user5@example.com"), [uid(users[5])])
+        self.assertEqual(found(gs_before, "nobody@example.com"), [])
+        # Values of a different type never match
+        self.assertEqual(found(gs_before, 5), [])
+
+        # Reassignments, terminations and new relations after the index was
+        # built are all picked up.
+        users[5] | set_field[RT.Email]["new@example.com"] | g | run
+        users[6] | terminate | g | run
+        new_user,_,_ = (ET.User, RT.Email, "new@example.com") | g | run
+
+        gs = g | now | collect
+        self.assertEqual(found(gs, "user5@example.com"), [])
+        self.assertEqual(found(gs, "user6@example.com"), [])
+        self.assertEqual(found(gs, "new@example.com"), [uid(users[5]), uid(new_user)])
+        # Older slices still see the old values
+        self.assertEqual(found(gs_before, "user5@example.com"), [uid(users[5])])
+
+        all_users = gs | all[ET.User] | collect
+        self.assertEqual(all_users | select_by_field[RT.Email]["user8@example.com"] | uid | collect, uid(users[8]))
+        self.assertEqual(all_users | select_by_field[RT.Email]["user6@example.com"] | collect, None)
+        with self.assertRaises(Exception):
+            all_users | select_by_field[RT.Email]["new@example.com"] | collect
+
+    def test_select_by_field_subsets(self):
+        g = Graph()
+        machines = [(ET.Machine, RT.Name, f"m{i}") for i in range(1000)] | g | run
+        machines = [z for z,_,_ in machines]
+        all_machines = g | now | all[ET.Machine] | collect
+
+        # Few entities, a good part of all machines and a small part of many
+        # machines go through different paths and must all agree.
+        for subset in [all_machines[:10], all_machines[:300], all_machines[::10]]:
+            self.assertEqual(subset | select_by_field[RT.Name]["m0"] | uid | collect, uid(machines[0]))
+            self.assertEqual(subset | select_by_field[RT.Name]["m999"] | collect, None)
+        self.assertEqual(all_machines | select_by_field[RT.Name]["m999"] | uid | collect, uid(machines[999]))
+        self.assertEqual(all_machines[::10] | select_by_field[RT.Name]["m990"] | uid | collect, uid(machines[990]))
+        self.assertEqual(all_machines[::10] | select_by_field[RT.Name]["m991"] | collect, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
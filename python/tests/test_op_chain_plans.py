@@ -0,0 +1,39 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+from zef import *
+from zef.ops import *
+from zef.core.op_structs import compile_op_chain, invalidate_compiled_op_chains, _compiled_plans
+
+
+class MyTestCase(unittest.TestCase):
+    def test_plan_reused_across_curried_args(self):
+        self.assertEqual([1,2,3] | map[add[1]] | collect, [2,3,4])
+        plan = compile_op_chain((map[add[1]] | collect).el_ops)
+        self.assertIs(plan, compile_op_chain((map[add[5]] | collect).el_ops))
+        self.assertEqual([1,2,3] | map[add[5]] | collect, [6,7,8])
+
+    def test_plan_keeps_error_context(self):
+        with self.assertRaises(Exception):
+            [1, "a"] | map[add[1]] | collect
+
+    def test_invalidate_plans(self):
+        compile_op_chain((map[add[1]] | collect).el_ops)
+        self.assertTrue(len(_compiled_plans) > 0)
+        invalidate_compiled_op_chains()
+        self.assertEqual(len(_compiled_plans), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -146,6 +146,99 @@ class MyTestCase(unittest.TestCase):
         self.assertEqual(True, num_txs < len(g | all[TX] | collect))
         self.assertEqual(True, before_read_head < g.graph_data.read_head)
 
+    def test_checkpointed_hash(self):
+        g = Graph()
+
+        first = ET.Machine | g | run
+        second = ET.Machine | g | run
+        third = ET.Machine | g | run
+        # Enough blobs to go past a few hash checkpoints
+        for i in range(10):
+            [ET.Machine]*5000 | g | run
+        g.hash()
+
+        def fresh_hash():
+            # A copy starts without any checkpoints
+            g_copy = zef.pyzef.internals.create_partial_graph(g.graph_data, g.graph_data.write_head)
+            return g_copy.graph_data.hash()
+
+        [ET.Machine]*100 | g | run
+        self.assertEqual(g.hash(), fresh_hash())
+
+        # Edges onto an early entity change its edge list in place
+        (first, RT.Something, 5) | g | run
+        self.assertEqual(g.hash(), fresh_hash())
+        (first, RT.Something, 6) | g | run
+        self.assertEqual(g.hash(), fresh_hash())
+
+        hash_before = g.hash()
+        head_before = g.graph_data.read_head
+        with Transaction(g):
+            (first, RT.Something, 7) | g | run
+            zef.pyzef.internals.AbortTransaction(g)
+        self.assertEqual(g.graph_data.read_head, head_before)
+        self.assertEqual(g.hash(), hash_before)
+        self.assertEqual(g.hash(), fresh_hash())
+
+        # Terminating an early entity writes its termination time slice in place
+        second | terminate | g | run
+        self.assertEqual(g.hash(), fresh_hash())
+
+        hash_before = g.hash()
+        with Transaction(g):
+            third | terminate | g | run
+            zef.pyzef.internals.AbortTransaction(g)
+        self.assertEqual(g.hash(), hash_before)
+        self.assertEqual(g.hash(), fresh_hash())
+
+    def test_uid_lookup_growth(self):
+        g = Graph()
+
+        # Enough to grow the uid index a few times
+        zs = [ET.Machine]*5000 | g | run
+        for z in zs[::97]:
+            self.assertEqual(g[uid(z)], to_ezefref(z))
+            self.assertIn(uid(z), g)
+
+        with Transaction(g):
+            z_aborted = ET.Machine | g | run
+            aborted_uid = uid(z_aborted)
+            zef.pyzef.internals.AbortTransaction(g)
+        self.assertNotIn(aborted_uid, g)
+        self.assertEqual(len(g.uid_cache()), len(set(x for x,_ in g.uid_cache())))
+
+        z = ET.Machine | g | run
+        self.assertEqual(g[uid(z)], to_ezefref(z))
+        self.assertEqual(g[uid(zs[0])], to_ezefref(zs[0]))
+
+    def test_rebuilt_caches_same(self):
+        g = Graph()
+        g2 = Graph()
+        a2,b2,c2 = (ET.Machine, RT.Something, 5) | g2 | run
+
+        # Enough blobs for the caches to be filled in several chunks
+        for i in range(4):
+            [ET.Machine]*5000 | g | run
+        head_mid = g.graph_data.read_head
+        z = ET.Person | g | run
+        [
+            (z, RT.Name, "Alice"),
+            (z, RT.Weight, QuantityFloat(55.0, EN.Unit.kilograms)),
+            (z, RT.Kind, Val("operating")),
+            (delegate_of(ET.Person), RT.Metadata, Val({"some_dict": 5})),
+        ] | g | run
+        [a2, b2, c2] | g | run
+        z | tag["alice"] | g | run
+
+        for index_hi in [head_mid, g.graph_data.write_head]:
+            g_copied = zef.pyzef.internals.create_partial_graph(g.graph_data, index_hi)
+            g_rebuilt = zef.pyzef.internals.create_partial_graph(g.graph_data, index_hi, rebuild_caches=True)
+            self.assertEqual(g_copied.graph_data.hash(), g_rebuilt.graph_data.hash())
+
+            heads = zef.internals.create_update_heads(g_copied.graph_data)
+            self.assertEqual(zef.internals.create_update_payload(g_copied.graph_data, heads, ""),
+                             zef.internals.create_update_payload(g_rebuilt.graph_data, heads, ""))
+
         
 
 if __name__ == '__main__':
@@ -112,6 +112,16 @@ def customRoute(req, context):
         } | run
         zef.core._error.custom_error_handling = self.old_error_value
 
+    def test_auth_expression_sees_registered_ops(self):
+        from zef.graphql.simplegql.generate_api2 import temporary__call_string_as_func
+        from zef.core._ops import register_zefop
+        from zef.core import internals
+
+        # Evaluate once first, so the namespace is cached before the op exists
+        self.assertEqual(temporary__call_string_as_func("z | collect", z=5), 5)
+        register_zefop(internals.RT.AuthTestDouble, lambda x: 2*x, lambda op, curr_type: curr_type)
+        self.assertEqual(temporary__call_string_as_func("z | auth_test_double | collect", z=5), 10)
+
     def test_simplegql(self):
         import jwt
         jwt_user_no_aud = jwt.encode({"email": "user1"}, self.key, "HS256")
@@ -230,6 +240,33 @@ testString: ""
         self.assertEqual(len(r.json()["data"]["queryUser"]), 1)
         self.assertEqual(len(r.json()["data"]["queryUser"][0]["transactions"]), 0)
 
+        # Filters that can be answered from the field indexes
+        r = do_query(jwt_user1, 'query { queryTransaction(filter: {amount: {eq: 50}}) { id } }')
+        assert_no_error(r)
+        self.assertEqual(len(r.json()["data"]["queryTransaction"]), 1)
+
+        r = do_query(jwt_user1, 'query { queryTransaction(filter: {amount: {in: [1, 2]}}) { id } }')
+        assert_no_error(r)
+        self.assertEqual(len(r.json()["data"]["queryTransaction"]), 0)
+
+        r = do_query(jwt_user1, 'mutation { updateTransaction(input: {filter: {id: "' + trans_id + '"}, set: {amount: 70}}) { count } }')
+        assert_no_error(r)
+
+        r = do_query(jwt_user1, 'query { queryTransaction(filter: {amount: {between: {min: 60, max: 100}}}) { amount } }')
+        assert_no_error(r)
+        self.assertEqual(r.json()["data"]["queryTransaction"], [{"amount": 70}])
+
+        r = do_query(jwt_user1, 'mutation { addTransaction(input: {user: {id: "' + user1_id + '"}, amount: 20}) { count } }')
+        assert_no_error(r)
+
+        r = do_query(jwt_user1, 'query { queryTransaction(order: {asc: amount}, first: 1) { amount } }')
+        assert_no_error(r)
+        self.assertEqual(r.json()["data"]["queryTransaction"], [{"amount": 20}])
+
+        r = do_query(jwt_user1, 'query { queryTransaction(filter: {amount: {in: [20, 70]}}, order: {desc: amount}, first: 1, offset: 1) { amount } }')
+        assert_no_error(r)
+        self.assertEqual(r.json()["data"]["queryTransaction"], [{"amount": 20}])
+
         # Adding Category explicitly and updating transaction
         r = do_query(jwt_user1, 'mutation { addCategory(input: {name: "explicit create"}) { category { id } } }')
         assert_no_error(r)
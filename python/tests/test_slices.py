@@ -54,6 +54,74 @@ class MyTestCase(unittest.TestCase):
         ctx = z2 | termination_tx | collect
         self.assertEqual(ctx, g2[42])
 
+    def test_copy_graph_slice(self):
+        from zef.core import internals
+        g = Graph()
+        p1 = ET.Person | g | run
+        p2 = ET.Person | g | run
+        c = ET.Company | g | run
+        (p1, RT.Knows, p2) | g | run
+        (p1, RT.WorksAt, c) | g | run
+        r = (c, RT.Name, "Zef") | g | run
+        ctx = r | instantiation_tx | to_ezefref | collect
+
+        g2 = internals.copy_graph_slice(ctx)
+        self.assertEqual(g2 | now | all[ET.Person] | length | collect, 2)
+        self.assertEqual(g2 | now | all[RT] | length | collect, 3)
+        self.assertEqual(g2 | now | all[ET.Company] | single | Out[RT.Name] | value | collect, "Zef")
+
+        # Relations to RAEs that are filtered out are not copied
+        g3 = internals.copy_graph_slice(ctx,
+                                        entity_types=[internals.get_c_token(ET.Person)],
+                                        relation_types=[internals.get_c_token(RT.Knows), internals.get_c_token(RT.WorksAt)])
+        self.assertEqual(g3 | now | all[ET.Person] | length | collect, 2)
+        self.assertEqual(g3 | now | all[ET.Company] | length | collect, 0)
+        self.assertEqual(g3 | now | all[RT] | length | collect, 1)
+
+        # Kinds without any types given are not restricted
+        (p1, RT.Name, "Alice") | g | run
+        (p1, RT.Age, 42) | g | run
+        ctx = p1 | now | Out[RT.Age] | instantiation_tx | to_ezefref | collect
+        g4 = internals.copy_graph_slice(ctx,
+                                        entity_types=[internals.get_c_token(ET.Person)],
+                                        atomic_entity_types=[internals.get_c_token(AET.String)])
+        self.assertEqual(g4 | now | all[ET.Person] | length | collect, 2)
+        self.assertEqual(g4 | now | all[ET.Company] | length | collect, 0)
+        self.assertEqual(g4 | now | all[AET.String] | length | collect, 2)
+        self.assertEqual(g4 | now | all[AET.Int] | length | collect, 0)
+        self.assertEqual(g4 | now | all[RT.Knows] | length | collect, 1)
+        self.assertEqual(g4 | now | all[RT.Name] | single | target | value | collect, "Alice")
+        self.assertEqual(g4 | now | all[RT.Age] | length | collect, 0)
+
+        g5 = internals.copy_graph_slice(ctx, relation_types=[internals.get_c_token(RT.WorksAt)])
+        self.assertEqual(g5 | now | all[ET] | length | collect, 3)
+        self.assertEqual(g5 | now | all[AET] | length | collect, 3)
+        self.assertEqual(g5 | now | all[RT] | length | collect, 1)
+
+
+    def test_all_across_terminations(self):
+        g = Graph()
+        ms = [ET.Machine | g | run for _ in range(5)]
+        ET.Person | g | run
+        gs_before = g | now | collect
+
+        terminate(ms[1]) | g | run
+        terminate(ms[3]) | g | run
+        gs_middle = g | now | collect
+        m5 = ET.Machine | g | run
+        terminate(ms[0]) | g | run
+        gs_after = g | now | collect
+
+        uids = lambda gs: gs | all[ET.Machine] | map[uid] | collect
+        self.assertEqual(uids(gs_before), [uid(m) for m in ms])
+        self.assertEqual(uids(gs_middle), [uid(ms[0]), uid(ms[2]), uid(ms[4])])
+        self.assertEqual(uids(gs_after), [uid(ms[2]), uid(ms[4]), uid(m5)])
+        self.assertEqual(gs_after | all[ET.Person] | length | collect, 1)
+
+        with Transaction(g) as ctx:
+            terminate(ms[2]) | g | run
+            self.assertEqual(uids(frame(ctx)), [uid(ms[4]), uid(m5)])
+            self.assertEqual(uids(gs_after), [uid(ms[2]), uid(ms[4]), uid(m5)])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,116 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+import os
+import tempfile
+from zef import *
+from zef.ops import *
+from zef.experimental.sql_import import import_actions, bulk_import, _csv_record_ranges
+
+csv_quoted = '''id,name,notes,age
+1,Alice,plain,30
+2,Bob,"spans
+two lines",41
+3,"Carol, Jr.","has ""quotes""",
+4,Dan,"",25
+5,Eve,"three
+lines
+here",52
+'''
+
+csv_stray_quote = '''id,name,notes,age
+1,Alice,"a 5"" screen",30
+2,Bob,a 5" screen,41
+3,Carol,plain,
+'''
+
+# The first chunk only has IDs that look like numbers
+csv_numeric_looking_ids = '''id,name,notes,age
+007,Alice,plain,30
+008,Bob,plain,41
+7,Carol,plain,
+abc,Dan,plain,25
+'''
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def make_decl(self, contents, id_type="Int"):
+        filename = os.path.join(self.dir.name, "person.csv")
+        with open(filename, "w") as f:
+            f.write(contents)
+        return {
+            "default_ID": "ID",
+            "definitions": [{
+                "tag": "person",
+                "kind": "entity",
+                "ET": "Person",
+                "ID_col": "id",
+                "data_source": {"type": "csv", "filename": filename},
+                "cols": [
+                    {"name": "id", "data_type": id_type, "purpose": "id", "RT": "ID"},
+                    {"name": "name", "data_type": "String", "purpose": "field", "RT": "Name"},
+                    {"name": "notes", "data_type": "String", "purpose": "field", "RT": "Notes"},
+                    {"name": "age", "data_type": "Int", "purpose": "field", "RT": "Age"},
+                ],
+            }],
+        }
+
+    def summary(self, g):
+        def fields(z):
+            return tuple(z | Outs[rt] | map[value] | collect for rt in [RT.ID, RT.Name, RT.Notes, RT.Age])
+        return sorted(fields(z) for z in g | now | all[ET.Person] | collect)
+
+    def check_same_as_import_actions(self, contents, id_type="Int"):
+        decl = self.make_decl(contents, id_type)
+        g_expected = Graph()
+        import_actions(decl) | transact[g_expected] | run
+        expected = self.summary(g_expected)
+
+        for n_workers in [1, 2]:
+            g = Graph()
+            totals = bulk_import(decl, g, chunk_size=2, n_workers=n_workers, report=None)
+            self.assertEqual(totals["rows"], len(expected))
+            self.assertEqual(self.summary(g), expected)
+
+    def test_quoted_newlines(self):
+        self.check_same_as_import_actions(csv_quoted)
+
+        decl = self.make_decl(csv_quoted)
+        header, ranges = _csv_record_ranges(decl["definitions"][0]["data_source"]["filename"], 2)
+        self.assertEqual(header, b"id,name,notes,age\n")
+        self.assertEqual(len(ranges), 3)
+
+    def test_stray_quote(self):
+        # Falls back to parsing in this process
+        decl = self.make_decl(csv_stray_quote)
+        self.assertIsNone(_csv_record_ranges(decl["definitions"][0]["data_source"]["filename"], 2))
+        self.check_same_as_import_actions(csv_stray_quote)
+
+    def test_numeric_looking_string_ids(self):
+        self.check_same_as_import_actions(csv_numeric_looking_ids, "String")
+
+        g = Graph()
+        bulk_import(self.make_decl(csv_numeric_looking_ids, "String"), g, chunk_size=2, n_workers=2, report=None)
+        self.assertEqual(sorted(ids for ids,*_ in self.summary(g)), [("007",), ("008",), ("7",), ("abc",)])
+
+
+if __name__ == '__main__':
+    unittest.main()
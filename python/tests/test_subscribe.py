@@ -85,6 +85,24 @@ class MyTestCase(unittest.TestCase):
             ("term", RT.Value),
             ("inst", RT.Value),
         ])
+
+    def test_unsubscribe_one_of_several(self):
+        from zef.core.VT.rae_types import RAET_get_token
+        g = Graph()
+        z = instantiate(RAET_get_token(AET.Int), g)
+        z2 = instantiate(RAET_get_token(AET.Int), g)
+
+        calls = []
+        sub1 = z | subscribe[on_value_assignment][lambda x: calls.append(("sub1", x|value|collect))]
+        sub2 = z | subscribe[on_value_assignment][lambda x: calls.append(("sub2", x|value|collect))]
+        sub3 = z2 | subscribe[on_value_assignment][lambda x: calls.append(("sub3", x|value|collect))]
+
+        z | assign[1] | g | run
+        sub1.unsubscribe()
+        z | assign[2] | g | run
+        z2 | assign[3] | g | run
+
+        self.assertEqual(calls, [("sub1", 1), ("sub2", 1), ("sub2", 2), ("sub3", 3)])
                           
 if __name__ == '__main__':
     unittest.main()
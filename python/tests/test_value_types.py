@@ -0,0 +1,41 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+from zef import *
+from zef.ops import *
+
+
+class MyTestCase(unittest.TestCase):
+    def test_cached_hash_and_decisions(self):
+        t = List[Int]
+        self.assertEqual(hash(t), hash(List[Int]))
+        self.assertEqual(t, List[Int])
+        self.assertNotEqual(hash(t), hash(List[String]))
+        # Absorbing creates a new ValueType rather than changing the old one
+        t2 = t["some_name"]
+        self.assertEqual(t, List[Int])
+        self.assertNotEqual(t, t2)
+
+        # Repeated checks must give the same answers once they are cached
+        for _ in range(2):
+            self.assertTrue(is_a("a", String))
+            self.assertFalse(is_a(1, String))
+            self.assertTrue(is_a(1, Int))
+            self.assertTrue(issubclass(String, String | Int))
+            self.assertFalse(issubclass(String | Int, String))
+
+
+if __name__ == '__main__':
+    unittest.main()
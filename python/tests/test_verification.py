@@ -0,0 +1,40 @@
+# Copyright 2022 Synchronous Technologies Pte Ltd
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest  # pytest takes ages to run anything as soon as anything from zef is imported
+
+import zef
+from zef import *
+from zef.ops import *
+
+
+class MyTestCase(unittest.TestCase):
+    def test_parallel_verification(self):
+        g = Graph()
+        people = [ET.Person | g | run for _ in range(50)]
+        rels = [(a, RT.Knows, b) | g | run for a,b in zip(people, people[1:])]
+        [(p, RT.Age, i) | g | run for i,p in enumerate(people)]
+
+        reported = []
+        self.assertTrue(zef.pyzef.verification.verify_graph_parallel(g, 4, lambda done,total: reported.append((done,total))))
+        self.assertEqual(reported[-1][0], reported[-1][1])
+        self.assertTrue(zef.pyzef.verification.verify_graph_parallel(g))
+
+        zef.pyzef.verification.break_graph(g, zef.pyzef.main.index(rels[10]), 1)
+        with self.assertRaises(RuntimeError):
+            zef.pyzef.verification.verify_graph_parallel(g, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
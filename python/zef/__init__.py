@@ -19,13 +19,36 @@ __version__ = _version.get_versions()['version']
 # * Exposing common functions
 #------------------------------------------------------
 
+import time as _time
 import_order = []
+import_times = []
 def report_import(x):
     if x in import_order:
         return
     import_order.append(x)
+    import_times.append(_time.perf_counter())
 report_import("zef")
 
+def import_profile():
+    """Returns how long each module reported through `report_import` took to
+    load during `import zef`, as a list of (module, seconds) with the slowest
+    first.
+
+    The time of a module runs from its `report_import` call until the next
+    module reports itself (or the end of `import zef`), so it includes any
+    third-party packages the module imports first.
+
+    Set the environment variable ZEFDB_PROFILE_IMPORTS=TRUE to have this
+    printed at the end of `import zef`.
+    """
+    finished = _import_finished if _import_finished is not None else _time.perf_counter()
+    ends = import_times[1:] + [finished]
+    # Modules that reported themselves after `import zef` was done are not part of its profile
+    out = [(name, min(end, finished) - start) for name,start,end in zip(import_order, import_times, ends)
+           if start <= finished]
+    return sorted(out, key=lambda x: x[1], reverse=True)
+_import_finished = None
+
 # This set of imports is to define the order. Later imports are the ones to
 # actually provide useful exports.
 from . import core
@@ -49,6 +72,17 @@ def _autostart_behaviour():
 
 _autostart_behaviour()
 
+_import_finished = _time.perf_counter()
+def _print_import_profile():
+    import os
+    if os.environ.get("ZEFDB_PROFILE_IMPORTS", "FALSE") != "TRUE":
+        return
+    total = _import_finished - import_times[0]
+    print(f"import zef took {total:.3f}s")
+    for name,duration in import_profile():
+        print(f"{duration:8.3f}s  {name}")
+_print_import_profile()
+
 # We always run this, in case the user has started the butler manually instead of automatically
 import atexit
 @atexit.register
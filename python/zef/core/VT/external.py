@@ -16,5 +16,18 @@
 
 from . import make_VT
 
-from pandas import DataFrame as DataFrame_
-make_VT('DataFrame', pytype=DataFrame_)
\ No newline at end of file
+# pandas is only imported once a DataFrame is actually constructed, as it
+# takes a good fraction of the time of `import zef` otherwise.
+def dataframe_ctor(*args, **kwargs):
+    from pandas import DataFrame
+    return DataFrame(*args, **kwargs)
+
+def dataframe_is_a(obj, typ):
+    import sys
+    # Nothing can be a DataFrame before pandas has been imported
+    pandas = sys.modules.get("pandas", None)
+    if pandas is None:
+        return False
+    return isinstance(obj, pandas.DataFrame)
+
+make_VT('DataFrame', constructor_func=dataframe_ctor, is_a_func=dataframe_is_a)
@@ -81,9 +81,25 @@ _value_type_simplify_type_funcs = {}
 _value_type_str_funcs = {}
 _value_type_pytypes = {}
 
+# Decisions which do not depend on the value being checked, so that they only
+# have to be worked out once: is_a_ on the pytype of a ValueType, keyed by
+# (type(obj), typ), and is_subtype_, keyed by (typ1, typ2).
+_is_a_pytype_cache = {}
+_is_subtype_cache = {}
+_decision_cache_max_size = 100_000
+
+def _remember(cache, key, result):
+    if len(cache) >= _decision_cache_max_size:
+        cache.clear()
+    cache[key] = result
+
 class ValueType_:
     """ 
     Zef ValueTypes are Values themselves.
+
+    They are immutable: `_d` must not be changed after construction (use
+    `_replace` to obtain a modified copy), which lets the hash be computed
+    only once.
     """
     def __init__(self, type_name:str, absorbed=(), pytype=None, constructor_func=None, pass_self=False, attr_funcs=(None,None,None), is_a_func=None, is_subtype_func=None, override_subtype_func=None, simplify_type_func=None, str_func=None):
             self._d = {
@@ -91,6 +107,7 @@ class ValueType_:
                 'absorbed': absorbed,
                 'alias': None,
             }
+            self._hash = None
 
             if constructor_func is not None:
                 assert type_name not in _value_type_constructor_funcs
@@ -121,6 +138,7 @@ class ValueType_:
         new_vt = ValueType_(self._d["type_name"])
         new_vt._d = dict(self._d)
         new_vt._d.update(kwargs)
+        new_vt._hash = None
         return new_vt
 
 
@@ -185,7 +203,13 @@ class ValueType_:
 
     def __hash__(self):
         # return hash(self._d['type_name']) ^ hash(self._d['absorbed'])
-        return hash_frozen(self._d)
+        if self._hash is None:
+            self._hash = hash_frozen(self._d)
+        return self._hash
+
+    def __getstate__(self):
+        # The cached hash is only valid in this process (str hashes are salted)
+        return {"_d": self._d, "_hash": None}
 
 
     def __or__(self, other):
@@ -266,24 +290,54 @@ def is_type_(typ):
 
 def is_a_(obj, typ):
     assert is_type_(typ), f"Can't do a is_a_ on a non-ValueType '{typ}'"
-    if typ._d["type_name"] in _value_type_is_a_funcs:
-        out = _value_type_is_a_funcs[typ._d["type_name"]](obj, typ)
+    name = typ._d["type_name"]
+    is_a_func = _value_type_is_a_funcs.get(name, None)
+    if is_a_func is not None:
+        out = is_a_func(obj, typ)
         if out is not NotImplemented:
             return out
-    if typ._d["type_name"] in _value_type_pytypes:
+    else:
+        # Without an is_a_func the answer only depends on the python type of obj
+        try:
+            key = (type(obj), typ)
+            out = _is_a_pytype_cache.get(key, None)
+        except TypeError:
+            # Something absorbed is not hashable, so this can't be cached
+            key = None
+            out = None
+        if out is not None:
+            return out
+
+    pytype = _value_type_pytypes.get(name, None)
+    if pytype is None:
+        raise Exception(f"ValueType '{name}' has no is_a implementation")
+    # If something is absorbed, then we don't know how to handle it so error
+    if len(typ._d["absorbed"]) > 0:
         from .helpers import remove_names, absorbed
-        # If something is absorbed, then we don't know how to handle it so error
         abs = remove_names(absorbed(typ))
         if len(abs) > 0:
             raise Exception(f"Absorbed arguments in a {type_name(typ)} cannot be used (have {abs}), as it is a native-python type domainted ValueType")
-        return isinstance(obj, _value_type_pytypes[typ._d["type_name"]])
-    else:
-        raise Exception(f"ValueType '{typ._d['type_name']}' has no is_a implementation")
+    out = isinstance(obj, pytype)
+    if is_a_func is None and key is not None:
+        _remember(_is_a_pytype_cache, key, out)
+    return out
 
 def is_subtype_(typ1, typ2):
     assert is_type_(typ1), f"is_subtype got a non-type: {typ1}"
     assert is_type_(typ2), f"is_subtype got a non-type: {typ2}"
 
+    try:
+        key = (typ1, typ2)
+        out = _is_subtype_cache.get(key, None)
+    except TypeError:
+        # Something absorbed is not hashable, so this can't be cached
+        return _is_subtype_uncached(typ1, typ2)
+    if out is None:
+        out = _is_subtype_uncached(typ1, typ2)
+        _remember(_is_subtype_cache, key, out)
+    return out
+
+def _is_subtype_uncached(typ1, typ2):
     if typ1._d["type_name"] in _value_type_override_subtype_funcs:
         result = _value_type_override_subtype_funcs[typ1._d["type_name"]](typ1, typ2)
         if result is True or result is False:
@@ -121,26 +121,29 @@ def visual_exception_view(error_value):
             e_s = "Can't take str of failure exception"
         print("Failed in displaying zef error: {e_s}")
         pass
-try:
-    from IPython import get_ipython
-    ip = get_ipython()
-    # Use the same check as what rich does
-    import rich.console
-    if rich.console._is_jupyter():
-        def ip_exception_handler(self, etype, evalue, tb, tb_offset=None):
-            from ._error import ExceptionWrapper
-            if etype == ExceptionWrapper:
-                # Replace the wrapper object so that we don't output twice
-                self.showtraceback((etype, "see visual below", tb), tb_offset=tb_offset)  # standard IPython's printout
-                # Show our fancy view
-                visual_exception_view(evalue)
-            else:
-                return self.showtraceback((etype, evalue, tb), tb_offset=tb_offset)  # standard IPython's printout
-
-        # Overloading ipython exception handler
-        ip.set_custom_exc((Exception,), ip_exception_handler) 
-except:
-    pass
+# A running IPython has always been imported already. Checking first avoids
+# importing IPython and rich when zef is used from a plain script.
+if "IPython" in sys.modules:
+    try:
+        from IPython import get_ipython
+        ip = get_ipython()
+        # Use the same check as what rich does
+        import rich.console
+        if rich.console._is_jupyter():
+            def ip_exception_handler(self, etype, evalue, tb, tb_offset=None):
+                from ._error import ExceptionWrapper
+                if etype == ExceptionWrapper:
+                    # Replace the wrapper object so that we don't output twice
+                    self.showtraceback((etype, "see visual below", tb), tb_offset=tb_offset)  # standard IPython's printout
+                    # Show our fancy view
+                    visual_exception_view(evalue)
+                else:
+                    return self.showtraceback((etype, evalue, tb), tb_offset=tb_offset)  # standard IPython's printout
+
+            # Overloading ipython exception handler
+            ip.set_custom_exc((Exception,), ip_exception_handler) 
+    except:
+        pass
 
 pyzef.internals.finished_loading_python_core()
 
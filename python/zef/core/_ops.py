@@ -16,10 +16,15 @@ from .. import report_import
 report_import("zef.core._ops")
 
 from .VT import RT
-from .op_structs import  evaluating, LazyValue, Awaitable, ZefOp, CollectingOp, SubscribingOp, ForEachingOp
+from .op_structs import  evaluating, LazyValue, Awaitable, ZefOp, CollectingOp, SubscribingOp, ForEachingOp, invalidate_compiled_op_chains
 from . import internals
 
+# Bumped whenever register_zefop adds an op, so caches of the op namespace
+# know to rebuild.
+_registry_version = 0
+
 def register_zefop(rt, imp, tp):
+    global _registry_version
     from .dispatch_dictionary import _op_to_functions
     import zef
     import re
@@ -30,6 +35,8 @@ def register_zefop(rt, imp, tp):
     op = ZefOp(((rt, ()),))
     globals()[op_name] = op
     _op_to_functions[rt] = (imp, tp)
+    invalidate_compiled_op_chains()
+    _registry_version += 1
     return op
 
 
@@ -112,6 +119,8 @@ without         = make_zefop(internals.RT.Without)
 select_keys     = make_zefop(internals.RT.SelectKeys)
 modulo          = make_zefop(internals.RT.Modulo)
 select_by_field = make_zefop(internals.RT.SelectByField)
+field_columns   = make_zefop(internals.RT.FieldColumns)
+lookup          = make_zefop(internals.RT.Lookup)
 apply_functions = make_zefop(internals.RT.ApplyFunctions)
 map             = make_zefop(internals.RT.Map)
 map_cat         = make_zefop(internals.RT.MapCat)
@@ -277,6 +286,7 @@ from_csv       = make_zefop(internals.RT.FromCSV)
 
 read_file      = make_zefop(internals.RT.ReadFile)
 load_file      = make_zefop(internals.RT.LoadFile)
+stream_file    = make_zefop(internals.RT.StreamFile)
 write_file     = make_zefop(internals.RT.WriteFile)
 save_file      = make_zefop(internals.RT.SaveFile)
 
@@ -16,12 +16,201 @@ from .. import report_import
 report_import("zef.core.flat_graph")
 
 from operator import ne
+from array import array
 from ._ops import *
 from dataclasses import dataclass
 from .VT import *
 from .VT import make_VT
 
 
+class FlatGraphColumns:
+    """
+    Compact columnar view of the blobs of a FlatGraph. It is built once per
+    FlatGraph and cached on it (see `FlatGraph_.columns`), so traversals only
+    touch the integer arrays of the blobs involved.
+
+    - type_table: the distinct blob types. type_ids holds the position in
+      type_table for each blob, -1 for removed blobs.
+    - sources / targets: blob indexes of the endpoints of relations, -1 for
+      all other blobs.
+    - edge_offsets / in_offsets / edges: the edge lists of all blobs in CSR
+      form. The outgoing edges of blob i are edges[edge_offsets[i]:in_offsets[i]]
+      and the incoming ones edges[in_offsets[i]:edge_offsets[i+1]], each in
+      the order of the blob's edge list.
+
+    Blobs added with `append` and edges added with `add_edge` go to an append
+    buffer, which is folded into the CSR arrays by `compact`.
+
+    Two indexes are built lazily on first use and then kept up to date by
+    `append` and `add_edge`: the blobs of each type (`blobs_of_type`) and the
+    relations of each blob bucketed by direction and relation type
+    (`relations_of`). They are not carried over by `copy`.
+    """
+    compact_threshold = 1 << 16
+
+    def __init__(self, blobs=()):
+        self.type_table = []
+        self._type_index = {}
+        self.type_ids = array('l')
+        self.sources = array('q')
+        self.targets = array('q')
+        self.edge_offsets = array('q', [0])
+        self.in_offsets = array('q')
+        self.edges = array('q')
+        # append buffer: blob index -> edges not yet in the CSR arrays
+        self._pending_edges = {}
+        self._num_pending = 0
+        # type id -> blob indexes
+        self._by_type = None
+        # (blob index, is_outgoing, type id of the relation) -> relation indexes
+        self._adjacency = None
+        for b in blobs:
+            self._append_csr(b)
+
+    def __len__(self):
+        return len(self.type_ids)
+
+    def type_id(self, blob_type) -> int:
+        """Position of blob_type in the type table, -1 if no blob has this type."""
+        try:
+            return self._type_index.get(blob_type, -1)
+        except TypeError:
+            # Unhashable blob types are stored in the table only
+            for i,t in enumerate(self.type_table):
+                if t == blob_type: return i
+            return -1
+
+    def _intern(self, blob_type) -> int:
+        i = self.type_id(blob_type)
+        if i == -1:
+            i = len(self.type_table)
+            self.type_table.append(blob_type)
+            try:
+                self._type_index[blob_type] = i
+            except TypeError:
+                pass
+        return i
+
+    def _append_columns(self, b):
+        if b is None:
+            self.type_ids.append(-1)
+            self.sources.append(-1)
+            self.targets.append(-1)
+            return
+        tid = self._intern(b[1])
+        if self._by_type is not None:
+            self._by_type.setdefault(tid, array('q')).append(len(self.type_ids))
+        self.type_ids.append(tid)
+        # Relations and delegate relations are the only blobs with 6 fields
+        if len(b) == 6:
+            self.sources.append(b[4])
+            self.targets.append(b[5])
+        else:
+            self.sources.append(-1)
+            self.targets.append(-1)
+
+    def _append_csr(self, b):
+        self._append_columns(b)
+        if b is not None:
+            self.edges.extend(e for e in b[2] if e >= 0)
+            self.in_offsets.append(len(self.edges))
+            self.edges.extend(e for e in b[2] if e < 0)
+        else:
+            self.in_offsets.append(len(self.edges))
+        self.edge_offsets.append(len(self.edges))
+
+    def append(self, b):
+        """Add a new blob (which must have the next index) without rebuilding the CSR arrays."""
+        self._append_columns(b)
+        # An empty CSR entry, the edges live in the append buffer for now
+        self.in_offsets.append(len(self.edges))
+        self.edge_offsets.append(len(self.edges))
+        if b is not None:
+            for e in b[2]:
+                self.add_edge(b[0], e)
+
+    def add_edge(self, idx, edge):
+        if self._adjacency is not None:
+            if edge != 0 and abs(edge) < len(self.type_ids):
+                self._adjacency.setdefault((idx, edge > 0, self.type_ids[abs(edge)]), []).append(abs(edge))
+            else:
+                # The relation isn't known yet, rebuild on next use
+                self._adjacency = None
+        self._pending_edges.setdefault(idx, []).append(edge)
+        self._num_pending += 1
+        if self._num_pending >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Fold the append buffer into the CSR arrays."""
+        if self._num_pending == 0:
+            return
+        edge_offsets = array('q', [0])
+        in_offsets = array('q')
+        edges = array('q')
+        for i in range(len(self.type_ids)):
+            extra = self._pending_edges.get(i, ())
+            edges.extend(self.edges[self.edge_offsets[i]:self.in_offsets[i]])
+            edges.extend(e for e in extra if e >= 0)
+            in_offsets.append(len(edges))
+            edges.extend(self.edges[self.in_offsets[i]:self.edge_offsets[i+1]])
+            edges.extend(e for e in extra if e < 0)
+            edge_offsets.append(len(edges))
+        self.edge_offsets, self.in_offsets, self.edges = edge_offsets, in_offsets, edges
+        self._pending_edges = {}
+        self._num_pending = 0
+
+    def copy(self):
+        new = FlatGraphColumns()
+        new.type_table = [*self.type_table]
+        new._type_index = {**self._type_index}
+        new.type_ids = array('l', self.type_ids)
+        new.sources = array('q', self.sources)
+        new.targets = array('q', self.targets)
+        new.edge_offsets = array('q', self.edge_offsets)
+        new.in_offsets = array('q', self.in_offsets)
+        new.edges = array('q', self.edges)
+        new._pending_edges = {k: [*v] for k,v in self._pending_edges.items()}
+        new._num_pending = self._num_pending
+        return new
+
+    def out_edges(self, idx) -> list:
+        res = self.edges[self.edge_offsets[idx]:self.in_offsets[idx]].tolist()
+        if self._num_pending:
+            res += [e for e in self._pending_edges.get(idx, ()) if e >= 0]
+        return res
+
+    def in_edges(self, idx) -> list:
+        res = self.edges[self.in_offsets[idx]:self.edge_offsets[idx+1]].tolist()
+        if self._num_pending:
+            res += [e for e in self._pending_edges.get(idx, ()) if e < 0]
+        return res
+
+    def blobs_of_type(self, tid) -> array:
+        """Indexes of the blobs with type id tid, in increasing order."""
+        if self._by_type is None:
+            by_type = {}
+            for i,t in enumerate(self.type_ids):
+                if t != -1: by_type.setdefault(t, array('q')).append(i)
+            self._by_type = by_type
+        return self._by_type.get(tid, array('q'))
+
+    def relations_of(self, idx, rt_id, outgoing=True) -> list:
+        """
+        Indexes of the relations with type id rt_id going out of (or coming
+        into) blob idx, in the order of the blob's edge list.
+        """
+        if self._adjacency is None:
+            adjacency = {}
+            for i in range(len(self.type_ids)):
+                for e in self.out_edges(i):
+                    if e != 0: adjacency.setdefault((i, True, self.type_ids[e]), []).append(e)
+                for e in self.in_edges(i):
+                    adjacency.setdefault((i, False, self.type_ids[-e]), []).append(-e)
+            self._adjacency = adjacency
+        return [*self._adjacency.get((idx, outgoing, rt_id), ())]
+
+
 class FlatGraph_:
     """
     Internal data representation:
@@ -35,22 +224,45 @@ class FlatGraph_:
         edge_list: a list of blob indexes (integers). Positive for outgoing, negative for incoming
         origin_uid (optional)
     )
+
+    A FlatGraph is treated as immutable once constructed: `self.columns` is a
+    columnar view of the blobs that is built lazily on first use and reset
+    whenever `self.blobs` is replaced.
     """
     def __init__(self, *args):
         if args == ():
             self.key_dict = {}
             self.blobs = ()
         elif len(args) == 1 and isinstance(args[0], list):
-            new_fg = FlatGraph_()
-            new_fg = new_fg | insert[args[0]] | collect
+            new_fg = FlatGraphBuilder().insert(args[0]).freeze()
             self.key_dict = new_fg.key_dict
             self.blobs = new_fg.blobs
         elif len(args) == 1 and isinstance(args[0], FlatRef_):
             self.key_dict =  args[0].fg.key_dict
             self.blobs = args[0].fg.blobs
+            self._columns = args[0].fg._columns
         else:
             raise NotImplementedError("FlatGraph with args")
 
+    @property
+    def blobs(self):
+        return self._blobs
+
+    @blobs.setter
+    def blobs(self, blobs):
+        self._blobs = blobs
+        self._columns = None
+
+    @property
+    def columns(self) -> FlatGraphColumns:
+        if self._columns is None:
+            self._columns = FlatGraphColumns(self._blobs)
+        return self._columns
+
+    def transient(self) -> "FlatGraphBuilder":
+        """Returns a builder to add many elements to a copy of this FlatGraph."""
+        return FlatGraphBuilder(self)
+
     def __repr__(self):
         kdict = "\n".join([f"({k}=>{v})" for k,v in self.key_dict.items()])
         blobs = "\n".join([str(e) for e in self.blobs])
@@ -68,6 +280,91 @@ class FlatGraph_:
 make_VT("FlatGraph", pytype=FlatGraph_)
 
 
+class FlatGraphBuilder:
+    """
+    Transient, mutable counterpart of a FlatGraph. Inserting or merging into a
+    builder appends to its blobs in place, so building up a FlatGraph with n
+    elements is O(n) overall, while every `fg | insert[x]` has to copy all
+    blobs of fg. `freeze` returns the immutable FlatGraph.
+
+    >>> b = FlatGraph().transient()
+    >>> for x in xs: b.insert(x)
+    >>> fg = b.freeze()
+
+    The blobs are shared with the FlatGraph the builder starts from (and with
+    the FlatGraphs it was frozen into) and are only copied before the first
+    change of their edge list in `add_edge`. Changes to the blobs must hence
+    go through `append` and `add_edge` or replace the blob tuple as a whole.
+    """
+    def __init__(self, fg=None):
+        if fg is None:
+            self.origin = None
+            self.blobs, self.key_dict = [], {}
+            self._columns = None
+        else:
+            self.origin = fg
+            self.blobs, self.key_dict = [*fg.blobs], {**fg.key_dict}
+            self._columns = None if fg._columns is None else fg._columns.copy()
+        # Blob indexes whose edge list was copied and may be changed in place
+        self._owned = set()
+
+    def __len__(self):
+        return len(self.blobs)
+
+    def next_idx(self) -> int:
+        """Index of the next blob to be appended."""
+        return len(self.blobs)
+
+    def append(self, b):
+        assert b[0] == len(self.blobs), f"Blob {b} doesn't have the next index {len(self.blobs)}"
+        self.blobs.append(b)
+        # A new blob's edge list isn't shared with anything yet
+        self._owned.add(b[0])
+        if self._columns is not None:
+            self._columns.append(b)
+
+    def add_edge(self, idx, edge):
+        if idx not in self._owned:
+            b = self.blobs[idx]
+            self.blobs[idx] = (b[0], b[1], [*b[2]], *b[3:])
+            self._owned.add(idx)
+        self.blobs[idx][2].append(edge)
+        if self._columns is not None:
+            self._columns.add_edge(idx, edge)
+
+    def reset(self, blobs, key_dict):
+        """Replaces the contents of the builder, e.g. after blobs were removed."""
+        self.blobs, self.key_dict = [*blobs], {**key_dict}
+        self._owned = set()
+        self._columns = None
+
+    def insert(self, new_el) -> "FlatGraphBuilder":
+        from .op_implementations.flatgraph_implementations import fg_insert_into_builder
+        fg_insert_into_builder(self, new_el)
+        return self
+
+    def merge(self, fg) -> "FlatGraphBuilder":
+        from .op_implementations.flatgraph_implementations import fg_merge_into_builder
+        fg_merge_into_builder(self, fg)
+        return self
+
+    def freeze(self) -> FlatGraph_:
+        """
+        Returns a FlatGraph with the current contents. The builder can still be
+        used afterwards without changing the returned FlatGraph.
+        """
+        fg = FlatGraph_()
+        fg.key_dict = {**self.key_dict}
+        fg.blobs = (*self.blobs,)
+        if self._columns is not None:
+            self._columns.compact()
+            fg._columns = self._columns
+            self._columns = self._columns.copy()
+        # All edge lists are now shared with fg
+        self._owned = set()
+        return fg
+
+
 class FlatRef_:
     def __init__(self, fg, idx):
         self.fg = fg
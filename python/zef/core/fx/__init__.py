@@ -29,7 +29,8 @@ from .http import (
     http_start_server_handler,
     http_stop_server_handler,
     http_send_response_handler,
-    http_send_request_handler
+    http_send_request_handler,
+    http_send_request_batch_handler,
 )
 
 
@@ -103,6 +104,7 @@ from .local_file import (
     write_localfile_handler,
     save_localfile_handler,
     load_localfile_handler,
+    stream_localfile_handler,
     system_open_with_handler,
     monitor_path_handler,
 )
@@ -118,6 +120,7 @@ _effect_handlers = {
     FX.HTTP.StopServer.d: http_stop_server_handler,
     FX.HTTP.SendResponse.d: http_send_response_handler,
     FX.HTTP.Request.d: http_send_request_handler,
+    FX.HTTP.RequestBatch.d: http_send_request_batch_handler,
     
     FX.Websocket.ConnectToServer.d: websocket_connect_to_server_handler,
     FX.Websocket.StartServer.d: websocket_start_server_handler,
@@ -163,6 +166,7 @@ _effect_handlers = {
     FX.LocalFile.Read.d:  read_localfile_handler,
     FX.LocalFile.ReadBinary.d:  readbinary_localfile_handler,
     FX.LocalFile.Load.d:  load_localfile_handler,
+    FX.LocalFile.Stream.d:  stream_localfile_handler,
     FX.LocalFile.Write.d: write_localfile_handler,
     FX.LocalFile.Save.d:  save_localfile_handler,
     FX.LocalFile.SystemOpenWith.d: system_open_with_handler,
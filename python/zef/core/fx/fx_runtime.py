@@ -35,7 +35,7 @@ def create_eff_to_process_graph_wish(eff: Dict) -> 'FX':
 
 
 def create_http_server(eff: Dict, server_zr: ZefRef) -> Dict:
-    from ...core.fx.http import OurHTTPServer, Handler, _effects_processes
+    from ...core.fx.http import make_http_server, _effects_processes
     from ...core.logger import log
     from ...core.op_structs import Awaitable
     import threading
@@ -68,7 +68,7 @@ def create_http_server(eff: Dict, server_zr: ZefRef) -> Dict:
             "port": port
         }
         # Instantiate HTTP server
-        server = OurHTTPServer((bind_address, port), Handler, do_logging=do_logging)
+        server = make_http_server(eff, bind_address, port, do_logging)
 
         # Set Zef local variables
         zef_locals["server"] = server
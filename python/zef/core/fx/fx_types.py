@@ -60,6 +60,7 @@ class _HTTP_Class():
     SendResponse = FXElement(('HTTP', 'SendResponse'))
     
     Request = FXElement(('HTTP', 'Request'))
+    RequestBatch = FXElement(('HTTP', 'RequestBatch'))
 
 
 class _Websocket_Class():
@@ -95,6 +96,7 @@ class _LocalFile_Class():
     Read = FXElement(('LocalFile', 'Read'))
     ReadBinary = FXElement(('LocalFile', 'ReadBinary'))
     Load = FXElement(('LocalFile', 'Load'))
+    Stream = FXElement(('LocalFile', 'Stream'))
     Write = FXElement(('LocalFile', 'Write'))
     Save = FXElement(('LocalFile', 'Save'))
     SystemOpenWith = FXElement(('LocalFile', 'SystemOpenWith'))
@@ -17,7 +17,6 @@
 from .fx_types import Effect, FX
 from .._ops import *
 from .http import send_response, permit_cors, middleware, middleware_worker, fallback_not_found
-from ariadne import graphql_sync
 import os
 import json
 
@@ -77,6 +76,7 @@ def graphql_start_server_handler(eff: Effect):
             body = body.replace("ZEF_GQL_PATH", gql_path)
             req["response_body"] = body
         elif req["path"] == gql_path:
+            from ariadne import graphql_sync
             success, result = graphql_sync(schema, json.loads(req["request_body"]))
             req["response_body"] = json.dumps(result)
             req["response_headers"]["Content-Type"] = "application/json"
@@ -22,6 +22,7 @@ from .._ops import *
 
 from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
+import sys
 from concurrent.futures import Future, TimeoutError
 
 from ..logger import log
@@ -111,6 +112,192 @@ class Handler(BaseHTTPRequestHandler):
 
 
 
+class AsyncHTTPServer:
+    """An HTTP/1.1 server running on an asyncio event loop, as an alternative
+    to OurHTTPServer for many concurrent clients. Connections are kept alive
+    and cost no thread while they are idle. Requests are pushed into the
+    zef stream from a bounded pool of worker threads, and at most
+    `max_pending` requests wait for a response at any time. Beyond that the
+    server stops reading from its connections, which pushes back on clients
+    through TCP.
+
+    It has the same interface as OurHTTPServer as far as the FX handlers are
+    concerned: `zef`, `serve_forever`, `shutdown` and `server_close`.
+    """
+    def __init__(self, server_address, *, do_logging, workers=32, max_pending=None, keep_alive_timeout=15.0):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        self.do_logging = do_logging
+        self.keep_alive_timeout = keep_alive_timeout
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zef-http")
+        self.max_pending = max_pending if max_pending is not None else 4*workers
+        self.loop = asyncio.new_event_loop()
+        self.connections = set()
+
+        async def start():
+            self.pending = asyncio.Semaphore(self.max_pending)
+            return await asyncio.start_server(self.handle_connection, *server_address)
+        # Bound here so that errors are raised by the constructor, like they
+        # are for OurHTTPServer.
+        self.server = self.loop.run_until_complete(start())
+
+    def serve_forever(self):
+        self.loop.run_forever()
+        self.loop.close()
+
+    def shutdown(self):
+        import asyncio
+        async def stop():
+            self.server.close()
+            await self.server.wait_closed()
+            for task in list(self.connections):
+                task.cancel()
+        asyncio.run_coroutine_threadsafe(stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def server_close(self):
+        self.pool.shutdown(wait=False)
+
+    async def handle_connection(self, reader, writer):
+        import asyncio
+        from time import strftime
+        task = asyncio.current_task()
+        self.connections.add(task)
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.keep_alive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if request_line == b"":
+                    break
+                request_line = request_line.decode("iso-8859-1").rstrip("\r\n")
+                if request_line == "":
+                    # Tolerate stray newlines between requests
+                    continue
+
+                parts = request_line.split()
+                if len(parts) != 3:
+                    await self.write_response(writer, (400, {}, b"Bad request line"), False)
+                    break
+                method, target, version = parts
+
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("iso-8859-1").rstrip("\r\n")
+                    if line == "":
+                        break
+                    key, _, val = line.partition(":")
+                    headers[key.strip()] = val.strip()
+                headers_lower = {k.lower(): v for k,v in headers.items()}
+
+                if "chunked" in headers_lower.get("transfer-encoding", "").lower():
+                    await self.write_response(writer, (501, {}, b"Chunked requests are not supported"), False)
+                    break
+                length = int(headers_lower.get("content-length", "0"))
+                body = await reader.readexactly(length)
+
+                connection = headers_lower.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keep_alive = connection == "keep-alive"
+                else:
+                    keep_alive = connection != "close"
+
+                async with self.pending:
+                    response = await self.dispatch(method, target, body, headers)
+                await self.write_response(writer, response, keep_alive)
+                if self.do_logging:
+                    sys.stderr.write(f'{peer[0] if peer else "-"} - - [{strftime("%d/%b/%Y %H:%M:%S")}] "{request_line}" {response[0]} -\n')
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            log.error("Some problem in handling HTTP connection", exc_info=exc)
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    async def dispatch(self, method, target, body, headers):
+        import asyncio
+        future = Future()
+        request_id = str(uuid4())
+        self.zef["open_requests"][request_id] = future
+
+        splits = target.split("?", maxsplit=1)
+        d = {
+            "request_id": request_id,
+            "server_uuid": self.zef["server_uuid"],
+            "method": method,
+            "path":   splits[0],
+            "params":   splits[1] if len(splits) == 2 else "",
+            "request_body":   body,
+            "request_headers": headers,
+        }
+        def push_request():
+            try:
+                d | push[self.zef["stream"]] | run
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+
+        try:
+            # The handler pipeline runs on the worker pool. The response can
+            # arrive from any thread through FX.HTTP.SendResponse.
+            self.loop.run_in_executor(self.pool, push_request)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=15.0)
+        except asyncio.TimeoutError:
+            log.error("Timed out handling REST request")
+            return (500, {}, b"Internal timeout")
+        except Exception as exc:
+            log.error("Some problem in handling HTTP request", exc_info=exc)
+            return (500, {}, None)
+        finally:
+            self.zef["open_requests"].pop(request_id, None)
+
+    async def write_response(self, writer, response, keep_alive):
+        from http.server import BaseHTTPRequestHandler
+        from email.utils import formatdate
+        status,headers,msg = response
+        # As with Handler, a message for a non-200 status goes into the status
+        # line and only a 200 has a body.
+        if status != 200 and msg is not None:
+            reason = msg.decode('utf-8').replace("\r", " ").replace("\n", " ")
+        else:
+            reason = BaseHTTPRequestHandler.responses.get(status, ("",))[0]
+        body = msg if status == 200 and msg is not None else b""
+
+        lines = [f"HTTP/1.1 {status} {reason}",
+                 f"Date: {formatdate(usegmt=True)}"]
+        header_names = set()
+        for key,val in headers.items():
+            lines.append(f"{key}: {val}")
+            header_names.add(key.lower())
+        if "content-length" not in header_names:
+            lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1") + body)
+        await writer.drain()
+
+
+def make_http_server(eff: dict, bind_address, port, do_logging):
+    engine = eff.get('engine', "threaded")
+    if engine == "threaded":
+        return OurHTTPServer((bind_address, port), Handler, do_logging=do_logging)
+    elif engine == "asyncio":
+        return AsyncHTTPServer((bind_address, port),
+                               do_logging=do_logging,
+                               workers=eff.get('workers', 32),
+                               max_pending=eff.get('max_pending', None),
+                               keep_alive_timeout=eff.get('keep_alive_timeout', 15.0))
+    else:
+        raise ValueError(f"Unknown HTTP server engine {engine!r}, expected 'threaded' or 'asyncio'")
+
+
+
 def http_start_server_handler(eff: dict):
     """[summary]
 
@@ -123,6 +310,9 @@ def http_start_server_handler(eff: dict):
     or
             "pipe_into": map[middleware_worker[[permit_cors, custom_handle, fallback_not_found, send_response]] | subscribe[run],
             "logging": True or "Graph" or "Stream"
+            "engine": "threaded" or "asyncio", (default = "threaded")
+            "workers": 32, (asyncio only: threads running pipe_into)
+            "max_pending": 128, (asyncio only: default = 4 * workers)
         }
     """
     # print(f"http_start_server called for effect: {eff}")
@@ -148,7 +338,7 @@ def http_start_server_handler(eff: dict):
             "port": port
         }
 
-        server = OurHTTPServer((bind_address, port), Handler, do_logging=do_logging)
+        server = make_http_server(eff, bind_address, port, do_logging)
         zef_locals["server"] = server
         server.zef = zef_locals
 
@@ -176,6 +366,63 @@ def http_stop_server_handler(eff: dict):
     return {}
     
 
+# Connection pools are kept per scheme and host so that connections, including
+# their TLS setup, are reused by later requests to the same host. Only the
+# adapters are shared: each thread gets its own session mounting them, and
+# sessions never store cookies, so one request cannot leak state into another.
+_http_adapters = {}
+_http_adapters_lock = threading.Lock()
+_http_thread_sessions = threading.local()
+_http_pool_size = 64
+
+def _http_session(url):
+    import requests
+    from http.cookiejar import DefaultCookiePolicy
+    from urllib.parse import urlsplit
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    sessions = getattr(_http_thread_sessions, "sessions", None)
+    if sessions is None:
+        sessions = _http_thread_sessions.sessions = {}
+    session = sessions.get(key, None)
+    if session is None:
+        with _http_adapters_lock:
+            adapter = _http_adapters.get(key, None)
+            if adapter is None:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=_http_pool_size)
+                _http_adapters[key] = adapter
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.mount(f"{parts.scheme}://{parts.netloc}", adapter)
+        sessions[key] = session
+    return session
+
+def _perform_http_request(eff: dict):
+    import requests
+    from time import sleep
+    request_url = eff['url']
+    request_method = eff.get('method', 'GET')
+    retries = eff.get('retries', 0)
+    retry_backoff = eff.get('retry_backoff', 0.5)
+    retry_on_status = eff.get('retry_on_status', [429, 502, 503, 504])
+
+    session = _http_session(request_url)
+    for attempt in range(retries + 1):
+        try:
+            response = session.request(request_method,
+                                       request_url,
+                                       data = eff.get('data', {}),
+                                       params = eff.get('params', {}),
+                                       headers = eff.get('headers', None),
+                                       timeout = eff.get('timeout', None))
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code not in retry_on_status or attempt == retries:
+                return {"response_text": response.text, "response_status": response.status_code}
+        sleep(retry_backoff * 2**attempt)
+
 def http_send_request_handler(eff: dict):
     """[summary]
 
@@ -186,20 +433,43 @@ def http_send_request_handler(eff: dict):
                 "method": "GET",           # Optional
                 "data":   {},              # Optional
                 "params": {},              # Optional
+                "headers": {},             # Optional
+                "timeout": 10.0,           # Optional, in seconds
+                "retries": 3,              # Optional, default = 0
+                "retry_backoff": 0.5,      # Optional, seconds before the first retry, doubled for each retry after
+                "retry_on_status": [429, 502, 503, 504],  # Optional
         }
+    Connection errors, timeouts and the statuses in retry_on_status are retried.
     """
-    # TODO needs more testing and improvements
-    import requests
-    request_url = eff['url']
-    request_method = eff.get('method', 'GET')
-    request_data = eff.get('data', {})
-    request_params = eff.get('params', {})
+    return _perform_http_request(eff)
+
+def http_send_request_batch_handler(eff: dict):
+    """Issues many requests concurrently over the pooled sessions.
 
-    method_dict =  {'GET': requests.get, 'POST': requests.post, 'PUT': requests.put, 'DELETE': requests.delete, 'HEAD': requests.head}
-    request_obj = method_dict[request_method]
-    response = request_obj(url = request_url, data = request_data, params = request_params)
+    Args:
+        eff (Effect): {
+                "type":     FX.HTTP.RequestBatch,       # Required
+                "requests": [{"url": "url", ...}, ...], # Required, same fields as FX.HTTP.Request
+                "concurrency": 16,                      # Optional
+                "timeout": 10.0,                        # Optional, default for all requests
+                "retries": 3,                           # Optional, default for all requests
+        }
+    The response contains the results in the same order as the requests, with
+    an Error in place of each request that failed:
+    {"responses": [{"response_text": ..., "response_status": 200}, Error(...), ...]}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    shared = {key: eff[key] for key in ["headers", "timeout", "retries", "retry_backoff", "retry_on_status"] if key in eff}
+
+    def send_one(request):
+        try:
+            return _perform_http_request({**shared, **request})
+        except Exception as exc:
+            return Error(f"executing request in FX.HTTP.RequestBatch to {request.get('url', None)}: {repr(exc)}")
 
-    return {"response_text": response.text, "response_status": response.status_code}
+    with ThreadPoolExecutor(max_workers=eff.get('concurrency', 16)) as pool:
+        responses = list(pool.map(send_one, eff['requests']))
+    return {"responses": responses}
     
 def http_send_response_handler(eff: Effect):
     d = eff
@@ -208,7 +478,9 @@ def http_send_response_handler(eff: Effect):
         return Error(f"An FX.HTTP.SendResponse event must contain a 'server_uuid' field. This was not the case for eff={eff}")
 
     d = _effects_processes[eff["server_uuid"]]
-    future = d["open_requests"][eff["request_id"]]
+    future = d["open_requests"].get(eff["request_id"], None)
+    if future is None:
+        return Error(f"No open request with request_id {eff['request_id']}: it may have timed out already")
 
     # if "response" not in eff:
     #     print(f"Warning: FX.HTTP.SendResponse wish did not contain 'response' field. This is probably an error. Received wish: {eff}")
@@ -13,13 +13,12 @@
 # limitations under the License.
 
 from .fx_types import Effect
-from ..VT import Error, Image
+from ..VT import Error, Image, ZefGenerator
 from .. import internals
-import yaml 
 import json 
-import toml
-import pandas as pd
 import io
+# yaml, toml, pandas and watchdog are only imported by the handlers that need
+# them, as they take a noticeable part of the time to import zef.
 
 #TODO Docstring!
 
@@ -107,10 +106,13 @@ def load_localfile_handler(eff: Effect):
             with open(filename, "rb") as f:
                 content = f.read()  
             if format in {"yaml", "yml"}:
+                import yaml
                 content = yaml.safe_load(content)
             elif format == "toml":
+                import toml
                 content = toml.loads(content)
             elif format == "csv":
+                import pandas as pd
                 content = pd.read_csv(io.StringIO(content), **settings)
             elif format == "json":
                 content = json.loads(content)
@@ -121,6 +123,70 @@ def load_localfile_handler(eff: Effect):
 
 
 
+def stream_localfile_handler(eff: Effect):
+    """
+    Streaming counterpart to FX.LocalFile.Load for files that are too large to
+    be parsed in one go. Running the effect does not touch the file: the
+    "content" is a lazy ZefGenerator which opens the file on iteration and
+    yields one parsed chunk of at most `chunk_size` records at a time.
+    >>> FX.LocalFile.Stream(filename='events.ndjson', chunk_size=10_000)
+
+    Supported formats and the chunks they yield:
+    - ndjson / jsonl: a list of dicts, one per line
+    - csv: a pandas DataFrame (settings are passed on to pd.read_csv)
+    - parquet: a pandas DataFrame (requires pyarrow)
+
+    Response example:
+    {
+        'content': ZefGenerator,
+        'format': 'ndjson',
+        'filename': 'events.ndjson',
+    }
+    """
+    try:
+        filename   = eff["filename"]
+        settings   = eff.get("settings", {})
+        format     = eff.get("format", None)
+        chunk_size = eff.get("chunk_size", 10_000)
+
+        if not format:
+            if "." not in filename: return Error.ValueError("filename is missing an extension and a format wasn't provided!", filename)
+            else: format = filename[filename.rindex(".") + 1:]
+        elif "." not in filename: filename = filename + f".{format}"
+
+        if chunk_size < 1: return Error.ValueError("chunk_size must be a positive integer", chunk_size)
+
+        if format in {"ndjson", "jsonl"}:
+            def chunks():
+                chunk = []
+                with open(filename, "rb") as f:
+                    for line in f:
+                        if line.strip() == b"": continue
+                        chunk.append(json.loads(line))
+                        if len(chunk) == chunk_size:
+                            yield chunk
+                            chunk = []
+                if chunk: yield chunk
+        elif format == "csv":
+            def chunks():
+                import pandas as pd
+                with pd.read_csv(filename, chunksize=chunk_size, **settings) as reader:
+                    yield from reader
+        elif format == "parquet":
+            def chunks():
+                import pyarrow.parquet as pq
+                with pq.ParquetFile(filename) as pf:
+                    for batch in pf.iter_batches(batch_size=chunk_size, **settings):
+                        yield batch.to_pandas()
+        else:
+            return Error.NotImplementedError(f'Unsupported streaming of file type {format}!')
+
+        return {"content": ZefGenerator(chunks), "format": format, "filename": filename}
+    except Exception as e:
+        return Error(f'executing FX.LocalFile.Stream for effect {eff}:\n{repr(e)}')
+
+
+
 def save_localfile_handler(eff: Effect):
     """
     Example Effect
@@ -146,8 +212,10 @@ def save_localfile_handler(eff: Effect):
         elif "." in filename:
             format = filename[filename.rindex(".") + 1:]
             if format in {"yaml", "yml"}:
+                import yaml
                 with open(filename, 'w') as f: f.write(yaml.safe_dump(content))
             elif format == "toml":
+                import toml
                 with open(filename, 'w') as f: f.write(toml.dumps(content))
             elif format == "csv":
                 with open(filename, 'w') as f: f.write(content.to_csv(**settings))
@@ -209,29 +277,33 @@ def system_open_with_handler(eff: Effect):
 
 
 
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-class ZefEventHandler(FileSystemEventHandler):
-    def __init__(self, created = None, modified = None, moved = None, deleted = None):
-        super().__init__()
-        self.created = created
-        self.modified = modified
-        self.moved = moved
-        self.deleted = deleted
-    def on_created(self, event):
-        super().on_created(event)
-        if self.created: self.created(event)
+from functools import lru_cache
+@lru_cache(maxsize=None)
+def _zef_event_handler_class():
+    # Defined on first use so that watchdog is only imported when a path is monitored.
+    from watchdog.events import FileSystemEventHandler
+    class ZefEventHandler(FileSystemEventHandler):
+        def __init__(self, created = None, modified = None, moved = None, deleted = None):
+            super().__init__()
+            self.created = created
+            self.modified = modified
+            self.moved = moved
+            self.deleted = deleted
+        def on_created(self, event):
+            super().on_created(event)
+            if self.created: self.created(event)
+            
+        def on_modified(self, event):
+            super().on_modified(event)
+            if self.modified: self.modified(event)
+        def on_moved(self, event):
+            super().on_moved(event)
+            if self.moved: self.moved(event)
         
-    def on_modified(self, event):
-        super().on_modified(event)
-        if self.modified: self.modified(event)
-    def on_moved(self, event):
-        super().on_moved(event)
-        if self.moved: self.moved(event)
-    
-    def on_deleted(self, event):
-        super().on_deleted(event)
-        if self.deleted: self.deleted(event)
+        def on_deleted(self, event):
+            super().on_deleted(event)
+            if self.deleted: self.deleted(event)
+    return ZefEventHandler
 
 def monitor_path_handler(eff: Effect):
     """
@@ -262,8 +334,9 @@ def monitor_path_handler(eff: Effect):
     moved_handler = eff.get("moved_handler", None)
     deleted_handler = eff.get("deleted_handler", None)
 
-    event_handler = ZefEventHandler(created = created_handler, modified = modified_handler, moved = moved_handler, deleted = deleted_handler)
+    event_handler = _zef_event_handler_class()(created = created_handler, modified = modified_handler, moved = moved_handler, deleted = deleted_handler)
 
+    from watchdog.observers import Observer
     observer = Observer()
     observer.schedule(event_handler, path, recursive=recursive)
     observer.start()
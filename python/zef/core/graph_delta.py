@@ -73,6 +73,8 @@ for t in [list, tuple]:
 
 import os
 gd_timing = "ZEFDB_GRAPH_DELTA_TIMING" in os.environ
+# Setting this falls back to applying every command individually from python.
+gd_no_bulk_apply = "ZEFDB_GRAPH_DELTA_NO_BULK_APPLY" in os.environ
 
 ##############################
 # * Description
@@ -1075,38 +1077,18 @@ def verify_and_compact_commands(cmds: tuple):
                         | collect
                         )
 
-    def make_debug_output():
-        num_done = 0
-        next_print = now()+5*seconds
-        def debug_output(x):
-            nonlocal num_done, next_print
-            num_done += 1
-            if now() > next_print:
-                log.debug("Compacting:", num_done=num_done, num_input=len(x['state']['input']), num_output=len(x['state']['output']))
-                next_print = now() + 5*seconds
-        return debug_output
-
-    state_initial = {
-        'input': sorted_cmds,
-        'output': (),
-        'known_ids': set(),
-    }
-    state_final = (
-        {"state": state_initial, "num_changed": -1}
-        | iterate[resolve_dag_ordering_step] 
-        | (tap[make_debug_output()] if gd_timing else identity)
-        | take_until[lambda s: s["num_changed"] == 0]
-        # | map[tap[print]]
-        | last
-        | get["state"]
-        | collect
-    )
-    # print("Done state_final", now())
-    if len(state_final['input']) > 0:
+    ordered_cmds, unresolved_cmds = resolve_dag_ordering(sorted_cmds)
+    if gd_timing:
+        log.debug("Compacting: done", num_output=len(ordered_cmds), num_unresolved=len(unresolved_cmds))
+    if len(unresolved_cmds) > 0:
         import json
+        state_final = {
+            'input': unresolved_cmds,
+            'output': ordered_cmds,
+            'known_ids': {this_id for cmd in ordered_cmds for this_id in get_ids(cmd)},
+        }
         print(json.dumps(state_final, indent=4, default=repr))
         raise NotImplementedError("Error constructing GraphDelta: instantiation order iteration did not converge. Probably there is a circular dependency in the required imperative instantiation order between inter-dependent relations. This is a valid GraphDelta in principle, but currently not implemented in zefDB.")
-    ordered_cmds = state_final['output']
     return ordered_cmds
 
 @func
@@ -1239,48 +1221,114 @@ def id_from_ref(obj):
 
     raise Exception(f"Shouldn't get here: {obj}")
 
-def resolve_dag_ordering_step(arg: dict)->dict:
-    # arg is "state" + "num_changed"
-    state = arg["state"]
-    ids = state['known_ids']        
-    input = state['input']
-    
-    def can_be_executed(cmd):        
-        if cmd['cmd'] == 'instantiate':
-            # If we are creating an RT, wait until both source/target exist
-            return not isinstance(cmd['rae_type'], RT) or (cmd['source'] in ids and cmd['target'] in ids)
-        if cmd['cmd'] == 'merge':
-            # If the merge is of a relation, we need both source and target to exist already
-            return not isinstance(cmd['origin_rae'], Relation) or (id_from_ref(cmd['origin_rae'].d["source"]) in ids and id_from_ref(cmd['origin_rae'].d["target"]) in ids)
+def command_dependencies(cmd) -> list:
+    """The ids that have to be known (i.e. created by an earlier command)
+    before `cmd` can be executed. Terminates are handled separately in
+    `resolve_dag_ordering`, as they depend on other commands, not on ids."""
+    if cmd['cmd'] == 'instantiate':
+        # If we are creating an RT, wait until both source/target exist
+        if isinstance(cmd['rae_type'], RT):
+            return [cmd['source'], cmd['target']]
+        return []
+    if cmd['cmd'] == 'merge':
+        # If the merge is of a relation, we need both source and target to exist already
+        if isinstance(cmd['origin_rae'], Relation):
+            return [id_from_ref(cmd['origin_rae'].d["source"]), id_from_ref(cmd['origin_rae'].d["target"])]
+        return []
+    if cmd['cmd'] == 'terminate':
+        return []
+    if cmd['cmd'] == 'assign':
+        # The object to be assigned needs to exist.
+        return [get_id(cmd)]
+    if cmd['cmd'] == 'set_field':
+        # This is where things get tricky - the behaviour of set_field
+        # can change if there is another command that creates a relation of
+        # the same type.
+        #
+        # TODO: this properly! I can see issues with assignments to the same
+        # object via different IDs causing massive headaches here. Need to
+        # consider aliasing and also consider multiple set_field commands.
+        #
+        # For now, just make sure the source is alive and run with that.
+        return [cmd['source_id']]
+    if cmd['cmd'] == 'tag':
+        return [get_id(cmd)]
+    raise Exception(f"Don't know how to decide DAG ordering for command {cmd['cmd']}")
+
+
+def resolve_dag_ordering(cmds: tuple) -> tuple:
+    """
+    Orders the commands so that every command comes after the commands
+    creating the ids it depends on. Returns the ordered commands and the
+    commands that could not be ordered (circular or missing dependencies).
+
+    The result is the same as repeatedly moving all currently executable
+    commands to the output ("rounds"), with each round keeping the input
+    order. Instead of rescanning the input for every round, this assigns
+    each command its round directly from a dependency graph: commands are
+    processed in order of their round with a heap, and ids are indexed to
+    the commands waiting on them. A terminate has to wait until every
+    non-terminate command sharing one of its ids has been output.
+    """
+    import heapq
+
+    n = len(cmds)
+    cmd_ids = [get_ids(cmd) for cmd in cmds]
+
+    # id -> indices of commands that can only run once this id is known
+    waiting_on_id = {}
+    # index -> indices of terminates that have to wait for this command
+    waiting_on_cmd = {}
+    num_pending = [0] * n
+    round_of = [0] * n
+
+    creators_by_id = {}
+    for i,cmd in enumerate(cmds):
+        if cmd['cmd'] != 'terminate':
+            for this_id in cmd_ids[i]:
+                creators_by_id.setdefault(this_id, []).append(i)
+
+    for i,cmd in enumerate(cmds):
         if cmd['cmd'] == 'terminate':
-            # Don't terminate if there an upcoming operation that will create this item
-            return all(my_id not in get_ids(other) for other in input for my_id in get_ids(cmd) if other['cmd'] != 'terminate')
-        if cmd['cmd'] == 'assign':
-            # The object to be assigned needs to exist.
-            return get_id(cmd) in ids
-        if cmd['cmd'] == 'set_field':
-            # This is where things get tricky - the behaviour of set_field
-            # can change if there is another command that creates a relation of
-            # the same type.
-            #
-            # TODO: this properly! I can see issues with assignments to the same
-            # object via different IDs causing massive headaches here. Need to
-            # consider aliasing and also consider multiple set_field commands.
-            #
-            # For now, just make sure the source is alive and run with that.
-            return cmd['source_id'] in ids
-        if cmd['cmd'] == 'tag':
-            return get_id(cmd) in ids
-        raise Exception(f"Don't know how to decide DAG ordering for command {cmd['cmd']}")
-    (_,can), (_,cannot) = state['input'] | group_by[can_be_executed][[True, False]] | collect
-    return {
-        "state": {
-            'input': tuple(cannot),
-            'output': (*state['output'], *can),
-            'known_ids': {*state['known_ids'], *(can | map[get_ids] | concat)},
-        },
-        "num_changed": len(can) > 0
-    }
+            blockers = {j for this_id in cmd_ids[i] for j in creators_by_id.get(this_id, [])}
+            for j in blockers:
+                waiting_on_cmd.setdefault(j, []).append(i)
+            num_pending[i] = len(blockers)
+        else:
+            deps = set(command_dependencies(cmd))
+            for dep in deps:
+                waiting_on_id.setdefault(dep, []).append(i)
+            num_pending[i] = len(deps)
+
+    heap = [(0, i) for i in range(n) if num_pending[i] == 0]
+    heapq.heapify(heap)
+    known_ids = set()
+    done = []
+
+    def release(j, this_round):
+        round_of[j] = max(round_of[j], this_round)
+        num_pending[j] -= 1
+        if num_pending[j] == 0:
+            heapq.heappush(heap, (round_of[j], j))
+
+    while len(heap) > 0:
+        this_round,i = heapq.heappop(heap)
+        done.append(i)
+        # Anything released by this command can run in the following round
+        for this_id in cmd_ids[i]:
+            if this_id in known_ids:
+                continue
+            known_ids.add(this_id)
+            for j in waiting_on_id.pop(this_id, []):
+                release(j, this_round + 1)
+        for j in waiting_on_cmd.get(i, []):
+            release(j, this_round + 1)
+
+    done.sort(key=lambda i: (round_of[i], i))
+    done_set = set(done)
+    ordered = tuple(cmds[i] for i in done)
+    unresolved = tuple(cmd for i,cmd in enumerate(cmds) if i not in done_set)
+    return ordered, unresolved
     
         
 
@@ -1390,6 +1438,81 @@ def unpack_receipt(unpacking_template, receipt: dict):
 # * Performing transaction
 #------------------------------------------------
 
+class BulkApplyBatch:
+    """
+    Collects consecutive instantiate/assign commands so they can be handed to
+    the C++ core in a single `internals.apply_bulk_commands` call, instead of
+    one python dispatch per command. Any command which can't be expressed in
+    the batch (merge, terminate, set_field, tag, references to RAEs that are
+    not known yet, ...) makes the caller flush and use the regular path.
+    """
+    def __init__(self, d_raes: dict):
+        self.d_raes = d_raes
+        self.ops = []
+        self.ids = []           # the ids to record in d_raes for each op
+        self.pending = {}       # id -> index into ops, for ids not flushed yet
+        self.aet_tokens = {}    # id -> AET token, for AEs instantiated via the batch
+
+    def _ref(self, this_id):
+        if this_id in self.pending:
+            return self.pending[this_id]
+        return self.d_raes.get(this_id, None)
+
+    def try_add(self, cmd) -> bool:
+        if cmd['cmd'] == 'instantiate':
+            raet = cmd['rae_type']
+            if is_a(raet, RT):
+                src = self._ref(cmd['source'])
+                trg = self._ref(cmd['target'])
+                if src is None or trg is None:
+                    return False
+                op = ('r', internals.get_c_token(raet), src, trg)
+            elif is_a(raet, ET):
+                op = ('e', internals.get_c_token(raet))
+            elif is_a(raet, AET):
+                token = internals.get_c_token(raet)
+                op = ('a', token)
+                for this_id in get_ids(cmd):
+                    self.aet_tokens[this_id] = token
+            else:
+                return False
+
+        elif cmd['cmd'] == 'assign':
+            this_id = cmd['internal_id']
+            if 'value' not in cmd or not isinstance(cmd['value'], shorthand_scalar_types):
+                return False
+            # Only AEs whose type we know from this path: anything else needs
+            # the checks and serialization of assign_value_imp.
+            token = self.aet_tokens.get(this_id, None)
+            if token is None or token.rep_type == internals.VRT.Serialized:
+                return False
+            ae = self._ref(this_id)
+            if ae is None:
+                return False
+            op = ('v', ae, cmd['value'])
+
+        else:
+            return False
+
+        ids = get_ids(cmd)
+        for this_id in ids:
+            self.pending[this_id] = len(self.ops)
+        self.ops.append(op)
+        self.ids.append(ids)
+        return True
+
+    def flush(self, g):
+        if len(self.ops) == 0:
+            return
+        results = internals.apply_bulk_commands(g, self.ops)
+        for ids,zz in zip(self.ids, results):
+            for this_id in ids:
+                self.d_raes[this_id] = zz
+        self.ops = []
+        self.ids = []
+        self.pending = {}
+
+
 def perform_transaction_commands(commands: list, g: Graph):
     d_raes = {}  # keep track of instantiated RAEs with temp ids            
     try:
@@ -1397,6 +1520,7 @@ def perform_transaction_commands(commands: list, g: Graph):
             # TODO: Have to change the behavior of Transaction(g) later I suspect
             frame_now = GraphSlice(tx_now)
             d_raes['tx'] = tx_now
+            batch = BulkApplyBatch(d_raes)
 
             next_print = now()+5*seconds
             for i,cmd in enumerate(commands):
@@ -1405,6 +1529,10 @@ def perform_transaction_commands(commands: list, g: Graph):
                         log.debug("Perform", i=i, total=len(commands))
                         next_print = now() + 5*seconds
 
+                if not gd_no_bulk_apply and batch.try_add(cmd):
+                    continue
+                batch.flush(g)
+
                 zz = None
                 
                 # print(f"{i}/{len(g_delta.commands)}: {g.graph_data.write_head * 16 / 1024 / 1024} MB")
@@ -1579,6 +1707,8 @@ def perform_transaction_commands(commands: list, g: Graph):
                 for this_id in get_ids(cmd):
                     d_raes[this_id] = zz
 
+            batch.flush(g)
+
         # There is a weird edge case here - if a node is asked to be merged
         # in, but already existed on the graph AND there were no changes,
         # causing the transaction to be rolled-back, then the reference
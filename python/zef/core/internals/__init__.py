@@ -68,6 +68,7 @@ from ...pyzef.internals import (
     all_entity_types,
     all_enum_types_and_values,
     all_relation_types,
+    apply_bulk_commands,
     apply_update,
     blob_to_json,
     compress_zstd,
@@ -121,19 +122,22 @@ from ...pyzef.internals import (
     search_value_node,
     set_data_layout_version_info,
     set_graph_revision_info,
+    set_upstream_zstd_dictionary,
     show_blob_details,
     size_of_blob,
     start_connection,
     stop_butler,
     stop_connection,
     to_uid,
+    train_zstd_dictionary,
     validate_message_version,
     value_hash,
     wait_for_auth,
 )
 
 from ...pyzef.verification import (
-    verify_graph
+    verify_graph,
+    verify_graph_parallel,
 )
 from ...pyzef.zefops import (
     SerializedValue
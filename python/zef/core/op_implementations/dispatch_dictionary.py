@@ -47,6 +47,8 @@ _op_to_functions = {
         internals.RT.SelectKeys:     (select_keys_imp, None),
         internals.RT.Modulo:         (modulo_imp, None),
         internals.RT.SelectByField:  (select_by_field_imp, select_by_field_tp),
+        internals.RT.FieldColumns:   (field_columns_imp, field_columns_tp),
+        internals.RT.Lookup:         (lookup_imp, lookup_tp),
         internals.RT.Without:        (without_imp, without_tp),
         internals.RT.First:          (first_imp, first_tp),
         internals.RT.Second:         (second_imp, second_tp),
@@ -250,6 +252,7 @@ _op_to_functions = {
 
         internals.RT.ReadFile:            (read_file_imp, read_file_tp),
         internals.RT.LoadFile:            (load_file_imp, load_file_tp),
+        internals.RT.StreamFile:          (stream_file_imp, stream_file_tp),
         internals.RT.WriteFile:           (write_file_imp, write_file_tp),
         internals.RT.SaveFile:            (save_file_imp, save_file_tp),
 
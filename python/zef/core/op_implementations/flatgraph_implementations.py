@@ -25,11 +25,16 @@ from .._ops import *
 from ..logger import log
 from ...pyzef import zefops as pyzefops, main as pymain
 from .. import internals
+from ..flat_graph import FlatGraphBuilder
 from typing import Generator, Iterable, Iterator
 
 
 #-----------------------------FlatGraph Implementations-----------------------------------
 def fg_insert_imp(fg, new_el):
+    assert is_a(fg, FlatGraph)
+    return FlatGraphBuilder(fg).insert(new_el).freeze()
+
+def fg_insert_into_builder(builder, new_el):
     from ..graph_delta import map_scalar_to_aet_type, shorthand_scalar_types, PleaseAssign
     from ...pyzef.internals import DelegateRelationTriple
 
@@ -51,96 +56,86 @@ def fg_insert_imp(fg, new_el):
             raise Exception(f"Need to implement code for type {rae}")
         return names[0] if names else None
 
-    assert is_a(fg, FlatGraph)
-    new_fg = FlatGraph()
-    new_blobs, new_key_dict = [*fg.blobs], {**fg.key_dict}
-    def idx_generator(n):
-        def next_idx():
-            nonlocal n
-            n = n + 1
-            return n
-        return next_idx
-
-    next_idx = idx_generator(length(fg.blobs) - 1)
+    fg = builder.origin
+    next_idx = builder.next_idx
+    add_edge = builder.add_edge
 
     def inner_zefop_type(zefop, rt):
         return peel(zefop)[0][0] == rt
 
     def construct_abstract_rae_and_return_idx(rae_type, rae_uid):
         if isinstance(rae_type, RT):
-            assert rae_uid in new_key_dict, "Can't construct an Abstract Relation!"
-            return new_key_dict[rae_uid]
+            assert rae_uid in builder.key_dict, "Can't construct an Abstract Relation!"
+            return builder.key_dict[rae_uid]
         else:
             rae_class = AttributeEntityRef if isinstance(rae_type, AET) else EntityRef
             return common_logic(rae_class({"type": rae_type, "uid": rae_uid}))
 
     def common_logic(new_el):
-        nonlocal new_blobs, new_key_dict
-
         if is_a(new_el, shorthand_scalar_types):
             aet = map_scalar_to_aet_type(new_el)
             idx = next_idx()
-            new_blobs.append((idx, aet, [], None, new_el))
+            builder.append((idx, aet, [], None, new_el))
 
         elif is_a(new_el, (ZefRef, EZefRef)):
             idx = common_logic(discard_frame(new_el))
-            if isinstance(new_blobs[idx][1], AET) and isinstance(new_el, ZefRef):
-                new_blobs[idx] = (*new_blobs[idx][:4], value(new_el))
+            if isinstance(builder.blobs[idx][1], AET) and isinstance(new_el, ZefRef):
+                builder.blobs[idx] = (*builder.blobs[idx][:4], value(new_el))
 
         elif is_a(new_el, Delegate):
             if isinstance(new_el.item, DelegateRelationTriple):
-                if new_el in new_key_dict:
-                    idx = new_key_dict[new_el]
+                if new_el in builder.key_dict:
+                    idx = builder.key_dict[new_el]
                 else:
                     src, rt, trgt = source(new_el), new_el.item.rt, target(new_el)
                     src_idx = common_logic(src)
                     trgt_idx = common_logic(trgt)
                     idx = next_idx()
 
-                    new_blobs.append((idx, new_el, [], None, src_idx, trgt_idx))
-                    if idx not in new_blobs[src_idx][2]: new_blobs[src_idx][2].append(idx)
-                    if idx not in new_blobs[trgt_idx][2]: new_blobs[trgt_idx][2].append(-idx)
-                    new_key_dict[new_el] = idx
+                    builder.append((idx, new_el, [], None, src_idx, trgt_idx))
+                    add_edge(src_idx, idx)
+                    add_edge(trgt_idx, -idx)
+                    builder.key_dict[new_el] = idx
             else:
                 internal_id = internal_name(new_el)
                 new_el = without_names(new_el)
-                if new_el in new_key_dict:
-                    idx = new_key_dict[new_el]
+                if new_el in builder.key_dict:
+                    idx = builder.key_dict[new_el]
                 else:
                     idx = next_idx()
-                    if internal_id: new_key_dict[internal_id] = idx
-                    new_key_dict[new_el] = idx
-                    new_blobs.append((idx, new_el, [], None))
+                    if internal_id: builder.key_dict[internal_id] = idx
+                    builder.key_dict[new_el] = idx
+                    builder.append((idx, new_el, [], None))
 
         elif is_a(new_el, EntityRef):
             node_type, node_uid = new_el.d['type'], new_el.d['uid']
-            if node_uid not in new_key_dict:
+            if node_uid not in builder.key_dict:
                 idx = next_idx()
-                new_blobs.append((idx, node_type, [], node_uid))
-                new_key_dict[node_uid] = idx
-            idx = new_key_dict[node_uid]
+                builder.append((idx, node_type, [], node_uid))
+                builder.key_dict[node_uid] = idx
+            idx = builder.key_dict[node_uid]
 
         elif is_a(new_el, AttributeEntityRef):
             node_type, node_uid = new_el.d['type'], new_el.d['uid']
-            if node_uid not in new_key_dict:
+            if node_uid not in builder.key_dict:
                 idx = next_idx()
-                new_blobs.append((idx, node_type, [], node_uid, None))
-                new_key_dict[node_uid] = idx
-            idx = new_key_dict[node_uid]
+                builder.append((idx, node_type, [], node_uid, None))
+                builder.key_dict[node_uid] = idx
+            idx = builder.key_dict[node_uid]
 
         elif is_a(new_el, ET):
             idx = next_idx()
             internal_id = internal_name(new_el)
             new_el = without_names(new_el)
-            if internal_id: new_key_dict[internal_id] = idx
-            new_blobs.append((idx, new_el, [], None))
+            if internal_id: builder.key_dict[internal_id] = idx
+            builder.append((idx, new_el, [], None))
 
         elif is_a(new_el, AET):
             idx = next_idx()
             internal_id = internal_name(new_el)
             new_el = without_names(new_el)
-            if internal_id: new_key_dict[internal_id] = idx
-            new_blobs.append((idx, new_el, [], None, None))
+            if internal_id: builder.key_dict[internal_id] = idx
+            builder.append((idx, new_el, [], None, None))
 
         elif is_a(new_el, ZefOp) and inner_zefop_type(new_el, RT.Instantiated):
             raise ValueError("!!!!SHOULD NO LONGER ARRIVE HERE!!!!")
@@ -150,11 +145,8 @@ def fg_insert_imp(fg, new_el):
             idx = None
             if to_be_removed:
                 try:
-                    new_fg = FlatGraph()
-                    new_fg.key_dict = new_key_dict
-                    new_fg.blobs = (*new_blobs,)
-                    new_fg = fg_remove_imp(new_fg, to_be_removed)
-                    new_blobs, new_key_dict = [*new_fg.blobs], {**new_fg.key_dict}
+                    new_fg = fg_remove_imp(builder.freeze(), to_be_removed)
+                    builder.reset(new_fg.blobs, new_fg.key_dict)
                 except KeyError:
                     pass
                 except:
@@ -163,13 +155,13 @@ def fg_insert_imp(fg, new_el):
         # TODO remove this once Z is fully deprecated
         elif is_a(new_el, ZefOp[Z]):
             key = peel(new_el)| first | second | first | collect
-            if key not in new_key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
-            idx = new_key_dict.get(key, key)
+            if key not in builder.key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
+            idx = builder.key_dict.get(key, key)
 
         elif is_a(new_el, NamedAny):
             key = absorbed(new_el) | first | collect
-            if key not in new_key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
-            idx = new_key_dict.get(key, key)
+            if key not in builder.key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
+            idx = builder.key_dict.get(key, key)
 
         # i.e: z4 | assign[42] ; AET.String | assign[42] ; AET.String['z1'] | assign[42] ; Any['n1'] | assign[42]
         elif isinstance(new_el, LazyValue) and is_a(new_el, PleaseAssign):
@@ -178,9 +170,9 @@ def fg_insert_imp(fg, new_el):
 
             if isinstance(first_op, ZefRef) or isinstance(first_op, EZefRef) or is_a(first_op, AttributeEntityRef):
                 idx = common_logic(first_op)
-                assert isinstance(new_blobs[idx][1], AET), f"This key must refer to an AET found {new_blobs[idx][1]}"
+                assert isinstance(builder.blobs[idx][1], AET), f"This key must refer to an AET found {builder.blobs[idx][1]}"
                 aet_value = new_el.value
-                new_blobs[idx] = (*new_blobs[idx][:4], aet_value)
+                builder.blobs[idx] = (*builder.blobs[idx][:4], aet_value)
 
             elif is_a(first_op, AET):
                     internal_id = internal_name(first_op)
@@ -188,26 +180,26 @@ def fg_insert_imp(fg, new_el):
                     assert isinstance(aet_maybe, AET), f"{new_el} should be of type AET"
                     aet_value = new_el.value
                     idx = next_idx()
-                    new_blobs.append((idx, aet_maybe, [], None, aet_value))
-                    if internal_id: new_key_dict[internal_id] = idx
+                    builder.append((idx, aet_maybe, [], None, aet_value))
+                    if internal_id: builder.key_dict[internal_id] = idx
             
             elif is_a(first_op, NamedAny):
                 key = absorbed(first_op) | first | collect
                 aet_value = new_el.value
-                if key not in new_key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
-                idx = new_key_dict.get(key, key)
-                assert isinstance(new_blobs[idx][1], AET), f"This key must refer to an AET found {new_blobs[idx][1]}"
-                new_blobs[idx] = (*new_blobs[idx][:4], aet_value)
+                if key not in builder.key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
+                idx = builder.key_dict.get(key, key)
+                assert isinstance(builder.blobs[idx][1], AET), f"This key must refer to an AET found {builder.blobs[idx][1]}"
+                builder.blobs[idx] = (*builder.blobs[idx][:4], aet_value)
                 
             # TODO remove this once Z is fully deprecated
             elif isinstance(first_op, ZefOp):
                 if inner_zefop_type(first_op, RT.Z):
                     key = peel(first_op)[0][1][0]
                     aet_value = new_el.value
-                    if key not in new_key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
-                    idx = new_key_dict.get(key, key)
-                    assert isinstance(new_blobs[idx][1], AET), f"This key must refer to an AET found {new_blobs[idx][1]}"
-                    new_blobs[idx] = (*new_blobs[idx][:4], aet_value)
+                    if key not in builder.key_dict and not isinstance(key, Int): raise KeyError(f"{key} doesn't exist in internally known ids!")
+                    idx = builder.key_dict.get(key, key)
+                    assert isinstance(builder.blobs[idx][1], AET), f"This key must refer to an AET found {builder.blobs[idx][1]}"
+                    builder.blobs[idx] = (*builder.blobs[idx][:4], aet_value)
                 else:
                     raise ValueError(f"Expected a Z['n1'] <= 42 got {new_el} instead!")
             else:
@@ -216,19 +208,19 @@ def fg_insert_imp(fg, new_el):
         elif isinstance(new_el, Val):
             new_el = new_el.arg
             hash_vn = value_hash(new_el)
-            if hash_vn not in new_key_dict:
+            if hash_vn not in builder.key_dict:
                 idx = next_idx()
-                new_key_dict[hash_vn] = idx
-                new_blobs.append((idx, "BT.ValueNode", [], new_el))  # TODO Don't treat as str once added to Zef types
-            idx = new_key_dict[hash_vn]
+                builder.key_dict[hash_vn] = idx
+                builder.append((idx, "BT.ValueNode", [], new_el))  # TODO Don't treat as str once added to Zef types
+            idx = builder.key_dict[hash_vn]
 
         elif isinstance(new_el, FlatRef):
-            if new_el.fg == fg:
+            if fg is not None and new_el.fg is fg:
                 idx = new_el.idx
             else:
                 # If the flatgraphs are different then merge the FlatGraph in and return the
                 # new index of the blob originally in the other FlatGraph
-                idx = fr_merge_and_retrieve_idx(new_blobs, new_key_dict,next_idx, new_el)
+                idx = fr_merge_and_retrieve_idx(builder, new_el)
         else:
             idx = None
         return idx
@@ -263,15 +255,15 @@ def fg_insert_imp(fg, new_el):
             if isinstance(rt, RT):
                 internal_id = internal_name(rt)
                 rt = without_names(rt)
-                if internal_id: new_key_dict[internal_id] = idx
+                if internal_id: builder.key_dict[internal_id] = idx
 
             # Case of Any['a']
             elif is_a(rt, NamedAny): 
                 raise ValueError(f"Cannot reference an internal element to be used as a Relation. {rt}")
 
-            new_blobs.append((idx, rt, [], None, src_idx, trgt_idx))
-            if idx not in new_blobs[src_idx][2]: new_blobs[src_idx][2].append(idx)
-            if idx not in new_blobs[trgt_idx][2]: new_blobs[trgt_idx][2].append(-idx)
+            builder.append((idx, rt, [], None, src_idx, trgt_idx))
+            add_edge(src_idx, idx)
+            add_edge(trgt_idx, -idx)
         elif is_a(new_el, RelationRef):
             rt = new_el.d['type']
             rt_uid = new_el.d["uid"]
@@ -282,15 +274,15 @@ def fg_insert_imp(fg, new_el):
             src_uid = origin_uid(src)
             trgt_uid = origin_uid(trgt)
 
-            if isinstance(src, Relation) and src_uid not in new_key_dict: raise ValueError("Source of an abstract Relation can't be a Relation that wasn't inserted before!")
-            if isinstance(trgt, Relation) and trgt_uid not in new_key_dict: raise ValueError("Target of an abstract Relation can't be a Relation that wasn't inserted before!")
+            if isinstance(src, Relation) and src_uid not in builder.key_dict: raise ValueError("Source of an abstract Relation can't be a Relation that wasn't inserted before!")
+            if isinstance(trgt, Relation) and trgt_uid not in builder.key_dict: raise ValueError("Target of an abstract Relation can't be a Relation that wasn't inserted before!")
             src_idx = construct_abstract_rae_and_return_idx(rae_type(src), src_uid)
             trgt_idx = construct_abstract_rae_and_return_idx(rae_type(trgt), trgt_uid)
             idx = next_idx()
-            new_blobs.append((idx, rt, [], rt_uid, src_idx, trgt_idx))
-            new_key_dict[rt_uid] = idx
-            if idx not in new_blobs[src_idx][2]: new_blobs[src_idx][2].append(idx)
-            if idx not in new_blobs[trgt_idx][2]: new_blobs[trgt_idx][2].append(-idx)
+            builder.append((idx, rt, [], rt_uid, src_idx, trgt_idx))
+            builder.key_dict[rt_uid] = idx
+            add_edge(src_idx, idx)
+            add_edge(trgt_idx, -idx)
         elif is_a(new_el, Dict): 
                 _insert_dict(new_el)
         else: 
@@ -311,12 +303,10 @@ def fg_insert_imp(fg, new_el):
         _insert_dict(new_el)
     else: 
         _insert_single(new_el)
-        
-    new_fg.key_dict = new_key_dict
-    new_fg.blobs = (*new_blobs,)
-    return new_fg
 
-def fr_merge_and_retrieve_idx(blobs, k_dict, next_idx, fr):
+def fr_merge_and_retrieve_idx(builder, fr):
+    blobs, k_dict = builder.blobs, builder.key_dict
+    next_idx, add_edge = builder.next_idx, builder.add_edge
     fr_idx = fr.idx
     fg2 = fr.fg
 
@@ -336,7 +326,7 @@ def fr_merge_and_retrieve_idx(blobs, k_dict, next_idx, fr):
         else:
             idx = next_idx()
             new_b = (idx, new_b[1], [], *new_b[3:])
-            blobs.append(new_b)
+            builder.append(new_b)
         old_to_new[old_idx] = idx
         return new_b
 
@@ -347,9 +337,9 @@ def fr_merge_and_retrieve_idx(blobs, k_dict, next_idx, fr):
         
         idx = next_idx()
         rt_b = (idx, b[1], [], None, src_b[0], trgt_b[0])
-        src_b[2].append(idx)
-        trgt_b[2].append(-idx)
-        blobs.append(rt_b)
+        builder.append(rt_b)
+        add_edge(src_b[0], idx)
+        add_edge(trgt_b[0], -idx)
         old_to_new[b[0]] = idx
 
             
@@ -412,8 +402,11 @@ def fg_remove_imp(fg, key):
             else: del(kdict[key])
             if issubclass(blob_type, RT):
                 src_idx, trgt_idx = blob[4:]
-                if blobs[src_idx] and idx in blobs[src_idx][2]: blobs[src_idx][2].remove(idx)
-                if blobs[trgt_idx] and -idx in blobs[trgt_idx][2]: blobs[trgt_idx][2].remove(-idx)
+                # Copy the edge lists instead of removing in place: they are shared with fg
+                def without_edge(b, edge):
+                    return (b[0], b[1], [e for e in b[2] if e != edge], *b[3:])
+                if blobs[src_idx] and idx in blobs[src_idx][2]: blobs[src_idx] = without_edge(blobs[src_idx], idx)
+                if blobs[trgt_idx] and -idx in blobs[trgt_idx][2]: blobs[trgt_idx] = without_edge(blobs[trgt_idx], -idx)
             ins_outs | map[abs] | for_each[remove_blob]
     remove_blob(idx, key)
 
@@ -521,29 +514,25 @@ def traverse_flatref_imp(fr, rt, direction, traverse_type):
         "in": "in_rel",
     }
     assert isinstance(rt, RT), f"Passed Argument to traverse should be of type RelationType but got {rt}"
-    blob = fr.fg.blobs[fr.idx]
-    specific = blob[2] | filter[greater_than[0] if direction in {"out", "outout"} else less_than[0]] | collect
-    specific_blobs = specific | map[lambda idx: fr.fg.blobs[abs(idx)]] | filter[lambda b: b[1] == rt] | collect
-    if traverse_type == "single" and len(specific_blobs) != 1: return Error.ValueError(f"There isn't exactly one {translation_dict[direction]} RT.{rt} Relation. Did you mean {translation_dict[direction]}s[RT.{rt}]?")
+    cols = fr.fg.columns
+    rt_id = cols.type_id(rt)
+    rels = cols.relations_of(fr.idx, rt_id, direction in {"out", "outout"}) if rt_id != -1 else []
+    if traverse_type == "single" and len(rels) != 1: return Error.ValueError(f"There isn't exactly one {translation_dict[direction]} RT.{rt} Relation. Did you mean {translation_dict[direction]}s[RT.{rt}]?")
     
-    if direction == "inin": idx = 4
-    elif direction == "outout": idx = 5
-    else: idx = 0 # itself the relation
+    if direction == "inin": res = [cols.sources[e] for e in rels]
+    elif direction == "outout": res = [cols.targets[e] for e in rels]
+    else: res = rels # itself the relation
 
-    if traverse_type == "single": return FlatRef(fr.fg, specific_blobs[0][idx])
-    return FlatRefs(fr.fg, specific_blobs | map[lambda b: b[idx]] | collect)
+    if traverse_type == "single": return FlatRef(fr.fg, res[0])
+    return FlatRefs(fr.fg, res)
 
 def fr_outs_imp(fr):
     assert isinstance(fr, FlatRef)
-    blob = fr.fg.blobs[fr.idx]
-    outs = blob[2] | filter[greater_than[-1]] | collect
-    return FlatRefs(fr.fg, outs)
+    return FlatRefs(fr.fg, fr.fg.columns.out_edges(fr.idx))
 
 def fr_ins_imp(fr):
     assert isinstance(fr, FlatRef)
-    blob = fr.fg.blobs[fr.idx]
-    ins = blob[2] | filter[less_than[0]] | collect
-    return FlatRefs(fr.fg, ins)
+    return FlatRefs(fr.fg, fr.fg.columns.in_edges(fr.idx))
 
 def fr_ins_and_outs_imp(fr):
     assert isinstance(fr, FlatRef)
@@ -553,25 +542,26 @@ def fr_ins_and_outs_imp(fr):
 def fg_all_imp(fg, selector=None):
     assert is_a(fg, FlatGraph)
     if selector:
-        selected_blobs = fg.blobs | filter[lambda b: is_a(b[1], selector)] | collect
-    else:
-        selected_blobs = fg.blobs 
-    return FlatRefs(fg, [b[0] for b in selected_blobs])
+        cols = fg.columns
+        # is_a is evaluated once per distinct blob type instead of once per blob
+        buckets = [cols.blobs_of_type(tid) for tid,t in enumerate(cols.type_table) if is_a(t, selector)]
+        if len(buckets) == 1: return FlatRefs(fg, buckets[0].tolist())
+        return FlatRefs(fg, sorted(i for bucket in buckets for i in bucket))
+    return FlatRefs(fg, [b[0] for b in fg.blobs])
 
 
 # ------------------------------Merging FlatGraphs----------------------------------
 def fg_merge_imp(fg1, fg2 = None):
-    if isinstance(fg1, list): return fg1[1:] | reduce[fg_merge_imp][fg1[0]] | collect
-
-    def idx_generator(n):
-        def next_idx():
-            nonlocal n
-            n = n + 1
-            return n
-        return next_idx
+    # All FlatGraphs of a list are merged into one builder in a single pass
+    fgs = fg1 if isinstance(fg1, list) else [fg1, fg2]
+    builder = FlatGraphBuilder(fgs[0])
+    for fg in fgs[1:]:
+        fg_merge_into_builder(builder, fg)
+    return builder.freeze()
 
-    blobs, k_dict = [*fg1.blobs], {**fg1.key_dict}
-    next_idx = idx_generator(length(blobs) - 1)
+def fg_merge_into_builder(builder, fg2):
+    blobs, k_dict = builder.blobs, builder.key_dict
+    next_idx, add_edge = builder.next_idx, builder.add_edge
 
     idx_key_2 = {i:k for k,i in fg2.key_dict.items()}
     old_to_new = {}
@@ -590,7 +580,7 @@ def fg_merge_imp(fg1, fg2 = None):
             idx = next_idx()
             if key: k_dict[key] = idx
             new_b = (idx, new_b[1], [], *new_b[3:])
-            blobs.append(new_b)
+            builder.append(new_b)
         old_to_new[old_idx] = idx
         return new_b
 
@@ -603,17 +593,12 @@ def fg_merge_imp(fg1, fg2 = None):
         
         idx = next_idx()
         rt_b = (idx, b[1], [], None, src_b[0], trgt_b[0])
-        src_b[2].append(idx)
-        trgt_b[2].append(-idx)
         if rt_key: k_dict[rt_key] = idx
-        blobs.append(rt_b)
+        builder.append(rt_b)
+        add_edge(src_b[0], idx)
+        add_edge(trgt_b[0], -idx)
         old_to_new[b[0]] = idx
 
             
     for b in fg2.blobs | filter[lambda b: not isinstance(b[1], RT)]:
         if b[0] not in old_to_new: retrieve_or_insert_blob(b)
-
-    new_fg = FlatGraph()
-    new_fg.blobs = blobs
-    new_fg.key_dict = k_dict
-    return new_fg
\ No newline at end of file
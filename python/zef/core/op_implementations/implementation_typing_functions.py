@@ -5963,6 +5963,81 @@ def select_by_field_tp(v_tp):
     return VT.Any
 
 
+#---------------------------------------- field_columns -----------------------------------------------
+def field_columns_imp(gs: GraphSlice, et: ET, rts):
+    """Extract the values of several fields of all instances of an entity type
+    in one go, as one numpy masked array per field. This is an optimized
+    equivalent of calling, for each rt in rts:
+    gs | all[et] | map[Z >> O[rt] | value_or[None]]
+    
+    The rows of every column follow the order of `gs | all[et]`. Instances
+    without the field are masked out. The dtype is picked from the values
+    present: bool, int64, float64 (ints mixed with floats), datetime64[us]
+    (Time) or object for everything else.
+
+    The instances and their fields are walked in C++ without the GIL, and
+    the columns are filled without creating a ZefRef per value.
+
+    ---- Examples ----
+    >>> cols = g | now | field_columns[ET.Sensor][[RT.Reading, RT.Time]] | collect
+    >>> cols[RT.Reading].mean()
+
+    ---- Signature ----
+    (VT.GraphSlice, VT.ET, VT.List) -> VT.Dict
+
+    ---- Tags ----
+    - operates on: Graph
+    - related zefop: all
+    - related zefop: value
+    - related zefop: select_by_field
+    """
+    from ..VT.rae_types import RAET_get_token
+    token = RAET_get_token(et)
+    if not isinstance(token, EntityTypeToken):
+        raise Exception(f"field_columns needs a concrete entity type, got {et}")
+    rts = list(rts)
+    columns = pyzefops.field_columns_impl(gs.tx, token, [internals.get_c_token(rt) for rt in rts])
+    return dict(zip(rts, columns))
+
+def field_columns_tp(op, curr_type):
+    return VT.Dict
+
+
+#---------------------------------------- lookup -----------------------------------------------
+def lookup_imp(gs: GraphSlice, field, val):
+    """Find the instances of an entity type by the value of one of their
+    fields, i.e. those with an rt relation to something whose value is val.
+    Like select_by_field, values only match if they are of the same type:
+    looking up 5 does not find a field holding 5.0.
+    
+    The first lookup of an (et, rt) pair builds an index of the field by value
+    hash, which later lookups keep up to date with new relations and
+    assignments. select_by_field uses the same index.
+
+    ---- Examples ----
+    >>> g | now | lookup[ET.User, RT.Email]["alice@example.com"] | collect
+    >>> g | now | lookup[ET.Machine, RT.Temperature][42] | collect
+
+    ---- Signature ----
+    (VT.GraphSlice, (VT.ET, VT.RT), VT.Any) -> VT.List[VT.ZefRef]
+
+    ---- Tags ----
+    - operates on: Graph
+    - related zefop: select_by_field
+    - related zefop: all
+    - related zefop: filter
+    """
+    from ..VT.rae_types import RAET_get_token
+    et, rt = field
+    token = RAET_get_token(et)
+    if not isinstance(token, EntityTypeToken):
+        raise Exception(f"lookup needs a concrete entity type, got {et}")
+    return list(pyzefops.instances_with_field_value_impl(gs.tx, token, internals.get_c_token(rt), val))
+
+def lookup_tp(op, curr_type):
+    return VT.List[VT.ZefRef]
+
+
 
 
 
@@ -7607,6 +7682,40 @@ def load_file_imp(fname, format = None):
 def load_file_tp(op, curr_type):
     return VT.Effect
 
+def stream_file_imp(fname, chunk_size = 10_000, format = None):
+    """Lazily reads the file at the given `fname` in chunks of at most
+    `chunk_size` records, parsing each chunk based on the file extension.
+    Intended for ndjson/jsonl, csv and parquet files that are too large to
+    be loaded in one go with `load_file`.
+
+    This operator produces an effect and must be passed to `run`. The output of
+    the effect will contain a "content" key with a lazy generator of chunks:
+    lists of dicts for ndjson/jsonl and DataFrames for csv and parquet. The
+    file is only opened once the chunks are iterated over.
+
+    ---- Examples ----
+    >>> "events.ndjson" | stream_file[50_000] | run | get["content"] | for_each[process_chunk]
+
+    ---- Signature ----
+    VT.String -> VT.Effect
+    (VT.String, VT.Int) -> VT.Effect
+
+    ---- Tags ----
+    - related zefop: load_file
+    - related zefop: chunk
+    - used for: file io
+
+    """
+    return {
+        'type'       : FX.LocalFile.Stream,
+        'filename'   : fname,
+        'chunk_size' : chunk_size,
+        'format'     : format
+    }
+
+def stream_file_tp(op, curr_type):
+    return VT.Effect
+
 def save_file_imp(content, fname, settings = {}):
     """The counterpart to `load_file`. Takes the given `content` and writes it to the file at the filename `fname`. The content is converted based on the extension of the file.
     
@@ -9808,9 +9917,7 @@ def alias_imp(vt, name: str):
     - operates on: ValueType
     - used for: readability
     """
-    vt2 = ValueType_(type_name=vt._d['type_name'], absorbed=vt._d['absorbed'])
-    vt2._d['alias'] = name
-    return vt2
+    return ValueType_(type_name=vt._d['type_name'], absorbed=vt._d['absorbed'])._replace(alias=name)
 
 
 
@@ -1017,7 +1017,6 @@ class LazyValue:
         raise Exception("Shouldn't cast LazyValue to bool (this may change in the future to automatic evaluation)")
 
     def evaluate(self, unpack_generator = True):
-        from .op_implementations.dispatch_dictionary import _op_to_functions
         from .op_implementations.implementation_typing_functions import ZefGenerator
         from ..core._error import Error_
 
@@ -1025,17 +1024,12 @@ class LazyValue:
         curr_value = self.initial_val
 
         try:
+            el_ops = self.el_ops.el_ops
+            plan = compile_op_chain(el_ops)
 
-            for op_i,op in enumerate(self.el_ops.el_ops): 
+            for op_i,op in enumerate(el_ops): 
                 
                 curr_op = op
-                cur_context = {
-                    "chain": self,
-                    "op_i": op_i,
-                    "input": curr_value,
-                    "op": curr_op,
-                }
-
                 if op[0] == internals.RT.Collect: continue
 
                 if op[0] == internals.RT.Run:
@@ -1049,32 +1043,37 @@ class LazyValue:
                         except Exception as e:
                             message = f"Failed while trying to run this impure function {op[1][1]}: \n{e.args}"
                             err =  Error.Panic()
-                            err = make_custom_error(e, err, message, cur_context)
+                            err = make_custom_error(e, err, message, op_context(self, op_i, curr_value, op))
                             err.keep_traceback = True
                             err.__traceback__ = e.__traceback__
                             raise err from e
                     elif isinstance(curr_value, dict): 
                         try:
-                            curr_value = _op_to_functions[op[0]][0](curr_value)
+                            curr_value = plan[op_i](curr_value)
                         except Exception as e:
                             if not custom_error_handling_activated():
                                 raise
                             message = f"Failed while trying to run the following FX: {str(curr_value)[:50]}...\n{e}"
-                            raise make_custom_error(e, Error.Panic(), message, cur_context) from None
+                            raise make_custom_error(e, Error.Panic(), message, op_context(self, op_i, curr_value, op)) from None
                     else:
                         message = f"only effects or nullary functions can be passed to 'run' to be executed in the imperative shell. Received {curr_value}"
-                        raise make_custom_error(NotImplementedError(), Error.NotImplementedError(), message, cur_context) from None
+                        raise make_custom_error(NotImplementedError(), Error.NotImplementedError(), message, op_context(self, op_i, curr_value, op)) from None
                     break
 
-                try:
-                    to_call_func = _op_to_functions[op[0]][0]
-                except Exception as e:
-                    if not custom_error_handling_activated():
-                        raise
-                    if isinstance(e, KeyError):
-                        raise make_custom_error(e, Error.KeyError(), f"Cannot find {e} inside dispatch dictionary",cur_context) from None
-                    else:
-                        raise make_custom_error(e, Error.Panic(), f"Error happened trying to access dispatch function for {op[0]}",cur_context) from None
+                to_call_func = plan[op_i]
+                if to_call_func is None:
+                    # Not resolved when the plan was compiled: retry the lookup
+                    # to pick up late registrations and to report the error.
+                    from .op_implementations.dispatch_dictionary import _op_to_functions
+                    try:
+                        to_call_func = _op_to_functions[op[0]][0]
+                    except Exception as e:
+                        if not custom_error_handling_activated():
+                            raise
+                        if isinstance(e, KeyError):
+                            raise make_custom_error(e, Error.KeyError(), f"Cannot find {e} inside dispatch dictionary",op_context(self, op_i, curr_value, op)) from None
+                        else:
+                            raise make_custom_error(e, Error.Panic(), f"Error happened trying to access dispatch function for {op[0]}",op_context(self, op_i, curr_value, op)) from None
 
 
                 got_error = None
@@ -1089,7 +1088,7 @@ class LazyValue:
                         # current evaluation information along with this.
                         # Probably want to add in python traceback here
                         e = EvalEngineCoreError(e)
-                        got_error = add_error_context(e, cur_context)
+                        got_error = add_error_context(e, op_context(self, op_i, curr_value, op))
                     elif isinstance(e, ExceptionWrapper):
                         # Continue the panic, attaching more tb info
                         tb = e.__traceback__
@@ -1126,14 +1125,14 @@ class LazyValue:
                         else:
                             pass
                     elif isinstance(new_value, ZefGenerator_):
-                        new_value = new_value.add_context(cur_context)
+                        new_value = new_value.add_context(op_context(self, op_i, curr_value, op))
                     
 
                 if got_error is not None:
                     if not custom_error_handling_activated():
                         raise Exception(got_error)
                     else:
-                        raise add_error_context(got_error, cur_context) from None
+                        raise add_error_context(got_error, op_context(self, op_i, curr_value, op)) from None
 
                 if isinstance(new_value, (Generator, Iterator)):
                     print("Operator produced a raw generator or iterator")
@@ -1302,6 +1301,49 @@ def should_trigger_eval(value_maybe):
     
     return False
 
+# ---- Compiled execution plans -----
+# The implementation function of every elementary op in a chain is resolved
+# once per chain shape (the sequence of op RTs) and reused on later
+# evaluations. Curried arguments are not part of the key, they are always
+# read from the chain being evaluated, so e.g. `Out[RT.A] | value` and
+# `Out[RT.B] | value` share a plan.
+_compiled_plans = {}
+_compiled_plans_max_size = 4096
+
+def compile_op_chain(el_ops) -> tuple:
+    """
+    Returns a tuple with the implementation function for each op in `el_ops`.
+    Entries are None for `collect` and for ops which could not be found in the
+    dispatch dictionary. Plans with unresolved ops are not cached, so that
+    ops registered later are picked up.
+    """
+    key = tuple(op[0] for op in el_ops)
+    plan = _compiled_plans.get(key, None)
+    if plan is not None:
+        return plan
+
+    from .op_implementations.dispatch_dictionary import _op_to_functions
+    plan = tuple(None if rt == internals.RT.Collect else _op_to_functions.get(rt, (None,))[0]
+                 for rt in key)
+    if all(f is not None for rt,f in zip(key, plan) if rt != internals.RT.Collect):
+        if len(_compiled_plans) >= _compiled_plans_max_size:
+            _compiled_plans.clear()
+        _compiled_plans[key] = plan
+    return plan
+
+def invalidate_compiled_op_chains():
+    """Drop all cached plans, e.g. after an op implementation was replaced."""
+    _compiled_plans.clear()
+
+def op_context(chain, op_i, input, op) -> dict:
+    # Only built when it is needed (errors and generators), not on every op.
+    return {
+        "chain": chain,
+        "op_i": op_i,
+        "input": input,
+        "op": op,
+    }
+
 # ----LazyValue evaluation-----
 def evaluate_lazy_value_with_curried_op(lazyval: LazyValue) -> LazyValue:
     # Testcase: LazyValue([1,2,3]) | map[mapper] | collect | map[mapper] 
@@ -374,4 +374,317 @@ def import_actions(decl):
     actions = []
     for d in decl["definitions"]:
         actions += import_actions_definition(d, decl)
-    return distinct(actions)
\ No newline at end of file
+    return distinct(actions)
+
+##############################
+# * Bulk import
+#----------------------------
+
+# import_actions produces the actions for a whole declaration as one delta,
+# which is fine for small tables. bulk_import is for large dumps: columns are
+# coerced per chunk with pandas, each chunk is its own transaction and entities
+# created by earlier chunks are found again through an in-memory index.
+
+_vectorised_types = {"Int", "Float", "Bool", "String"}
+_bool_strings = {'False': False, 'false': False, 'FALSE': False, 'no': False,
+                 'True': True, 'true': True, 'TRUE': True, 'yes': True}
+
+def _to_bool(x):
+    if isinstance(x, bool) or pandas.isna(x):
+        return x
+    if x in (0, 1):
+        return bool(x)
+    return _bool_strings.get(x, None)
+
+def _coerce_column(series, data_type):
+    if data_type == "Int":
+        return pandas.to_numeric(series).astype("Int64")
+    elif data_type == "Float":
+        return pandas.to_numeric(series).astype(float)
+    elif data_type == "Bool":
+        if pandas.api.types.is_bool_dtype(series):
+            return series
+        out = series.map(_to_bool)
+        bad = out.isna() & series.notna()
+        if bad.any():
+            raise Exception(f"Bool value can't be converted: {series[bad].iloc[0]}")
+        return out.astype("boolean")
+    elif data_type == "String":
+        return series.astype("string")
+    # Everything else (times, enums, quantities, ...) is left to coerce_val
+    return series
+
+def _coerce_chunk(df, col_types):
+    return pandas.DataFrame({name: _coerce_column(df[name], data_type) for name,data_type in col_types})
+
+def _col_types(definition, decl):
+    # Entity columns hold the ID of the entity they point at, so they are read
+    # in the type of that entity's ID column.
+    col_types = []
+    for col in definition["cols"]:
+        if col["purpose"] == "ignore":
+            continue
+        if col["purpose"] in ["entity", "source", "target"]:
+            col_types.append((col["name"], get_ent_ID_col(col["ET"], decl)["data_type"]))
+        else:
+            col_types.append((col["name"], col["data_type"]))
+    return col_types
+
+def _csv_dtypes(definition, col_types):
+    # Chunks are parsed separately, so pandas would guess the type of a column
+    # per chunk. A chunk whose IDs all look like numbers would turn "007" into
+    # 7. Read String and ID columns as str and leave the rest to _coerce_chunk.
+    id_cols = [col["name"] for col in definition["cols"] if col["purpose"] in ["id", "entity", "source", "target"]]
+    return {name: str for name,data_type in col_types if data_type == "String" or name in id_cols}
+
+def _parse_csv_range(filename, header, start, end, col_types, dtypes):
+    # Runs in a worker process: parse one byte range of the file and coerce it.
+    import io
+    with open(filename, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    df = pandas.read_csv(io.BytesIO(header + data), usecols=[name for name,_ in col_types], dtype=dtypes)
+    return _coerce_chunk(df, col_types)
+
+def _quote_state(line, in_quotes):
+    """Whether a quoted field is still open at the end of line, given whether
+    one was open at its start. Returns None for a quote that neither starts
+    nor ends a quoted field, as how such a line splits is up to the parser."""
+    i = line.find(b'"')
+    while i != -1:
+        if in_quotes:
+            after = line[i+1:i+2]
+            if after == b'"':
+                # An escaped quote
+                i = line.find(b'"', i+2)
+                continue
+            if after not in (b",", b"\r", b"\n", b""):
+                return None
+            in_quotes = False
+        else:
+            if i > 0 and line[i-1:i] != b",":
+                return None
+            in_quotes = True
+        i = line.find(b'"', i+1)
+    return in_quotes
+
+def _csv_record_ranges(filename, chunk_size):
+    """Splits the body of a csv file into byte ranges of chunk_size records.
+    A newline only ends a record if it is outside of a quoted field. Returns
+    None if the file has quotes that can't be tracked this way."""
+    ranges = []
+    with open(filename, "rb") as f:
+        header = f.readline()
+        start = pos = f.tell()
+        in_quotes = False
+        n_records = 0
+        for line in f:
+            pos += len(line)
+            in_quotes = _quote_state(line, in_quotes)
+            if in_quotes is None:
+                return None
+            if in_quotes:
+                continue
+            n_records += 1
+            if n_records == chunk_size:
+                ranges.append((start, pos))
+                start = pos
+                n_records = 0
+        if pos > start:
+            ranges.append((start, pos))
+    return header, ranges
+
+def _iter_chunks(definition, col_types, chunk_size, n_workers):
+    source = definition["data_source"]
+    if source["type"] == "csv":
+        filename = source["filename"]
+        dtypes = _csv_dtypes(definition, col_types)
+        split = _csv_record_ranges(filename, chunk_size) if n_workers > 1 else None
+        if split is None:
+            with pandas.read_csv(filename, usecols=[name for name,_ in col_types], dtype=dtypes, chunksize=chunk_size) as reader:
+                for df in reader:
+                    yield _coerce_chunk(df, col_types)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        from collections import deque
+        header, ranges = split
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            # Only keep a few chunks in flight so that parsing can't run
+            # arbitrarily far ahead of the transactions.
+            pending = deque()
+            for start,end in ranges:
+                pending.append(pool.submit(_parse_csv_range, filename, header, start, end, col_types, dtypes))
+                if len(pending) >= 2*n_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    elif source["type"] == "sql":
+        for df in pandas.read_sql(source["query"], source["url"], chunksize=chunk_size):
+            yield _coerce_chunk(df[[name for name,_ in col_types]], col_types)
+    else:
+        raise Exception("Unknown data source type")
+
+def _column_values(series, data_type):
+    vals = series.astype(object).where(series.notna(), None).tolist()
+    if data_type not in _vectorised_types:
+        aet = aet_str_to_aet(data_type)
+        vals = [None if val is None else coerce_val(val, aet) for val in vals]
+    return vals
+
+def _field_actions(z, key, col, val):
+    if val is None:
+        return []
+    ae_id = f"{key} field {col['RT']}"
+    return [
+        aet_str_to_aet(col['data_type'])[ae_id],
+        Z[ae_id] <= val,
+        (z, RT(col["RT"]), Z[ae_id]),
+    ]
+
+
+class _ChunkBuilder:
+    """Collects the actions of one chunk. Entities are looked up in the index
+    of previous transactions first, then in the entities created by this
+    chunk, and are only created when neither knows them."""
+    def __init__(self, index, decl):
+        self.index = index
+        self.decl = decl
+        self.actions = []
+        self.created = {}
+
+    def entity(self, et, val):
+        key = f"<ET_{et} {val}>"
+        z = self.index.get((et, val), None)
+        if z is not None:
+            return z, key
+        if (et, val) not in self.created:
+            self.created[(et, val)] = key
+            self.actions += [ET(et)[key]]
+            self.actions += _field_actions(Z[key], key, get_ent_ID_col(et, self.decl), val)
+        return Z[key], key
+
+    def commit(self, g):
+        if not self.actions:
+            return
+        r = self.actions | transact[g] | run
+        for (et,val),key in self.created.items():
+            self.index[(et, val)] = r[key]
+
+
+def _chunk_actions(df, definition, groups, builder):
+    n = len(df)
+    col_ID = only(groups["id"]) if len(groups["id"]) == 1 else None
+
+    def values(col, data_type=None):
+        return _column_values(df[col["name"]], data_type or col["data_type"])
+
+    # Entity columns hold the ID of the entity they point at, so they are
+    # compared in the type of that entity's ID column.
+    ent_vals = [(col, values(col, get_ent_ID_col(col["ET"], builder.decl)["data_type"])) for col in groups["entity"]]
+    field_vals = [(col, values(col)) for col in groups["field"]]
+    fieldon_vals = [(col, values(col)) for col in groups["field_on"]]
+    id_vals = values(col_ID) if col_ID is not None else None
+
+    if definition["kind"] == "relation":
+        col_source = only(groups["source"])
+        col_target = only(groups["target"])
+        source_vals = values(col_source, get_ent_ID_col(col_source["ET"], builder.decl)["data_type"])
+        target_vals = values(col_target, get_ent_ID_col(col_target["ET"], builder.decl)["data_type"])
+        row_numbers = df.index.tolist()
+
+    for i in range(n):
+        if definition["kind"] == "entity":
+            val = id_vals[i]
+            assert val is not None
+            z_this, this_key = builder.entity(definition["ET"], val)
+        elif definition["kind"] == "relation":
+            z_source, source_key = builder.entity(col_source["ET"], source_vals[i])
+            z_target, target_key = builder.entity(col_target["ET"], target_vals[i])
+            row_id = row_numbers[i] if col_ID is None else id_vals[i]
+            this_key = f"<RT_{source_key}_{target_key}_{definition['RT']} {row_id}>"
+            builder.actions += [(z_source, RT(definition["RT"])[this_key], z_target)]
+            if col_ID is not None:
+                builder.actions += _field_actions(Z[this_key], this_key, col_ID, id_vals[i])
+            z_this = Z[this_key]
+        else:
+            raise NotImplementedError()
+
+        for col,vals in field_vals:
+            builder.actions += _field_actions(z_this, this_key, col, vals[i])
+
+        conn_keys = {}
+        for col,vals in ent_vals:
+            if col["name"] == definition.get("ID_col", None) or vals[i] is None:
+                continue
+            z_target, target_key = builder.entity(col["ET"], vals[i])
+            rel_key = f"{this_key} {col['RT']} {target_key}"
+            builder.actions += [(z_this, RT(col["RT"])[rel_key], z_target)]
+            conn_keys[col["name"]] = rel_key
+
+        for col,vals in fieldon_vals:
+            rel_key = conn_keys.get(col["target"], None)
+            if rel_key is None:
+                continue
+            builder.actions += _field_actions(Z[rel_key], rel_key, col, vals[i])
+
+
+def bulk_import(decl, g, chunk_size=100_000, n_workers=None, index=None, report=print):
+    """
+    Imports the tables of a declaration (as produced by guess_csvs or the
+    sql_ui) into the graph g. Each chunk of chunk_size rows is parsed and
+    coerced column-wise and committed as its own transaction, so memory use
+    is bounded by the chunk size rather than the size of the dump.
+
+    CSV files are parsed in a pool of n_workers processes (defaults to the
+    number of cpus, 1 parses in this process). This needs the file to be
+    split on record boundaries beforehand, so a file with a quote inside an
+    unquoted field (e.g. 5" screen) is parsed in this process instead. Only
+    the default csv dialect (comma separated, quotes escaped by doubling) is
+    supported. A data source can also be
+    {"type": "sql", "url": ..., "query": ...}, which is read in chunks with
+    pandas.read_sql.
+
+    Entities are resolved through index, a dict from (ET name, ID value) to
+    the entity, which is filled as entities are created. Pass the same dict
+    to several calls to continue an import into the same graph.
+
+    After every transaction report is called with a progress message. The
+    totals are returned:
+    {"rows": 20_000_000, "transactions": 200, "seconds": ..., "rows_per_second": ...}
+    """
+    import time
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if index is None:
+        index = {}
+
+    t_start = time.perf_counter()
+    total_rows = 0
+    n_transactions = 0
+    for definition in decl["definitions"]:
+        assert validate_definition(definition, decl)
+        groups = definition["cols"] | group_by[get["purpose"]][["entity","field", "field_on", "ignore", "id", "source", "target"]] | func[dict] | collect
+        col_types = _col_types(definition, decl)
+
+        rows_so_far = 0
+        for df in _iter_chunks(definition, col_types, chunk_size, n_workers):
+            df.index = range(rows_so_far, rows_so_far + len(df))
+            builder = _ChunkBuilder(index, decl)
+            _chunk_actions(df, definition, groups, builder)
+            builder.commit(g)
+
+            rows_so_far += len(df)
+            total_rows += len(df)
+            n_transactions += 1
+            if report is not None:
+                elapsed = time.perf_counter() - t_start
+                report(f"Bulk import: {rows_so_far} rows of table tagged {definition['tag']}, {total_rows} in total at {total_rows / elapsed:.0f} rows/s")
+
+    elapsed = time.perf_counter() - t_start
+    return {
+        "rows": total_rows,
+        "transactions": n_transactions,
+        "seconds": elapsed,
+        "rows_per_second": total_rows / elapsed if elapsed > 0 else 0.0,
+    }
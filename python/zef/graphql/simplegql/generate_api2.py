@@ -17,7 +17,12 @@ from ... import *
 from ...ops import *
 from functools import partial as P
 from ...core.logger import log
+from ...core.VT import ZefGenerator
+from ...pyzef import main as pymain, zefops as pyzefops
+from threading import Lock
 import functools
+import heapq
+import bisect
 
 from ariadne import ObjectType, QueryType, MutationType, EnumType, ScalarType
 
@@ -486,7 +491,7 @@ def resolve_field(z, info, *, z_field, **params):
     is_list = z_field | op_is_list | collect
     is_required = z_field | op_is_required | collect
 
-    opts = internal_resolve_field(z, info, z_field)
+    opts = cached_resolve_field(z, info, z_field)
 
     if is_list:
         opts = handle_list_params(opts, target(z_field), params, info)
@@ -519,7 +524,6 @@ def resolve_id2(obj, graphql_info):
 ##############################
 # * Mutations
 #----------------------------
-from threading import Lock
 mutation_lock = Lock()
 
 def resolve_add(_, info, *, type_node, **params):
@@ -741,7 +745,21 @@ def obtain_initial_list(type_node, filter_opts, info):
 
         return zs
     else:
-        zs = gs | all[type_et] | filter[pass_query_auth[type_node][info]]
+        candidates = None
+        if filter_opts is not None:
+            candidates = indexed_candidates(type_node, filter_opts, info)
+
+        if candidates is None:
+            initial = gs | all[type_et] | collect
+        else:
+            g = Graph(gs)
+            initial = [ZefRef(EZefRef(ind, g), gs.tx) for ind in sorted(candidates)]
+            if info.context["debug_level"] >= 3:
+                log.debug("DEBUG 3: found candidates in field indexes", length_candidates=len(initial))
+
+        # Going through a generator keeps the auth checks lazy, so that only
+        # the entities which are needed for the first/offset are checked.
+        zs = ZefGenerator(lambda: iter(initial)) | filter[pass_query_auth[type_node][info]]
         if info.context["debug_level"] >= 3:
             log.debug("DEBUG 3: built initial list from type and auth", length_list=length(zs))
         return zs
@@ -752,8 +770,10 @@ def handle_list_params(opts, z_node, params, info):
     opts = maybe_filter_result(opts, z_node, info, params.get("filter", None))
     if info.context["debug_level"] >= 3:
         log.debug("DEBUG 3: after filtering", length_list=length(opts))
-    opts = maybe_sort_result(opts, z_node, info, params.get("order", None))
-    opts = maybe_paginate_result(opts, params.get("first", None), params.get("offset", None))
+    first, offset = params.get("first", None), params.get("offset", None)
+    limit = None if first is None else first + (offset or 0)
+    opts = maybe_sort_result(opts, z_node, info, params.get("order", None), limit)
+    opts = maybe_paginate_result(opts, first, offset)
     return opts
 
 @func
@@ -868,10 +888,40 @@ def get_field_rel_by_name(z_type, name):
 
 # ** Sorting
 
-def maybe_sort_result(opts, z_node, info, sort_decl=None):
+class _Desc:
+    # Inverts the order of a value inside a sort key
+    __slots__ = ["val"]
+    def __init__(self, val):
+        self.val = val
+    def __lt__(self, other):
+        return other.val < self.val
+    def __eq__(self, other):
+        return self.val == other.val
+
+def maybe_sort_result(opts, z_node, info, sort_decl=None, limit=None):
     if sort_decl is None:
         return opts
 
+    if limit is not None:
+        # Only the first `limit` items are needed, so select them with a heap
+        # instead of sorting everything. nsmallest is stable, so this gives
+        # the same items as the sequence of sorts below.
+        field_resolver = field_resolver_by_name[z_node][info]
+        key_parts = []
+        cur = sort_decl
+        while cur is not None:
+            if "asc" in cur:
+                assert not "desc" in cur
+                key_parts += [(field_resolver[cur["asc"]], False)]
+            elif "desc" in cur:
+                key_parts += [(field_resolver[cur["desc"]], True)]
+            cur = cur.get("then", None)
+
+        def key(z):
+            return tuple(_Desc(val(z)) if desc else val(z) for val,desc in key_parts)
+
+        return heapq.nsmallest(limit, opts | collect, key=key)
+
     field_resolver = field_resolver_by_name[z_node][info]
 
     # First, get the list of things to sort by, so that we can reverse it
@@ -905,6 +955,207 @@ def maybe_paginate_result(opts, first=None, offset=None):
     return opts
 
 
+# ** Field indexes
+
+# A query whose filter compares a scalar field with eq/in/between can start
+# from the entities that hold those values, instead of going through all
+# entities of the type. The candidates still go through auth and the full
+# filter afterwards, so the indexes only have to give a superset of the
+# result: values are indexed without auth and fields which don't resolve to
+# exactly one value are left out.
+#
+# The indexes are kept in the "field_indexes" dict of the query context, which
+# the server creates once. They are dropped along with the server, instead of
+# keeping every graph queried and its values alive for the whole process.
+# Without that dict no index is used.
+
+_field_indexes_lock = Lock()
+
+def op_is_indexable(z_field):
+    return (not op_is_list(z_field)
+            and op_is_scalar(target(z_field))
+            and z_field | has_out[RT.GQL_Resolve_With] | collect)
+
+class FieldIndex:
+    """Maps the values of one scalar field to the blob indices of the
+    entities holding them. It follows the latest graph slice it has been
+    asked about, by looking at the changes of the transactions since the
+    previous one."""
+
+    def __init__(self, type_node, z_field):
+        self.et = ET(type_node | Out[RT.GQL_Delegate] | collect)
+        self.rt = RT(z_field | Out[RT.GQL_Resolve_With] | collect)
+        self.is_incoming = op_is_incoming(z_field)
+        self.z_field = z_field
+        self.by_value = {}
+        self.by_entity = {}
+        self.sorted_values = None
+        self.slice_index = None
+        self.usable = True
+        self.lock = Lock()
+
+    def _set(self, ind, val):
+        old = self.by_entity.pop(ind, None)
+        if old is not None:
+            bucket = self.by_value[old]
+            bucket.discard(ind)
+            if len(bucket) == 0:
+                del self.by_value[old]
+        if val is not None:
+            self.by_entity[ind] = val
+            self.by_value.setdefault(val, set()).add(ind)
+        self.sorted_values = None
+
+    def _evaluate(self, ezr, gs, info):
+        if BT(ezr) != BT.ENTITY_NODE or rae_type(ezr) != self.et or not exists_at(ezr, gs):
+            return None
+        opts = internal_resolve_field(ezr | in_frame[gs] | collect, info, self.z_field, False) | collect
+        if len(opts) != 1:
+            return None
+        return single(opts)
+
+    def _affected_entities(self, z, affected):
+        bt = BT(z)
+        if bt == BT.ENTITY_NODE:
+            affected.add(pymain.index(z))
+        elif bt == BT.RELATION_EDGE:
+            if rae_type(z) == self.rt:
+                affected.add(pymain.index(target(z) if self.is_incoming else source(z)))
+        elif bt in [BT.ATTRIBUTE_ENTITY_NODE, BT.VALUE_NODE]:
+            rels = z | out_rels[self.rt] if self.is_incoming else z | in_rels[self.rt]
+            for rel in rels | collect:
+                affected.add(pymain.index(target(rel) if self.is_incoming else source(rel)))
+
+    def update(self, gs, info):
+        g = Graph(gs)
+        gs_index = graph_slice_index(gs)
+        if self.slice_index is None:
+            for z in gs | all[self.et] | collect:
+                self._set(pymain.index(z), self._evaluate(to_ezefref(z), gs, info))
+        elif gs_index > self.slice_index:
+            affected = set()
+            tx = gs.tx
+            while graph_slice_index(to_graph_slice(tx)) > self.slice_index:
+                for z in tx | pyzefops.instantiated:
+                    self._affected_entities(z, affected)
+                for z in tx | pyzefops.terminated:
+                    self._affected_entities(z, affected)
+                for z in tx | pyzefops.value_assigned:
+                    self._affected_entities(z, affected)
+                tx = tx | previous_tx | collect
+            for ind in affected:
+                self._set(ind, self._evaluate(EZefRef(ind, g), gs, info))
+        self.slice_index = gs_index
+
+    def _between(self, low, high):
+        if self.sorted_values is None:
+            self.sorted_values = sorted(self.by_value)
+        i_low = bisect.bisect_left(self.sorted_values, low)
+        i_high = bisect.bisect_right(self.sorted_values, high)
+        out = set()
+        for val in self.sorted_values[i_low:i_high]:
+            out |= self.by_value[val]
+        return out
+
+    def candidates(self, sub):
+        result = None
+        for key,arg in sub.items():
+            if key == "eq":
+                found = set(self.by_value.get(arg, ()))
+            elif key == "in":
+                found = set()
+                for val in arg:
+                    found |= self.by_value.get(val, set())
+            elif key == "between":
+                found = self._between(arg["min"], arg["max"])
+            else:
+                continue
+            result = found if result is None else result & found
+        return result
+
+
+def field_index_candidates(type_node, z_field, sub, info):
+    # Returns None whenever the index can't be used, so that the caller falls
+    # back to going through all entities.
+    field_indexes = info.context.get("field_indexes", None)
+    if field_indexes is None:
+        return None
+    gs = info.context["gs"]
+    key = (uid(Graph(gs)), uid(z_field))
+    with _field_indexes_lock:
+        index = field_indexes.get(key, None)
+        if index is None:
+            index = FieldIndex(type_node, z_field)
+            field_indexes[key] = index
+
+    with index.lock:
+        if not index.usable:
+            return None
+        if index.slice_index is not None and graph_slice_index(gs) < index.slice_index:
+            # The index has moved on past this slice already
+            return None
+        try:
+            index.update(gs, info)
+            return index.candidates(sub)
+        except TypeError:
+            # Values which can't be hashed or ordered
+            if index.slice_index is None:
+                index.usable = False
+            return None
+
+def indexed_candidates(type_node, fil, info):
+    """Returns the blob indices of a superset of the entities passing the
+    filter, using the eq/in/between parts of the filter that all entities
+    have to pass. Returns None if no part of the filter could use an index."""
+    result = None
+    for key,sub in fil.items():
+        if key == "and":
+            found = None
+            for part in sub:
+                part_found = indexed_candidates(type_node, part, info)
+                if part_found is not None:
+                    found = part_found if found is None else found & part_found
+        elif key in ["or", "not", "id"]:
+            continue
+        else:
+            z_field = get_field_rel_by_name(type_node, key)
+            if isinstance(sub, bool):
+                sub = {"eq": sub}
+            if not any(k in sub for k in ["eq", "in", "between"]) or not op_is_indexable(z_field):
+                continue
+            found = field_index_candidates(type_node, z_field, sub, info)
+
+        if found is not None:
+            result = found if result is None else result & found
+    return result
+
+
+# ** Per-request caches
+
+def request_cache(info, name):
+    """A dict that lives as long as the GraphQL request of info. Resolvers
+    for nested fields otherwise repeat the same traversals and auth checks for
+    every parent an object is reached through."""
+    caches = info.context.setdefault("request_caches", {})
+    return caches.setdefault(name, {})
+
+def ref_key(z):
+    # ZefRefs can't be hashed, so they are keyed by their blob index and the
+    # blob index of their reference frame.
+    return (pymain.index(z), pymain.index(frame(z).tx))
+
+def cached_resolve_field(z, info, z_field):
+    if not isinstance(z, ZefRef):
+        return internal_resolve_field(z, info, z_field) | collect
+    cache = request_cache(info, "fields")
+    key = (ref_key(z), pymain.index(z_field))
+    opts = cache.get(key, None)
+    if opts is None:
+        opts = internal_resolve_field(z, info, z_field) | collect
+        cache[key] = opts
+    return opts
+
+
 # ** Resolution
 
 @func
@@ -1229,7 +1480,17 @@ def pass_auth_generic(z, schema_node, info, rt_list):
 
 @func
 def pass_query_auth(z, schema_node, info):
-    return pass_auth_generic(z, schema_node, info, [RT.AllowQuery])
+    # Nested queries check the same objects many times over, so the decision
+    # is remembered for the rest of the request.
+    if not isinstance(z, ZefRef):
+        return pass_auth_generic(z, schema_node, info, [RT.AllowQuery])
+    cache = request_cache(info, "query_auth")
+    key = (ref_key(z), pymain.index(schema_node))
+    passed = cache.get(key, None)
+    if passed is None:
+        passed = pass_auth_generic(z, schema_node, info, [RT.AllowQuery])
+        cache[key] = passed
+    return passed
 
 @func
 def pass_add_auth(z, schema_node, info):
@@ -1247,15 +1508,30 @@ def pass_post_update_auth(z, schema_node, info):
 def pass_delete_auth(z, schema_node, info):
     return pass_auth_generic(z, schema_node, info, [RT.AllowDelete, RT.AllowUpdate, RT.AllowQuery])
 
-def temporary__call_string_as_func(s, **kwds):
+def _auth_eval_globals():
+    from ...core import _ops
+    return _auth_eval_globals_for_version(_ops._registry_version)
+
+@functools.lru_cache(maxsize=1)
+def _auth_eval_globals_for_version(registry_version):
+    # Ops added by register_zefop only show up in core._ops, not in zef.ops
     from ... import core, ops
+    from ...core import _ops
+    return {
+        **{name: getattr(core,name) for name in dir(core) if not name.startswith("_")},
+        **{name: getattr(_ops,name) for name in dir(_ops) if not name.startswith("_")},
+        **{name: getattr(ops,name) for name in dir(ops) if not name.startswith("_")},
+    }
+
+@functools.lru_cache(maxsize=1024)
+def _compile_auth_expr(s):
+    return compile(s, "<auth expression>", "eval")
+
+def temporary__call_string_as_func(s, **kwds):
     try:
         out = eval(
-            s, {
-                **{name: getattr(core,name) for name in dir(core) if not name.startswith("_")},
-                **{name: getattr(ops,name) for name in dir(ops) if not name.startswith("_")},
-                "auth_field": P(auth_helper_auth_field, **kwds),
-            },
+            _compile_auth_expr(s),
+            {**_auth_eval_globals(), "auth_field": P(auth_helper_auth_field, **kwds)},
             kwds
         )
     except Exception as exc:
@@ -125,7 +125,8 @@ def query(request, context):
             context_value={"gs": now(context["g_data"]),
                         "auth": auth_context,
                         "debug_level": context["debug_level"],
-                        "read_only": context["read_only"]},
+                        "read_only": context["read_only"],
+                        "field_indexes": context["field_indexes"]},
         )
         if not this_success:
             if context["debug_level"] >= 0:
@@ -158,6 +159,8 @@ def start_server(z_gql_root,
                  logging=True,
                  debug_level=0,
                  read_only=False,
+                 engine="asyncio",
+                 workers=32,
                  ):
 
     gql_dict = generate_resolvers_fcts(z_gql_root)
@@ -175,6 +178,8 @@ def start_server(z_gql_root,
         "ari_schema": ari_schema,
         "debug_level": debug_level,
         "read_only": read_only,
+        # Filter indexes shared by the queries of this server
+        "field_indexes": {},
     }
 
     if z_gql_root | has_out[RT.AuthJWKURL] | collect:
@@ -203,6 +208,8 @@ def start_server(z_gql_root,
         ]]] | subscribe[run]),
         'logging': logging,
         'bind_address': bind_address,
+        'engine': engine,
+        'workers': workers,
     } | run
     if is_a(http_r, Error):
         raise Exception("Error in creating server") from http_r.args[0]
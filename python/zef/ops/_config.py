@@ -18,7 +18,6 @@ __all__ = [
 ]
 
 import os
-import yaml
 from ..core.op_implementations.dispatch_dictionary import _op_to_functions
 from ..core import *
 from ..core._ops import *